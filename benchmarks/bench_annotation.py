@@ -0,0 +1,92 @@
+# benchmarks/bench_annotation.py
+"""
+Coste de anotar el esqueleto en cada fotograma: latencia por fotograma y memoria
+asignada por estimate() con anotación "ansiosa" (copia del fotograma + dibujo en
+el estimador, comportamiento anterior) frente a anotación bajo demanda (el
+estimador solo devuelve landmarks).
+
+Uso:
+    python -m benchmarks.bench_annotation [--video ruta_1080p.mp4] [--frames 60]
+
+Sin --video se genera un clip sintético de 1920x1080. En un clip sin persona no
+hay detecciones; para que la parte de anotación sea comparable se dibuja
+entonces un esqueleto de referencia fijo.
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from src.A_preprocessing.frame_extraction import VideoFrameStream
+from src.B_pose_estimation.estimators import NUM_LANDMARKS, PoseEstimator
+from src.F_visualization.video_renderer import draw_pose_landmarks
+from .bench_frame_decode import create_synthetic_clip
+
+
+def reference_landmarks() -> np.ndarray:
+    """Esqueleto fijo y visible en el centro de la imagen (coordenadas normalizadas)."""
+    rng = np.random.default_rng(0)
+    landmarks = np.ones((NUM_LANDMARKS, 4), dtype=np.float32)
+    landmarks[:, :2] = 0.3 + 0.4 * rng.random((NUM_LANDMARKS, 2))
+    return landmarks
+
+
+def measure(frames: list, annotate: bool) -> dict:
+    """
+    Latencias (ms), pico de memoria asignada durante la llamada y memoria que sigue
+    retenida por el resultado de cada fotograma (mediana, MB).
+    """
+    estimator = PoseEstimator()
+    fallback = reference_landmarks()
+    latencies, peaks, retained = [], [], []
+    try:
+        estimator.estimate(frames[0])  # Calentamiento del grafo de MediaPipe
+        for frame in frames:
+            tracemalloc.start()
+            start = time.perf_counter()
+            result = estimator.estimate(frame)
+            if annotate:
+                landmarks = result.landmarks if result.landmarks is not None else fallback
+                annotated = draw_pose_landmarks(frame, landmarks)
+            latencies.append((time.perf_counter() - start) * 1000.0)
+            current, peak = tracemalloc.get_traced_memory()
+            retained.append(current)
+            peaks.append(peak)
+            tracemalloc.stop()
+            if annotate:
+                del annotated
+    finally:
+        estimator.close()
+    return {
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p95_ms': float(np.percentile(latencies, 95)),
+        'peak_mb': float(np.median(peaks)) / 2**20,
+        'retained_mb': float(np.median(retained)) / 2**20,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--video', help="Clip de 1080p; si se omite se genera uno sintético")
+    parser.add_argument('--frames', type=int, default=60)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        video = args.video or create_synthetic_clip(os.path.join(tmp, 'clip_1080p.mp4'),
+                                                    width=1920, height=1080, num_frames=args.frames)
+        with VideoFrameStream(video, rotate=0) as stream:
+            frames = [frame for _, frame in zip(range(args.frames), stream)]
+
+    h, w = frames[0].shape[:2]
+    print(f"{len(frames)} fotogramas de {w}x{h} ({frames[0].nbytes / 2**20:.1f} MB cada uno)")
+    print(f"{'modo':>12} {'p50 (ms)':>9} {'p95 (ms)':>9} {'pico (MB)':>10} {'retenido (MB)':>14}")
+    for label, annotate in (('ansioso', True), ('bajo demanda', False)):
+        stats = measure(frames, annotate)
+        print(f"{label:>12} {stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} {stats['peak_mb']:>10.2f} {stats['retained_mb']:>14.2f}")
+
+
+if __name__ == '__main__':
+    main()
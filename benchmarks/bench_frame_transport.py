@@ -0,0 +1,95 @@
+# benchmarks/bench_frame_transport.py
+"""
+Micro-benchmark del transporte de fotogramas entre procesos: pickle por una
+multiprocessing.Queue frente al ring de memoria compartida (SharedFrameRing),
+a 720p y 1080p. El consumidor solo lee un píxel y devuelve un acuse pequeño,
+así que se mide el coste del transporte y no el de la inferencia.
+
+Uso:
+    python -m benchmarks.bench_frame_transport [--frames 300] [--slots 8]
+"""
+import argparse
+import multiprocessing as mp
+import time
+
+import numpy as np
+
+from src.A_preprocessing.shared_frames import SharedFrameRing
+
+RESOLUTIONS = {'720p': (720, 1280, 3), '1080p': (1080, 1920, 3)}
+
+
+def _pickle_consumer(frames_q, acks_q):
+    while True:
+        frame = frames_q.get()
+        if frame is None:
+            break
+        acks_q.put(int(frame[0, 0, 0]))
+
+
+def _shm_consumer(ring_spec, ready_q, free_q, acks_q):
+    ring = SharedFrameRing.attach(ring_spec)
+    while True:
+        slot = ready_q.get()
+        if slot is None:
+            break
+        acks_q.put(int(ring.view(slot)[0, 0, 0]))
+        free_q.put(slot)
+    ring.close()
+
+
+def bench_pickle(shape, n_frames: int, maxsize: int) -> float:
+    ctx = mp.get_context('spawn')
+    frames_q, acks_q = ctx.Queue(maxsize), ctx.Queue()
+    consumer = ctx.Process(target=_pickle_consumer, args=(frames_q, acks_q))
+    consumer.start()
+    frame = np.random.default_rng(0).integers(0, 255, shape, dtype=np.uint8)
+    start = time.perf_counter()
+    for _ in range(n_frames):
+        frames_q.put(frame)
+    for _ in range(n_frames):
+        acks_q.get()
+    elapsed = time.perf_counter() - start
+    frames_q.put(None)
+    consumer.join()
+    return n_frames / elapsed
+
+
+def bench_shared_memory(shape, n_frames: int, slots: int) -> float:
+    ctx = mp.get_context('spawn')
+    ring = SharedFrameRing(shape, slots)
+    ready_q, free_q, acks_q = ctx.Queue(), ctx.Queue(), ctx.Queue()
+    for slot in range(slots):
+        free_q.put(slot)
+    consumer = ctx.Process(target=_shm_consumer, args=(ring.spec, ready_q, free_q, acks_q))
+    consumer.start()
+    frame = np.random.default_rng(0).integers(0, 255, shape, dtype=np.uint8)
+    start = time.perf_counter()
+    for _ in range(n_frames):
+        slot = free_q.get()
+        ring.write(slot, frame)  # La única copia del fotograma
+        ready_q.put(slot)
+    for _ in range(n_frames):
+        acks_q.get()
+    elapsed = time.perf_counter() - start
+    ready_q.put(None)
+    consumer.join()
+    ring.close()
+    return n_frames / elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--slots', type=int, default=8)
+    args = parser.parse_args(argv)
+
+    print(f"{'resolución':>10} {'pickle (f/s)':>13} {'shm (f/s)':>10} {'ganancia':>9}")
+    for label, shape in RESOLUTIONS.items():
+        pickled = bench_pickle(shape, args.frames, args.slots)
+        shared = bench_shared_memory(shape, args.frames, args.slots)
+        print(f"{label:>10} {pickled:>13.1f} {shared:>10.1f} {shared / pickled:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,408 @@
+# benchmarks/bench_suite.py
+"""
+Suite de benchmarks reproducible: mide cada fase del análisis por separado
+(extracción de fotogramas, latencia por fotograma del estimador 2D y 3D,
+filtrado e interpolación, métricas 2D y 3D, conteo de repeticiones, render del
+vídeo de depuración), el pipeline 2D completo y el pipeline reproduciendo
+landmarks grabados (2D y 3D, sin MediaPipe), y compara el resultado con una
+línea base JSON guardada.
+
+Por defecto todo es sintético y determinista (benchmarks/synthetic.py): una
+sesión de sentadillas con --frames fotogramas y un clip de --width x --height
+con su esqueleto dibujado. Con --video y --landmarks se usan un clip grabado y
+unos landmarks grabados (.npz con el formato de la caché de landmarks). Todo
+se ejecuta en CPU y sin red.
+
+Cada fase se ejecuta --repeat veces y se guarda la mejor marca. Con --baseline,
+una fase es una regresión si su tiempo por fotograma supera el de la línea base
+en más de --tolerance (fracción) y en más de --min-delta segundos en total; en
+ese caso el programa termina con código 1.
+
+Uso:
+    python -m benchmarks.bench_suite --output base.json
+    python -m benchmarks.bench_suite --baseline base.json [--tolerance 0.25]
+    python -m benchmarks.bench_suite --stages filtrado metricas_2d conteo_2d --frames 5000
+
+El estimador 3D se mide con --complexity-3d 1 por defecto: el modelo de
+complejidad 2 se descarga la primera vez y no está disponible sin red. Si el
+estimador no se puede crear (modelo sin descargar, MediaPipe no instalado), la
+fase se marca como omitida. Cualquier otra excepción es un error de la fase: se
+informa y el programa termina con código 1. Con --baseline, una fase medida en
+la línea base que ahora queda omitida o con error también cuenta como regresión.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import traceback
+from contextlib import contextmanager
+
+import numpy as np
+
+from src import config
+from src.A_preprocessing.frame_extraction import VideoFrameStream
+from src.B_pose_estimation.estimators import BlazePose3DEstimator, PoseEstimator, SessionLandmarks
+from src.B_pose_estimation.replay import load_recording, save_recording
+from src.B_pose_estimation.processing import (
+    calculate_metrics_from_sequence,
+    filter_and_interpolate_landmarks,
+    landmarks_to_dataframe,
+)
+from src.D_modeling.analysis_3d import calculate_3d_metrics, count_reps_3d
+from src.D_modeling.count_reps import count_repetitions_from_df
+from src.F_visualization.video_renderer import DebugVideoWriter, draw_pose_landmarks
+from src.instrumentation import latency_percentiles, package_versions
+from .synthetic import synthetic_session, write_synthetic_clip
+
+STAGES = ('extraccion', 'estimacion_pose', 'estimacion_pose_3d', 'filtrado', 'metricas_2d', 'metricas_3d',
+          'conteo_2d', 'conteo_3d', 'render_video', 'pipeline_2d', 'pipeline_replay_2d', 'pipeline_replay_3d')
+DEFAULT_TOLERANCE = 0.25
+DEFAULT_MIN_DELTA_S = 0.005
+
+
+class StageUnavailable(Exception):
+    """La fase no se puede medir en este entorno (p. ej. el modelo del estimador no está disponible)."""
+
+
+def create_estimator(factory):
+    """Construye el estimador; si falta el modelo o MediaPipe, lanza StageUnavailable."""
+    try:
+        return factory()
+    except (OSError, ImportError) as e:  # URLError (descarga sin red) es un OSError
+        raise StageUnavailable(f"{type(e).__name__}: {e}") from e
+
+
+def environment() -> dict:
+    return {
+        'plataforma': platform.platform(),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'versiones': package_versions(),
+    }
+
+
+def best_of(func, repeat: int) -> tuple[float, object]:
+    """Mejor tiempo (s) de 'repeat' llamadas a func() y el valor devuelto por la última."""
+    best, value = None, None
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        value = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, value
+
+
+def stage_result(seconds: float, frames: int, **extra) -> dict:
+    return {
+        'segundos': seconds,
+        'fotogramas': frames,
+        'ms_por_fotograma': 1000.0 * seconds / frames if frames else None,
+        'fps': frames / seconds if frames and seconds > 0 else None,
+        **extra,
+    }
+
+
+@contextmanager
+def analysis_mode(use_3d: bool):
+    """Fija config.USE_3D_ANALYSIS mientras dura el bloque."""
+    previous = config.USE_3D_ANALYSIS
+    config.USE_3D_ANALYSIS = use_3d
+    try:
+        yield
+    finally:
+        config.USE_3D_ANALYSIS = previous
+
+
+class Fixtures:
+    """Datos de entrada compartidos por las fases; los derivados se calculan una sola vez."""
+    def __init__(self, session: SessionLandmarks, video_path: str, pose_frames: int, work_dir: str):
+        self.session = session
+        self.video_path = video_path
+        self.pose_frames = pose_frames
+        self.work_dir = work_dir
+        self._frames = None
+        self._df_raw = None
+        self._sequence = None
+        self._metrics_2d = None
+        self._metrics_3d = None
+
+    @property
+    def frames(self) -> list:
+        if self._frames is None:
+            with VideoFrameStream(self.video_path, rotate=0) as stream:
+                self._frames = list(stream)
+        return self._frames
+
+    @property
+    def df_raw(self):
+        if self._df_raw is None:
+            self._df_raw = landmarks_to_dataframe(self.session.landmarks, self.session.crop_boxes)
+        return self._df_raw
+
+    @property
+    def sequence(self) -> np.ndarray:
+        if self._sequence is None:
+            self._sequence, _ = filter_and_interpolate_landmarks(self.df_raw)
+        return self._sequence
+
+    @property
+    def metrics_2d(self):
+        if self._metrics_2d is None:
+            self._metrics_2d = calculate_metrics_from_sequence(self.sequence, self.session.fps)
+        return self._metrics_2d
+
+    @property
+    def metrics_3d(self):
+        if self._metrics_3d is None:
+            self._metrics_3d = calculate_3d_metrics(self.session.world_landmarks, self.session.fps)
+        return self._metrics_3d
+
+
+def _measure_estimator(estimator, frames: list, repeat: int) -> dict:
+    """Latencia por fotograma: la mejor pasada completa y los percentiles de todas las llamadas."""
+    latencies = []
+    try:
+        estimator.estimate(frames[0])      # Calentamiento del grafo de MediaPipe
+
+        def run():
+            estimator.reset()
+            for frame in frames:
+                start = time.perf_counter()
+                estimator.estimate(frame)
+                latencies.append((time.perf_counter() - start) * 1000.0)
+
+        seconds, _ = best_of(run, repeat)
+    finally:
+        estimator.close()
+    return stage_result(seconds, len(frames), latencias_ms=latency_percentiles(latencies))
+
+
+def bench_extraccion(fx: Fixtures, repeat: int, args) -> dict:
+    def run():
+        with VideoFrameStream(fx.video_path, rotate=0) as stream:
+            return sum(1 for _ in stream)
+    seconds, frames = best_of(run, repeat)
+    return stage_result(seconds, frames)
+
+
+def bench_estimacion_pose(fx: Fixtures, repeat: int, args) -> dict:
+    return _measure_estimator(create_estimator(PoseEstimator), fx.frames[:fx.pose_frames], repeat)
+
+
+def bench_estimacion_pose_3d(fx: Fixtures, repeat: int, args) -> dict:
+    estimator = create_estimator(lambda: BlazePose3DEstimator(model_complexity=args.complexity_3d))
+    return _measure_estimator(estimator, fx.frames[:fx.pose_frames], repeat)
+
+
+def bench_filtrado(fx: Fixtures, repeat: int, args) -> dict:
+    session = fx.session
+    seconds, _ = best_of(lambda: filter_and_interpolate_landmarks(
+        landmarks_to_dataframe(session.landmarks, session.crop_boxes)), repeat)
+    return stage_result(seconds, len(session))
+
+
+def bench_metricas_2d(fx: Fixtures, repeat: int, args) -> dict:
+    sequence = fx.sequence
+    seconds, _ = best_of(lambda: calculate_metrics_from_sequence(sequence, fx.session.fps), repeat)
+    return stage_result(seconds, len(sequence))
+
+
+def bench_metricas_3d(fx: Fixtures, repeat: int, args) -> dict:
+    seconds, _ = best_of(lambda: calculate_3d_metrics(fx.session.world_landmarks, fx.session.fps), repeat)
+    return stage_result(seconds, len(fx.session))
+
+
+def bench_conteo_2d(fx: Fixtures, repeat: int, args) -> dict:
+    df_metrics = fx.metrics_2d
+    seconds, n_reps = best_of(lambda: count_repetitions_from_df(df_metrics, low_thresh=config.SQUAT_LOW_THRESH),
+                              repeat)
+    return stage_result(seconds, len(df_metrics), repeticiones=n_reps)
+
+
+def bench_conteo_3d(fx: Fixtures, repeat: int, args) -> dict:
+    df_metrics = fx.metrics_3d
+    seconds, (n_reps, _, _) = best_of(lambda: count_reps_3d(df_metrics, up_thresh=config.SQUAT_HIGH_THRESH,
+                                                            down_thresh=config.SQUAT_LOW_THRESH), repeat)
+    return stage_result(seconds, len(df_metrics), repeticiones=n_reps)
+
+
+def bench_render_video(fx: Fixtures, repeat: int, args) -> dict:
+    frames, landmarks = fx.frames, fx.session.landmarks
+    output_path = os.path.join(fx.work_dir, 'render.mp4')
+
+    def run():
+        writer = DebugVideoWriter(output_path, fx.session.fps)
+        try:
+            for frame, frame_landmarks in zip(frames, landmarks):
+                if not np.isnan(frame_landmarks[:, 0]).all():
+                    frame = draw_pose_landmarks(frame, frame_landmarks)
+                writer.write(frame)
+        finally:
+            writer.release()
+        return writer.frames_written
+
+    seconds, frames_written = best_of(run, repeat)
+    return stage_result(seconds, frames_written)
+
+
+def bench_pipeline_2d(fx: Fixtures, repeat: int, args) -> dict:
+    from src.pipeline import run_full_pipeline_in_memory
+
+    settings = {'output_dir': os.path.join(fx.work_dir, 'pipeline'), 'use_cache': False,
+                'reuse_estimator': True, 'workers': 1}
+    with analysis_mode(False):
+        seconds, results = best_of(lambda: run_full_pipeline_in_memory(fx.video_path, settings), repeat)
+    return stage_result(seconds, results['metricas_rendimiento']['fotogramas'],
+                        repeticiones=results['repeticiones_contadas'])
+
+
+def _bench_pipeline_replay(fx: Fixtures, repeat: int, use_3d: bool) -> dict:
+    """Pipeline completo reproduciendo los landmarks de la sesión: mide las fases 3 a 5 sin MediaPipe."""
+    from src.pipeline import run_full_pipeline_in_memory
+
+    recording = os.path.join(fx.work_dir, 'replay.npz')
+    if not os.path.exists(recording):
+        save_recording(recording, fx.session)
+    settings = {'output_dir': os.path.join(fx.work_dir, 'pipeline'), 'replay_landmarks': recording}
+    with analysis_mode(use_3d):
+        seconds, results = best_of(lambda: run_full_pipeline_in_memory(fx.video_path, settings), repeat)
+    return stage_result(seconds, results['metricas_rendimiento']['fotogramas'],
+                        repeticiones=results['repeticiones_contadas'])
+
+
+def bench_pipeline_replay_2d(fx: Fixtures, repeat: int, args) -> dict:
+    return _bench_pipeline_replay(fx, repeat, use_3d=False)
+
+
+def bench_pipeline_replay_3d(fx: Fixtures, repeat: int, args) -> dict:
+    return _bench_pipeline_replay(fx, repeat, use_3d=True)
+
+
+BENCHMARKS = {name: globals()[f'bench_{name}'] for name in STAGES}
+
+
+def run_suite(fx: Fixtures, stages, repeat: int, args) -> dict:
+    results = {}
+    for name in stages:
+        try:
+            results[name] = BENCHMARKS[name](fx, repeat, args)
+        except StageUnavailable as e:
+            results[name] = {'omitida': str(e)}
+        except Exception as e:
+            # Un fallo de la fase puede ser una regresión: se registra y el programa termina con error
+            traceback.print_exc()
+            results[name] = {'error': f"{type(e).__name__}: {e}"}
+    return results
+
+
+def compare_to_baseline(current: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE,
+                        min_delta_s: float = DEFAULT_MIN_DELTA_S) -> list[dict]:
+    """
+    Fases de 'current' más lentas que en 'baseline' (ambos con la clave 'fases'):
+    tiempo por fotograma por encima de base * (1 + tolerance) y una diferencia
+    total mayor que min_delta_s, para no marcar el ruido de las fases de
+    microsegundos. Una fase ejecutada que tiene marca en la línea base pero no
+    ahora (omitida o con error) también es una regresión, con 'actual_ms' None;
+    las fases que no se han pedido o que no tienen marca base no se comparan.
+    """
+    regressions = []
+    for name, stage in current.get('fases', {}).items():
+        base = baseline.get('fases', {}).get(name)
+        if not base or base.get('ms_por_fotograma') is None:
+            continue
+        if stage.get('ms_por_fotograma') is None:
+            regressions.append({'fase': name, 'base_ms': base['ms_por_fotograma'], 'actual_ms': None,
+                                'ratio': None, 'motivo': stage.get('error') or stage.get('omitida') or 'sin medida'})
+            continue
+        ratio = stage['ms_por_fotograma'] / base['ms_por_fotograma'] if base['ms_por_fotograma'] > 0 else float('inf')
+        delta_s = (stage['ms_por_fotograma'] - base['ms_por_fotograma']) * stage['fotogramas'] / 1000.0
+        if ratio > 1.0 + tolerance and delta_s > min_delta_s:
+            regressions.append({'fase': name, 'base_ms': base['ms_por_fotograma'],
+                                'actual_ms': stage['ms_por_fotograma'], 'ratio': ratio})
+    return regressions
+
+
+def print_report(report: dict, baseline: dict | None = None):
+    base_stages = (baseline or {}).get('fases', {})
+    print(f"{'fase':>20} {'fotogramas':>10} {'segundos':>9} {'ms/fot.':>9} {'fot./s':>9} {'vs base':>8}")
+    for name, stage in report['fases'].items():
+        if 'omitida' in stage or 'error' in stage:
+            label = 'omitida' if 'omitida' in stage else 'ERROR'
+            print(f"{name:>20}  {label}: {stage.get('omitida') or stage.get('error')}")
+            continue
+        base = base_stages.get(name, {}).get('ms_por_fotograma')
+        vs_base = f"{stage['ms_por_fotograma'] / base:>7.2f}x" if base else f"{'-':>8}"
+        fps = f"{stage['fps']:>9.1f}" if stage['fps'] else f"{'-':>9}"
+        print(f"{name:>20} {stage['fotogramas']:>10} {stage['segundos']:>9.4f} "
+              f"{stage['ms_por_fotograma']:>9.4f} {fps} {vs_base}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=list(STAGES))
+    parser.add_argument('--frames', type=int, default=300, help="Longitud de la sesión sintética.")
+    parser.add_argument('--width', type=int, default=640)
+    parser.add_argument('--height', type=int, default=360)
+    parser.add_argument('--fps', type=float, default=30.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--pose-frames', type=int, default=30,
+                        help="Fotogramas que se pasan por los estimadores (son las fases más lentas).")
+    parser.add_argument('--complexity-3d', type=int, default=1)
+    parser.add_argument('--video', help="Clip grabado para las fases de vídeo.")
+    parser.add_argument('--landmarks', help="Landmarks grabados (.npz) para las fases de análisis.")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help="Guarda el resultado en JSON (sirve como línea base).")
+    parser.add_argument('--baseline', help="Línea base JSON con la que comparar.")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument('--min-delta', type=float, default=DEFAULT_MIN_DELTA_S)
+    args = parser.parse_args(argv)
+
+    params = {name: getattr(args, name) for name in ('frames', 'width', 'height', 'fps', 'seed', 'pose_frames',
+                                                     'complexity_3d', 'video', 'landmarks', 'repeat')}
+    session = (load_recording(args.landmarks)[0] if args.landmarks
+               else synthetic_session(args.frames, fps=args.fps, seed=args.seed))
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        video_path = args.video or write_synthetic_clip(os.path.join(work_dir, 'synthetic.mp4'), session,
+                                                        args.width, args.height, seed=args.seed)
+        fixtures = Fixtures(session, video_path, args.pose_frames, work_dir)
+        report = {'parametros': params, 'entorno': environment(),
+                  'fases': run_suite(fixtures, args.stages, args.repeat, args)}
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('parametros') != params:
+            print("Aviso: la línea base se generó con otros parámetros; la comparación puede no ser válida.")
+        if baseline.get('entorno', {}).get('versiones') != report['entorno']['versiones']:
+            print("Aviso: las versiones de las dependencias no coinciden con las de la línea base.")
+
+    print_report(report, baseline)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Resultado guardado en {args.output}")
+
+    if baseline is not None:
+        regressions = compare_to_baseline(report, baseline, args.tolerance, args.min_delta)
+        for r in regressions:
+            if r['actual_ms'] is None:
+                print(f"REGRESIÓN en {r['fase']}: medida en la línea base ({r['base_ms']:.4f} ms/fotograma) "
+                      f"y ahora sin resultado ({r['motivo']})")
+            else:
+                print(f"REGRESIÓN en {r['fase']}: {r['base_ms']:.4f} -> {r['actual_ms']:.4f} ms/fotograma "
+                      f"({r['ratio']:.2f}x, tolerancia {1 + args.tolerance:.2f}x)")
+        if regressions:
+            return 1
+        print(f"Sin regresiones respecto a {args.baseline} (tolerancia {args.tolerance:.0%}).")
+    if any('error' in stage for stage in report['fases'].values()):
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,108 @@
+# benchmarks/synthetic.py
+"""
+Datos sintéticos deterministas para los benchmarks: sesiones de landmarks con
+sentadillas (2D normalizados y 3D del mundo) y clips de vídeo con una figura
+en movimiento. La misma semilla da siempre los mismos datos.
+"""
+import cv2
+import numpy as np
+
+from src.B_pose_estimation.estimators import NUM_LANDMARKS, SessionLandmarks
+from src.F_visualization.video_renderer import draw_pose_landmarks
+
+# Índices de BlazePose usados para la geometría de la sentadilla
+_LEFT = {'hombro': 11, 'codo': 13, 'muneca': 15, 'cadera': 23, 'rodilla': 25, 'tobillo': 27}
+_RIGHT = {'hombro': 12, 'codo': 14, 'muneca': 16, 'cadera': 24, 'rodilla': 26, 'tobillo': 28}
+
+
+def squat_knee_angles(n_frames: int, fps: float = 30.0, rep_seconds: float = 2.5,
+                      seed: int = 0) -> np.ndarray:
+    """Ángulo de rodilla (grados) con sentadillas de profundidad variable entre 60° y 110°."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(n_frames) / fps
+    phase = 2 * np.pi * t / rep_seconds
+    n_reps = int(np.ceil(n_frames / (rep_seconds * fps))) + 1
+    depth = rng.uniform(60, 110, n_reps)[(t // rep_seconds).astype(int)]
+    return depth + (175 - depth) * (0.5 + 0.5 * np.cos(phase))
+
+
+def _pose_from_angles(knee_deg: np.ndarray, scale: float, origin: np.ndarray, side_view: bool = False) -> np.ndarray:
+    """
+    Pose (T, 33, 3): tobillos fijos, rodilla y cadera según el ángulo, torso vertical.
+    El movimiento de la sentadilla va en el eje z, o en el x con side_view=True
+    (cámara lateral, como en los vídeos reales).
+    """
+    n_frames = len(knee_deg)
+    half = np.radians(180 - knee_deg) / 2      # Inclinación de tibia y fémur
+    pose = np.zeros((n_frames, NUM_LANDMARKS, 3))
+    for side, dx in ((_LEFT, -0.08), (_RIGHT, 0.08)):
+        ankle = np.array([dx, 0.0, 0.0])
+        knee = ankle + np.stack([np.zeros(n_frames), -np.cos(half), np.sin(half)], axis=1) * 0.45
+        hip = knee + np.stack([np.zeros(n_frames), -np.cos(half), -np.sin(half)], axis=1) * 0.45
+        shoulder = hip + np.array([0.0, -0.5, 0.0])
+        pose[:, side['tobillo']] = ankle
+        pose[:, side['rodilla']] = knee
+        pose[:, side['cadera']] = hip
+        pose[:, side['hombro']] = shoulder
+        pose[:, side['codo']] = shoulder + np.array([dx, 0.25, 0.05])
+        pose[:, side['muneca']] = shoulder + np.array([dx, 0.45, 0.15])
+    # El resto de puntos (cara, manos, pies) alrededor de la cabeza y los tobillos
+    head = (pose[:, _LEFT['hombro']] + pose[:, _RIGHT['hombro']]) / 2 + np.array([0.0, -0.2, 0.0])
+    for idx in range(11):
+        pose[:, idx] = head + np.array([0.01 * (idx - 5), 0.005 * idx, 0.0])
+    for idx in range(17, 23):
+        pose[:, idx] = pose[:, _LEFT['muneca'] if idx % 2 else _RIGHT['muneca']]
+    for idx in range(29, 33):
+        pose[:, idx] = pose[:, _LEFT['tobillo'] if idx % 2 else _RIGHT['tobillo']] + np.array([0.0, 0.02, 0.05])
+    if side_view:
+        pose = pose[..., [2, 1, 0]]
+    return origin + scale * pose
+
+
+def synthetic_session(n_frames: int, fps: float = 30.0, dropout: float = 0.02, noise: float = 0.002,
+                      seed: int = 0) -> SessionLandmarks:
+    """
+    Sesión con sentadillas: landmarks 2D normalizados (con ruido), landmarks del
+    mundo en metros y un 'dropout' de fotogramas sin detección (NaN), como los
+    que produce el estimador real.
+    """
+    rng = np.random.default_rng(seed)
+    knee = squat_knee_angles(n_frames, fps, seed=seed)
+
+    world = _pose_from_angles(knee, 1.0, np.array([0.0, 0.0, 0.0]))
+    world_landmarks = np.empty((n_frames, NUM_LANDMARKS, 4), dtype=np.float32)
+    world_landmarks[..., :3] = world - world[:, [23, 24]].mean(axis=1, keepdims=True)   # Origen en la pelvis
+    world_landmarks[..., 3] = 0.95
+
+    image = _pose_from_angles(knee, 0.45, np.array([0.5, 0.85, 0.0]), side_view=True)
+    landmarks = np.empty((n_frames, NUM_LANDMARKS, 4), dtype=np.float32)
+    landmarks[..., :3] = image + rng.normal(0, noise, image.shape)
+    landmarks[..., 3] = rng.uniform(0.6, 1.0, (n_frames, NUM_LANDMARKS))
+
+    lost = rng.random(n_frames) < dropout
+    landmarks[lost] = np.nan
+    world_landmarks[lost] = np.nan
+    crop_boxes = np.full((n_frames, 4), np.nan, dtype=np.float32)
+    return SessionLandmarks(landmarks, world_landmarks, crop_boxes, fps)
+
+
+def write_synthetic_clip(path: str, session: SessionLandmarks, width: int = 640, height: int = 360,
+                         seed: int = 0) -> str:
+    """
+    Vídeo determinista con el esqueleto de 'session' dibujado sobre un fondo de
+    ruido fijo, un fotograma por fotograma de la sesión.
+    """
+    rng = np.random.default_rng(seed)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), session.fps, (width, height))
+    if not writer.isOpened():
+        raise IOError(f"No se pudo crear el clip sintético en {path}")
+    background = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+    try:
+        for landmarks in session.landmarks:
+            frame = background.copy()
+            if not np.isnan(landmarks[:, 0]).all():
+                draw_pose_landmarks(frame, landmarks, copy=False)
+            writer.write(frame)
+    finally:
+        writer.release()
+    return path
@@ -8,60 +8,201 @@ from .video_metadata import get_video_rotation
 
 logger = logging.getLogger(__name__)
 
-def extract_and_preprocess_frames(
-        video_path,
-        sample_rate=1,
-        # --- CAMBIO: 'rotate' ahora es opcional. Si es None, se auto-detecta ---
-        rotate: int | None = None,
-        progress_callback=None
-    ):
+
+def _rotate_frame(frame, rotate: int):
+    """Aplica la rotación (en grados) indicada a un fotograma."""
+    if rotate == 90:
+        return cv2.rotate(frame, cv2.ROTATE_90_CLOCKWISE)
+    elif rotate == 180:
+        return cv2.rotate(frame, cv2.ROTATE_180)
+    elif rotate == 270:
+        return cv2.rotate(frame, cv2.ROTATE_90_COUNTERCLOCKWISE)
+    return frame
+
+
+def resolve_decode_mode(decode_mode: str, sample_rate: int, frame_count: int | None = None) -> str:
     """
-    Extrae fotogramas, detecta y aplica la rotación automáticamente,
-    y los devuelve como una lista de imágenes en memoria A TAMAÑO COMPLETO.
+    Modo de decodificación que usará VideoFrameStream. Con frame_count=None
+    (vídeo aún sin abrir) se supone que el vídeo informa de su longitud.
     """
-    logger.info(f"Iniciando extracción para: {video_path}")
+    length_known = frame_count is None or frame_count > 0
+    # El salto necesita conocer la longitud del vídeo
+    if decode_mode == 'seek' and not length_known:
+        return 'grab'
+    if decode_mode != 'auto':
+        return decode_mode
+    if sample_rate >= config.SEEK_MIN_STRIDE and length_known:
+        return 'seek'
+    return 'grab'
+
+
+class VideoFrameStream:
+    """
+    Fuente de fotogramas en streaming. Abre el vídeo, detecta la rotación y
+    entrega los fotogramas muestreados uno a uno, de modo que la memoria usada
+    no depende de la duración del vídeo.
+
+    Modos de decodificación (decode_mode):
+      - 'read': decodifica todos los fotogramas y descarta los no muestreados.
+      - 'grab': para los fotogramas descartados solo hace cap.grab() (avanza el
+        demuxer sin convertir a imagen BGR); solo se recuperan los muestreados.
+      - 'seek': salta directamente a cada fotograma muestreado con
+        CAP_PROP_POS_FRAMES. Compensa con saltos grandes; la precisión del
+        salto depende del códec y del backend de OpenCV.
+      - 'auto': 'seek' si sample_rate >= config.SEEK_MIN_STRIDE, si no 'grab'.
+
+    Uso:
+        with VideoFrameStream(path, sample_rate=3) as stream:
+            for frame in stream:
+                ...
+    """
+    def __init__(
+            self,
+            video_path,
+            sample_rate=1,
+            rotate: int | None = None,
+            progress_callback=None,
+            decode_mode: str = config.FRAME_DECODE_MODE
+        ):
+        logger.info(f"Iniciando extracción para: {video_path}")
+
+        ext = os.path.splitext(video_path)[1].lower()
+        if ext not in config.VIDEO_EXTENSIONS:
+            raise ValueError(f"Extensión de vídeo no soportada: '{ext}'.")
+
+        # Detectamos la rotación si no se ha especificado una manualmente
+        if rotate is None:
+            rotate = get_video_rotation(video_path)
+
+        if decode_mode not in ('auto', 'read', 'grab', 'seek'):
+            raise ValueError(f"Modo de decodificación no soportado: '{decode_mode}'.")
+
+        self.video_path = video_path
+        self.sample_rate = max(1, int(sample_rate))
+        self.rotate = rotate
+        self.progress_callback = progress_callback
 
-    ext = os.path.splitext(video_path)[1].lower()
-    if ext not in config.VIDEO_EXTENSIONS:
-        raise ValueError(f"Extensión de vídeo no soportada: '{ext}'.")
+        self._cap = cv2.VideoCapture(video_path)
+        if not self._cap.isOpened():
+            raise IOError(f"No se pudo abrir el vídeo: {video_path}")
 
-    # --- CAMBIO: Detectamos la rotación si no se ha especificado una manualmente ---
-    if rotate is None:
-        rotate = get_video_rotation(video_path)
+        self.fps = self._cap.get(cv2.CAP_PROP_FPS)
+        self.frame_count = int(self._cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self._width = int(self._cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self._height = int(self._cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.frames_yielded = 0
+        self.decode_mode = self._resolve_decode_mode(decode_mode)
+        logger.info(f"Propiedades del vídeo: {self.frame_count} frames, {self.fps:.2f} FPS "
+                    f"(decodificación: {self.decode_mode})")
 
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
-        raise IOError(f"No se pudo abrir el vídeo: {video_path}")
+    def _resolve_decode_mode(self, decode_mode: str) -> str:
+        if decode_mode == 'seek' and self.frame_count <= 0:
+            logger.warning("El vídeo no informa del número de frames; se usa 'grab' en lugar de 'seek'.")
+        return resolve_decode_mode(decode_mode, self.sample_rate, self.frame_count)
 
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    logger.info(f"Propiedades del vídeo: {frame_count} frames, {fps:.2f} FPS")
+    @property
+    def frame_shape(self) -> tuple[int, int, int]:
+        """Forma (alto, ancho, canales) de los fotogramas entregados, ya rotados."""
+        width, height = self._width, self._height
+        if self.rotate in (90, 270):
+            width, height = height, width
+        return height, width, 3
 
-    original_frames = []
-    idx = 0
-    last_percent_done = -1
+    @property
+    def expected_frames(self) -> int:
+        """Número aproximado de fotogramas que se entregarán (según los metadatos)."""
+        if self.frame_count <= 0:
+            return 0
+        return -(-self.frame_count // self.sample_rate)
 
-    while True:
-        ret, frame = cap.read()
-        if not ret: break
+    def __iter__(self):
+        if self._cap is None:
+            raise RuntimeError("El stream de fotogramas ya se ha consumido o cerrado.")
 
-        if progress_callback and frame_count > 0:
-            percent_done = int((idx / frame_count) * 100)
+        try:
+            if self.decode_mode == 'seek':
+                frames = self._iter_seek()
+            else:
+                frames = self._iter_sequential(grab_skipped=(self.decode_mode == 'grab'))
+            for frame in frames:
+                self.frames_yielded += 1
+                yield _rotate_frame(frame, self.rotate)
+        finally:
+            self.close()
+            logger.info(f"Proceso completado. Se han extraído {self.frames_yielded} fotogramas.")
+
+    def _report_progress(self, idx: int, last_percent_done: int) -> int:
+        if self.progress_callback and self.frame_count > 0:
+            percent_done = int((idx / self.frame_count) * 100)
             if percent_done > last_percent_done:
-                progress_callback(percent_done)
-                last_percent_done = percent_done
-
-        if idx % sample_rate == 0:
-            if rotate == 90:
-                frame = cv2.rotate(frame, cv2.ROTATE_90_CLOCKWISE)
-            elif rotate == 180:
-                frame = cv2.rotate(frame, cv2.ROTATE_180)
-            elif rotate == 270:
-                frame = cv2.rotate(frame, cv2.ROTATE_90_COUNTERCLOCKWISE)
-            original_frames.append(frame)
-        
-        idx += 1
-
-    cap.release()
-    logger.info(f"Proceso completado. Se han extraído {len(original_frames)} fotogramas en memoria.")
-    return original_frames, fps
\ No newline at end of file
+                self.progress_callback(percent_done)
+                return percent_done
+        return last_percent_done
+
+    def _iter_sequential(self, grab_skipped: bool):
+        """Recorre el vídeo en orden; con grab_skipped no decodifica los fotogramas descartados."""
+        idx = 0
+        last_percent_done = -1
+        while True:
+            last_percent_done = self._report_progress(idx, last_percent_done)
+
+            if idx % self.sample_rate == 0:
+                ret, frame = self._cap.read()
+                if not ret: break
+                yield frame
+            elif grab_skipped:
+                if not self._cap.grab(): break
+            else:
+                ret, _ = self._cap.read()
+                if not ret: break
+
+            idx += 1
+
+    def _iter_seek(self):
+        """Salta directamente a cada fotograma muestreado."""
+        last_percent_done = -1
+        next_pos = 0
+        for target in range(0, self.frame_count, self.sample_rate):
+            last_percent_done = self._report_progress(target, last_percent_done)
+            if target != next_pos:
+                self._cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+            ret, frame = self._cap.read()
+            if not ret: break
+            next_pos = target + 1
+            yield frame
+
+    def close(self):
+        """Libera el VideoCapture (idempotente)."""
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def extract_and_preprocess_frames(
+        video_path,
+        sample_rate=1,
+        # 'rotate' es opcional. Si es None, se auto-detecta
+        rotate: int | None = None,
+        progress_callback=None,
+        decode_mode: str = config.FRAME_DECODE_MODE
+    ):
+    """
+    Extrae fotogramas, detecta y aplica la rotación automáticamente,
+    y los devuelve como una lista de imágenes en memoria A TAMAÑO COMPLETO.
+
+    NOTA: materializa el vídeo entero en memoria. Para vídeos largos usar
+    VideoFrameStream, que entrega los fotogramas de uno en uno.
+    """
+    with VideoFrameStream(video_path, sample_rate=sample_rate, rotate=rotate,
+                          progress_callback=progress_callback,
+                          decode_mode=decode_mode) as stream:
+        original_frames = list(stream)
+        fps = stream.fps
+    return original_frames, fps
@@ -0,0 +1,125 @@
+# src/A_preprocessing/shared_frames.py
+"""
+Transporte de fotogramas entre procesos mediante memoria compartida.
+
+Un proceso decodificador escribe cada fotograma UNA vez en un ring buffer
+(multiprocessing.shared_memory) y los consumidores lo leen sin copiar,
+recibiendo por las colas solo el índice del hueco (slot). Así se evita
+serializar con pickle imágenes de varios MB por cada fotograma.
+
+Reciclado de huecos: el propietario del ring reparte los índices libres por
+una cola; el decodificador toma un hueco libre (se bloquea si no hay, lo que
+aplica contrapresión), escribe el fotograma y publica (frame_idx, slot). El
+hueco vuelve a la cola de libres cuando el consumidor ha terminado con él.
+"""
+import logging
+import weakref
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from src import config
+from src.instrumentation import PipelineProfiler
+from .frame_extraction import VideoFrameStream
+
+logger = logging.getLogger(__name__)
+
+
+def _release_segment(shm: shared_memory.SharedMemory, unlink: bool):
+    try:
+        shm.close()
+    except BufferError:
+        # Aún quedan vistas numpy vivas sobre el buffer; el SO lo liberará al salir
+        pass
+    if unlink:
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class SharedFrameRing:
+    """
+    Ring buffer de 'slots' fotogramas uint8 de forma 'frame_shape' sobre un
+    segmento de memoria compartida.
+
+    Con name=None crea el segmento (y es responsable de borrarlo); con un
+    nombre se adjunta a uno existente. El segmento creado se borra con unlink(),
+    al recolectarse el objeto o al salir del intérprete; si el proceso muere de
+    forma abrupta, el resource_tracker de multiprocessing lo borra por nosotros.
+    """
+    def __init__(self, frame_shape: tuple, slots: int, name: str | None = None):
+        self.frame_shape = tuple(int(d) for d in frame_shape)
+        self.slots = int(slots)
+        self.owner = name is None
+        frame_bytes = int(np.prod(self.frame_shape))
+        if self.owner:
+            self._shm = shared_memory.SharedMemory(create=True, size=max(1, frame_bytes * self.slots))
+        else:
+            # Los procesos hijos comparten el resource_tracker del padre, así que
+            # adjuntarse no provoca que el segmento se borre al terminar el hijo.
+            self._shm = shared_memory.SharedMemory(name=name)
+        self._frames = np.ndarray((self.slots,) + self.frame_shape, dtype=np.uint8, buffer=self._shm.buf)
+        self._finalizer = weakref.finalize(self, _release_segment, self._shm, self.owner)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @property
+    def spec(self) -> tuple:
+        """Descripción serializable para adjuntarse al ring desde otro proceso."""
+        return self.frame_shape, self.slots, self.name
+
+    @classmethod
+    def attach(cls, spec: tuple) -> "SharedFrameRing":
+        frame_shape, slots, name = spec
+        return cls(frame_shape, slots, name=name)
+
+    def write(self, slot: int, frame: np.ndarray):
+        if frame.shape != self.frame_shape:
+            raise ValueError(f"Fotograma de forma {frame.shape}; el ring espera {self.frame_shape}.")
+        self._frames[slot][...] = frame
+
+    def view(self, slot: int) -> np.ndarray:
+        """Vista (sin copia) del fotograma del hueco indicado. No retener tras liberar el hueco."""
+        return self._frames[slot]
+
+    def close(self):
+        """Suelta el segmento en este proceso; si es el propietario, además lo borra."""
+        self._frames = None
+        self._finalizer()
+
+
+def decode_into_ring(video_path: str, ring_spec: tuple, free_slots, ready,
+                     sample_rate: int = 1, rotate: int = 0,
+                     decode_mode: str = config.FRAME_DECODE_MODE):
+    """
+    Punto de entrada del proceso decodificador. Publica en 'ready' tuplas
+    (frame_idx, slot); al terminar, ('extraccion', wall_s, cpu_s, fotogramas) con
+    el coste de decodificar y copiar al ring (sin las esperas por un hueco libre)
+    y después None; o ('error', mensaje) si falla. Un None recibido en
+    'free_slots' cancela la decodificación.
+    """
+    ring = SharedFrameRing.attach(ring_spec)
+    profiler = PipelineProfiler()
+    n_frames = 0
+    try:
+        with VideoFrameStream(video_path, sample_rate=sample_rate, rotate=rotate,
+                              decode_mode=decode_mode) as stream:
+            copy_to_ring = profiler.timed('extraccion', ring.write)
+            for idx, frame in enumerate(profiler.timed_iter('extraccion', stream)):
+                slot = free_slots.get()
+                if slot is None:
+                    logger.info("Decodificación cancelada por el consumidor.")
+                    break
+                copy_to_ring(slot, frame)
+                ready.put((idx, slot))
+                n_frames += 1
+        ready.put(('extraccion', *profiler.totals('extraccion'), n_frames))
+        ready.put(None)
+    except Exception as e:
+        logger.exception("Error en el proceso decodificador")
+        ready.put(('error', f"{type(e).__name__}: {e}"))
+    finally:
+        ring.close()
@@ -0,0 +1,119 @@
+# src/B_pose_estimation/estimator_pool.py
+"""
+Pool de estimadores calientes compartido por todo el proceso.
+
+Construir un estimador carga uno o dos grafos de MediaPipe (o arranca N procesos
+con ParallelPoseEstimator), y en lotes de clips cortos esa carga domina el tiempo
+total. El pool guarda las instancias ya construidas por clave (tipo y
+configuración del estimador) y las presta de una en una: quien la toma la usa en
+exclusiva y, al devolverla, se llama a reset() para que el siguiente vídeo
+empiece sin estado del anterior.
+
+Si el bloque que usaba el estimador termina con una excepción, la instancia se
+cierra en lugar de volver al pool. Todo lo que queda en el pool se cierra al
+salir del intérprete.
+"""
+import atexit
+import logging
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Callable, Hashable, Iterator
+
+from src import config
+from .estimators import BaseEstimator
+
+logger = logging.getLogger(__name__)
+
+
+class EstimatorPool:
+    """
+    Instancias ociosas por clave, con un máximo de max_idle por clave.
+    Es seguro entre hilos: dos préstamos simultáneos con la misma clave
+    reciben instancias distintas.
+    """
+    def __init__(self, max_idle_per_key: int = config.ESTIMATOR_POOL_MAX_IDLE):
+        self.max_idle_per_key = max_idle_per_key
+        self._idle: dict[Hashable, list[BaseEstimator]] = defaultdict(list)
+        self._lock = threading.Lock()
+        self._closed = False
+        self.created = 0
+        self.reused = 0
+
+    def acquire(self, key: Hashable, factory: Callable[[], BaseEstimator]) -> BaseEstimator:
+        """Devuelve una instancia ociosa de 'key' o construye una nueva con factory()."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("El pool de estimadores está cerrado.")
+            idle = self._idle.get(key)
+            if idle:
+                self.reused += 1
+                return idle.pop()
+            self.created += 1
+        logger.info(f"Pool de estimadores: construyendo una instancia nueva para {key}.")
+        return factory()
+
+    def release(self, key: Hashable, estimator: BaseEstimator, discard: bool = False):
+        """Devuelve la instancia al pool tras reset(), o la cierra si sobra o se pide descartarla."""
+        if not discard:
+            try:
+                estimator.reset()
+            except Exception:
+                logger.exception("No se pudo reiniciar el estimador; se descarta.")
+                discard = True
+        with self._lock:
+            keep = not discard and not self._closed and len(self._idle[key]) < self.max_idle_per_key
+            if keep:
+                self._idle[key].append(estimator)
+        if not keep:
+            estimator.close()
+
+    @contextmanager
+    def lease(self, key: Hashable, factory: Callable[[], BaseEstimator]) -> Iterator[BaseEstimator]:
+        """Presta un estimador durante el bloque 'with' y lo devuelve (o lo descarta si hubo error)."""
+        estimator = self.acquire(key, factory)
+        try:
+            yield estimator
+        except BaseException:
+            self.release(key, estimator, discard=True)
+            raise
+        self.release(key, estimator)
+
+    def idle_count(self, key: Hashable | None = None) -> int:
+        with self._lock:
+            if key is not None:
+                return len(self._idle.get(key, ()))
+            return sum(len(idle) for idle in self._idle.values())
+
+    def clear(self):
+        """Cierra todas las instancias ociosas; el pool sigue utilizable."""
+        with self._lock:
+            estimators = [est for idle in self._idle.values() for est in idle]
+            self._idle.clear()
+        for estimator in estimators:
+            try:
+                estimator.close()
+            except Exception:
+                logger.exception("Error al cerrar un estimador del pool.")
+        if estimators:
+            logger.info(f"Pool de estimadores: {len(estimators)} instancias cerradas.")
+
+    def close(self):
+        """Cierra las instancias ociosas; las prestadas se cierran al devolverlas."""
+        with self._lock:
+            self._closed = True
+        self.clear()
+
+
+_default_pool: EstimatorPool | None = None
+_default_pool_lock = threading.Lock()
+
+
+def get_estimator_pool() -> EstimatorPool:
+    """Pool compartido del proceso; se crea la primera vez y se cierra con atexit."""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = EstimatorPool()
+            atexit.register(_default_pool.close)
+        return _default_pool
@@ -5,13 +5,12 @@ import numpy as np
 import logging
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import List, Optional, Dict
+from typing import Iterable, Iterator, List, Optional
 
 # Principio 3: Importaciones centralizadas y limpias
 try:
     import mediapipe as mp
     from mediapipe.python.solutions.pose import Pose
-    from mediapipe.python.solutions.drawing_utils import draw_landmarks
 except ImportError:
     logging.error("MediaPipe no está instalado. Por favor, ejecuta 'pip install mediapipe'.")
     raise
@@ -21,15 +20,63 @@ from src import config
 logger = logging.getLogger(__name__)
 
 
+NUM_LANDMARKS = 33  # Landmarks del modelo BlazePose de MediaPipe
+LANDMARK_FIELDS = ('x', 'y', 'z', 'visibility')  # Columnas de los arrays de landmarks
+
+
+def landmarks_to_array(landmark_list) -> np.ndarray:
+    """Convierte una lista de landmarks de MediaPipe en un array (33, 4) float32 [x, y, z, visibility]."""
+    return np.array([(lm.x, lm.y, lm.z, lm.visibility) for lm in landmark_list], dtype=np.float32)
+
+
 # Principio 2: Objeto de resultado único y explícito
-@dataclass
+@dataclass(slots=True)
 class EstimationResult:
-    """Contenedor de datos para el resultado de una estimación de pose."""
-    landmarks: Optional[List[Dict[str, float]]] = None
-    world_landmarks: Optional[List[Dict[str, float]]] = None
-    annotated_image: Optional[np.ndarray] = None
+    """
+    Contenedor de datos para el resultado de una estimación de pose.
+    Los landmarks son arrays (33, 4) float32 con columnas [x, y, z, visibility].
+    No incluye imagen anotada: quien la necesite la dibuja con
+    F_visualization.video_renderer.draw_pose_landmarks.
+    """
+    landmarks: Optional[np.ndarray] = None
+    world_landmarks: Optional[np.ndarray] = None
     crop_box: Optional[List[int]] = None
-    raw_mediapipe_results: Optional[object] = None # Para depuración avanzada
+    roi_redetected: bool = False # True si se ejecutó la detección sobre la imagen completa
+
+
+@dataclass(slots=True)
+class SessionLandmarks:
+    """
+    Landmarks de toda una sesión como tensores (T, 33, 4) float32. Los fotogramas
+    sin detección quedan a NaN. crop_boxes es (T, 4) con NaN donde no hubo recorte.
+    """
+    landmarks: np.ndarray
+    world_landmarks: np.ndarray
+    crop_boxes: np.ndarray
+    fps: float
+
+    @classmethod
+    def from_results(cls, estimation_results: List[EstimationResult], fps: float) -> "SessionLandmarks":
+        n_frames = len(estimation_results)
+        landmarks = np.full((n_frames, NUM_LANDMARKS, 4), np.nan, dtype=np.float32)
+        world_landmarks = np.full((n_frames, NUM_LANDMARKS, 4), np.nan, dtype=np.float32)
+        crop_boxes = np.full((n_frames, 4), np.nan, dtype=np.float32)
+        for t, res in enumerate(estimation_results):
+            if res.landmarks is not None:
+                landmarks[t] = res.landmarks
+            if res.world_landmarks is not None:
+                world_landmarks[t] = res.world_landmarks
+            if res.crop_box is not None:
+                crop_boxes[t] = res.crop_box
+        return cls(landmarks, world_landmarks, crop_boxes, fps)
+
+    def __len__(self) -> int:
+        return len(self.landmarks)
+
+    @property
+    def detected(self) -> np.ndarray:
+        """Máscara (T,) de fotogramas con landmarks 2D."""
+        return ~np.isnan(self.landmarks[:, :, 0]).all(axis=1)
 
 
 # Principio 1: Interfaz común para todos los estimadores
@@ -40,6 +87,15 @@ class BaseEstimator(ABC):
         """Estima la pose en un único fotograma."""
         raise NotImplementedError
 
+    def reset(self):
+        """Descarta el estado acumulado entre fotogramas (si lo hay)."""
+        pass
+
+    def estimate_many(self, frames: Iterable[np.ndarray]) -> Iterator[EstimationResult]:
+        """Estima la pose de una secuencia de fotogramas, devolviendo los resultados en orden."""
+        for frame in frames:
+            yield self.estimate(frame)
+
     @abstractmethod
     def close(self):
         """Libera los recursos del modelo."""
@@ -59,72 +115,125 @@ class PoseEstimator(BaseEstimator):
         results = self.pose.process(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
         
         if not results.pose_landmarks:
-            return EstimationResult(annotated_image=image)
+            return EstimationResult()
 
-        landmarks = [{'x': lm.x, 'y': lm.y, 'z': lm.z, 'visibility': lm.visibility} for lm in results.pose_landmarks.landmark]
-        
-        annotated_image = image.copy()
-        draw_landmarks(annotated_image, results.pose_landmarks, mp.solutions.pose.POSE_CONNECTIONS)
-        
-        return EstimationResult(
-            landmarks=landmarks,
-            annotated_image=annotated_image,
-            raw_mediapipe_results=results
-        )
+        return EstimationResult(landmarks=landmarks_to_array(results.pose_landmarks.landmark))
 
     def close(self):
         self.pose.close()
 
 
 class CroppedPoseEstimator(BaseEstimator):
-    """Estimador 2D de dos fases: detecta en la imagen completa y analiza en un recorte."""
-    def __init__(self, crop_margin=0.15, target_size=(256, 256)):
+    """
+    Estimador 2D de dos fases: detecta en la imagen completa y analiza en un recorte.
+
+    Con track_roi=True reutiliza como recorte la caja derivada de los landmarks del
+    fotograma anterior (ampliada con el margen y suavizada), y solo repite la pasada
+    sobre la imagen completa cuando se pierden los landmarks o su visibilidad media
+    cae por debajo de min_track_visibility. En un vídeo de gimnasio el atleta apenas
+    se desplaza, así que se ahorra casi la mitad de la inferencia por fotograma.
+    """
+    def __init__(self, crop_margin=0.15, target_size=(256, 256),
+                 track_roi: bool = config.TRACK_ROI,
+                 min_track_visibility: float = config.ROI_MIN_VISIBILITY,
+                 roi_smoothing: float = config.ROI_SMOOTHING):
         self.crop_margin = crop_margin
         self.target_size = target_size
+        self.track_roi = track_roi
+        self.min_track_visibility = min_track_visibility
+        self.roi_smoothing = roi_smoothing
+        self._tracked_box = None  # [x1, y1, x2, y2] en píxeles (float) del fotograma anterior
         
         # Un modelo para la detección inicial y otro para el análisis del recorte
         self.pose_full = Pose(static_image_mode=True, model_complexity=1, min_detection_confidence=0.5)
         self.pose_crop = Pose(static_image_mode=True, model_complexity=config.MODEL_COMPLEXITY, min_detection_confidence=config.MIN_DETECTION_CONFIDENCE)
 
-    def estimate(self, image: np.ndarray) -> EstimationResult:
+    def _box_around(self, xy: np.ndarray, w0: int, h0: int) -> list[float]:
+        """Caja que contiene los puntos (en píxeles) más el margen, sin salir de la imagen."""
+        x_min, y_min = np.min(xy, axis=0)
+        x_max, y_max = np.max(xy, axis=0)
+        dx, dy = (x_max - x_min) * self.crop_margin, (y_max - y_min) * self.crop_margin
+        return [max(x_min - dx, 0.0), max(y_min - dy, 0.0), min(x_max + dx, float(w0)), min(y_max + dy, float(h0))]
+
+    def _detect_box(self, image: np.ndarray) -> list[float] | None:
+        """Pasada sobre la imagen completa para localizar el cuerpo."""
         h0, w0 = image.shape[:2]
         results_full = self.pose_full.process(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
-        
         if not results_full.pose_landmarks:
-            return EstimationResult(annotated_image=image)
-
-        # Calcula el bounding box del cuerpo
+            return None
         xy_full = np.array([[lm.x * w0, lm.y * h0] for lm in results_full.pose_landmarks.landmark])
-        x_min, y_min = np.min(xy_full, axis=0)
-        x_max, y_max = np.max(xy_full, axis=0)
-        
-        # Añade margen
-        dx, dy = (x_max - x_min) * self.crop_margin, (y_max - y_min) * self.crop_margin
-        x1, y1 = max(int(x_min - dx), 0), max(int(y_min - dy), 0)
-        x2, y2 = min(int(x_max + dx), w0), min(int(y_max + dy), h0)
-        
-        crop_box = [x1, y1, x2, y2]
+        return self._box_around(xy_full, w0, h0)
+
+    def _estimate_crop(self, image: np.ndarray, crop_box: list[int]):
+        x1, y1, x2, y2 = crop_box
         crop = image[y1:y2, x1:x2]
-        
         if crop.size == 0:
-            return EstimationResult(annotated_image=image, crop_box=crop_box)
-            
-        # Analiza el recorte
+            return None, None
         crop_resized = cv2.resize(crop, self.target_size, interpolation=cv2.INTER_LINEAR)
-        results_crop = self.pose_crop.process(cv2.cvtColor(crop_resized, cv2.COLOR_BGR2RGB))
-        
-        annotated_crop = crop_resized.copy()
+        return crop_resized, self.pose_crop.process(cv2.cvtColor(crop_resized, cv2.COLOR_BGR2RGB))
+
+    def _is_tracking_reliable(self, results_crop) -> bool:
+        if results_crop is None or not results_crop.pose_landmarks:
+            return False
+        visibility = np.mean([lm.visibility for lm in results_crop.pose_landmarks.landmark])
+        return visibility >= self.min_track_visibility
+
+    def _update_tracked_box(self, results_crop, crop_box: list[int], w0: int, h0: int):
+        """Actualiza la caja de seguimiento con los landmarks del recorte llevados a la imagen completa."""
+        x1, y1, x2, y2 = crop_box
+        xy = np.array([[x1 + lm.x * (x2 - x1), y1 + lm.y * (y2 - y1)]
+                       for lm in results_crop.pose_landmarks.landmark])
+        new_box = np.array(self._box_around(xy, w0, h0))
+        if self._tracked_box is not None:
+            new_box = self.roi_smoothing * np.asarray(self._tracked_box) + (1.0 - self.roi_smoothing) * new_box
+        self._tracked_box = new_box.tolist()
+
+    def reset(self):
+        """Olvida la caja seguida (p. ej. al empezar un vídeo nuevo)."""
+        self._tracked_box = None
+
+    def estimate(self, image: np.ndarray) -> EstimationResult:
+        h0, w0 = image.shape[:2]
+        full_detection = False
+
+        box = self._tracked_box if self.track_roi else None
+        if box is None:
+            full_detection = True
+            box = self._detect_box(image)
+            if box is None:
+                self._tracked_box = None
+                return EstimationResult(roi_redetected=True)
+
+        crop_box = [int(box[0]), int(box[1]), int(box[2]), int(box[3])]
+        crop_resized, results_crop = self._estimate_crop(image, crop_box)
+
+        if not full_detection and not self._is_tracking_reliable(results_crop):
+            # Seguimiento perdido: volvemos a localizar el cuerpo en la imagen completa
+            full_detection = True
+            self._tracked_box = None
+            box = self._detect_box(image)
+            if box is None:
+                return EstimationResult(roi_redetected=True)
+            crop_box = [int(box[0]), int(box[1]), int(box[2]), int(box[3])]
+            crop_resized, results_crop = self._estimate_crop(image, crop_box)
+
+        if crop_resized is None:
+            self._tracked_box = None
+            return EstimationResult(crop_box=crop_box, roi_redetected=full_detection)
+            
         landmarks_crop = None
         if results_crop.pose_landmarks:
-            landmarks_crop = [{'x': lm.x, 'y': lm.y, 'z': lm.z, 'visibility': lm.visibility} for lm in results_crop.pose_landmarks.landmark]
-            draw_landmarks(annotated_crop, results_crop.pose_landmarks, mp.solutions.pose.POSE_CONNECTIONS)
+            landmarks_crop = landmarks_to_array(results_crop.pose_landmarks.landmark)
+            if self.track_roi:
+                self._update_tracked_box(results_crop, crop_box, w0, h0)
+        else:
+            self._tracked_box = None
 
-        # NOTA: Devolvemos la imagen recortada y anotada, no la original. El pipeline decidirá cómo usarla.
+        # Los landmarks son relativos al recorte; crop_box permite llevarlos al fotograma original
         return EstimationResult(
             landmarks=landmarks_crop,
-            annotated_image=annotated_crop,
             crop_box=crop_box,
-            raw_mediapipe_results=results_crop
+            roi_redetected=full_detection
         )
 
     def close(self):
@@ -134,10 +243,10 @@ class CroppedPoseEstimator(BaseEstimator):
 
 class BlazePose3DEstimator(BaseEstimator):
     """Estimador que utiliza MediaPipe Pose para extraer landmarks 3D del mundo real."""
-    def __init__(self):
+    def __init__(self, model_complexity: int = 2):
         self.pose = mp.solutions.pose.Pose(
             static_image_mode=False,
-            model_complexity=2,
+            model_complexity=model_complexity,
             smooth_landmarks=True,
             enable_segmentation=False,
             min_detection_confidence=0.5
@@ -147,23 +256,16 @@ class BlazePose3DEstimator(BaseEstimator):
         results = self.pose.process(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
 
         if not results.pose_landmarks:
-            return EstimationResult(annotated_image=image)
+            return EstimationResult()
             
-        # --- CAMBIO CLAVE AQUÍ ---
-        # Antes convertíamos los landmarks a diccionarios. Ahora los pasamos como
-        # los objetos originales de MediaPipe, que es lo que el resto del código espera.
-        landmarks_2d = results.pose_landmarks.landmark
-        world_landmarks_3d = results.pose_world_landmarks.landmark
-        
-        annotated_image = image.copy()
-        draw_landmarks(annotated_image, results.pose_landmarks, mp.solutions.pose.POSE_CONNECTIONS)
-        
         return EstimationResult(
-            landmarks=landmarks_2d,
-            world_landmarks=world_landmarks_3d,
-            annotated_image=annotated_image,
-            raw_mediapipe_results=results
+            landmarks=landmarks_to_array(results.pose_landmarks.landmark),
+            world_landmarks=landmarks_to_array(results.pose_world_landmarks.landmark)
         )
 
+    def reset(self):
+        """Reinicia el grafo para que el tracking y el suavizado no arrastren el vídeo anterior."""
+        self.pose.reset()
+
     def close(self):
         self.pose.close()
\ No newline at end of file
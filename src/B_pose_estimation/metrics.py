@@ -7,6 +7,24 @@ import numpy as np
 import pandas as pd
 import math
 
+# Ángulo en el vértice b de los landmarks (a, b, c)
+JOINT_ANGLES = {
+    'rodilla_izq': (23, 25, 27),
+    'rodilla_der': (24, 26, 28),
+    'codo_izq': (11, 13, 15),
+    'codo_der': (12, 14, 16),
+}
+# Distancia horizontal |x_a - x_b|
+DISTANCES = {
+    'anchura_hombros': (12, 11),
+    'separacion_pies': (28, 27),
+}
+# Pares izquierda/derecha para la simetría
+SYMMETRY_PAIRS = {
+    'sim_rodilla': ('rodilla_izq', 'rodilla_der'),
+    'sim_codo': ('codo_izq', 'codo_der'),
+}
+
 def normalize_landmarks(landmarks):
     """Centra los landmarks en el punto medio de la cadera."""
     hip_left, hip_right = landmarks[23], landmarks[24]
@@ -23,19 +41,12 @@ def calculate_angle(p1, p2, p3):
 
 def extract_joint_angles(landmarks):
     """Extrae un diccionario de ángulos clave de las articulaciones."""
-    return {
-        'rodilla_izq': calculate_angle(landmarks[23], landmarks[25], landmarks[27]),
-        'rodilla_der': calculate_angle(landmarks[24], landmarks[26], landmarks[28]),
-        'codo_izq': calculate_angle(landmarks[11], landmarks[13], landmarks[15]),
-        'codo_der': calculate_angle(landmarks[12], landmarks[14], landmarks[16]),
-    }
+    return {name: calculate_angle(landmarks[a], landmarks[b], landmarks[c])
+            for name, (a, b, c) in JOINT_ANGLES.items()}
 
 def calculate_distances(landmarks):
     """Calcula distancias clave."""
-    return {
-        'anchura_hombros': abs(landmarks[12]['x'] - landmarks[11]['x']),
-        'separacion_pies': abs(landmarks[28]['x'] - landmarks[27]['x']),
-    }
+    return {name: abs(landmarks[a]['x'] - landmarks[b]['x']) for name, (a, b) in DISTANCES.items()}
 
 def calculate_angular_velocity(angle_sequence, fps):
     """Calcula la velocidad angular de una secuencia de ángulos."""
@@ -51,4 +62,77 @@ def calculate_symmetry(angle_left, angle_right):
     if pd.isna(angle_left) or pd.isna(angle_right): return np.nan
     max_angle = max(abs(angle_left), abs(angle_right))
     if max_angle == 0: return 1.0
-    return 1.0 - (abs(angle_left - angle_right) / max_angle)
\ No newline at end of file
+    return 1.0 - (abs(angle_left - angle_right) / max_angle)
+
+
+# --- Versiones vectorizadas: operan sobre la sesión completa (T, 33, 4) ---
+
+def calculate_angle_batch(p1: np.ndarray, p2: np.ndarray, p3: np.ndarray) -> np.ndarray:
+    """Ángulo 2D (grados) en p2 para arrays de puntos (..., >=2); 0 si algún vector es nulo."""
+    v1, v2 = p1[..., :2] - p2[..., :2], p3[..., :2] - p2[..., :2]
+    dot_product = v1[..., 0] * v2[..., 0] + v1[..., 1] * v2[..., 1]
+    mags = np.hypot(v1[..., 0], v1[..., 1]) * np.hypot(v2[..., 0], v2[..., 1])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        angles = np.degrees(np.arccos(np.clip(dot_product / mags, -1.0, 1.0)))
+    return np.where(mags == 0, 0.0, angles)
+
+def calculate_angular_velocity_batch(angles: np.ndarray, fps: float) -> np.ndarray:
+    """Velocidad angular absoluta a lo largo del eje 0; el primer fotograma vale 0."""
+    angles = np.asarray(angles, dtype=float)
+    if len(angles) == 0 or fps == 0:
+        return np.zeros_like(angles)
+    velocities = np.zeros_like(angles)
+    velocities[1:] = np.abs(np.diff(angles, axis=0)) / (1.0 / fps)
+    return velocities
+
+def calculate_symmetry_batch(angle_left: np.ndarray, angle_right: np.ndarray) -> np.ndarray:
+    """Simetría 1 - |izq - der| / max(|izq|, |der|) elemento a elemento (NaN si falta un lado)."""
+    max_angle = np.maximum(np.abs(angle_left), np.abs(angle_right))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        symmetry = 1.0 - np.abs(angle_left - angle_right) / max_angle
+    return np.where(max_angle == 0, 1.0, symmetry)
+
+def _fill_nan_forward_backward(values: np.ndarray) -> np.ndarray:
+    """Equivalente a DataFrame.ffill().bfill() sobre las columnas de un array (T, K)."""
+    frames = np.arange(len(values))[:, None]
+    valid = ~np.isnan(values)
+    last = np.maximum.accumulate(np.where(valid, frames, 0), axis=0)
+    filled = np.take_along_axis(values, last, axis=0)
+    valid = ~np.isnan(filled)
+    first = np.minimum.accumulate(np.where(valid, frames, len(values) - 1)[::-1], axis=0)[::-1]
+    return np.take_along_axis(filled, first, axis=0)
+
+def calculate_metrics_batch(sequence: np.ndarray, fps: float) -> pd.DataFrame:
+    """
+    Ángulos, distancias, velocidades angulares y simetrías de toda una secuencia
+    (T, 33, 4) con operaciones de array. Produce las mismas columnas que aplicar
+    las funciones escalares fotograma a fotograma: los fotogramas con algún
+    landmark a NaN dan ángulos y distancias NaN, y las velocidades se calculan
+    sobre los ángulos rellenados hacia delante y hacia atrás.
+    """
+    sequence = np.asarray(sequence)
+    n_frames = len(sequence)
+    if n_frames == 0:
+        return pd.DataFrame()
+
+    invalid = np.isnan(sequence[:, :, 0]).any(axis=1)
+    # Solo se normalizan (x, y) de los landmarks que intervienen en alguna métrica
+    used = sorted({i for idx in (*JOINT_ANGLES.values(), *DISTANCES.values()) for i in idx})
+    pos = {lm: k for k, lm in enumerate(used)}
+    center = (sequence[:, 23, :2] + sequence[:, 24, :2]) / 2.0
+    norm = sequence[:, used, :2] - center[:, None, :]
+
+    columns = {'frame_idx': np.arange(n_frames)}
+    for name, (a, b, c) in JOINT_ANGLES.items():
+        angles = calculate_angle_batch(norm[:, pos[a]], norm[:, pos[b]], norm[:, pos[c]])
+        columns[name] = np.where(invalid, np.nan, angles)
+    for name, (a, b) in DISTANCES.items():
+        columns[name] = np.where(invalid, np.nan, np.abs(norm[:, pos[a], 0] - norm[:, pos[b], 0]))
+
+    angles = np.column_stack([columns[name] for name in JOINT_ANGLES])
+    velocities = calculate_angular_velocity_batch(_fill_nan_forward_backward(angles), fps)
+    for k, name in enumerate(JOINT_ANGLES):
+        columns[f"vel_ang_{name}"] = velocities[:, k]
+    for name, (left, right) in SYMMETRY_PAIRS.items():
+        columns[name] = calculate_symmetry_batch(columns[left], columns[right])
+    return pd.DataFrame(columns)
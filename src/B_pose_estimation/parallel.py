@@ -0,0 +1,256 @@
+# src/B_pose_estimation/parallel.py
+"""
+Inferencia de pose en paralelo con un pool de procesos.
+
+PoseEstimator y CroppedPoseEstimator trabajan con static_image_mode=True, así que
+cada fotograma es independiente y se puede repartir entre procesos. El
+seguimiento del ROI de CroppedPoseEstimator (track_roi=True) sí depende del
+fotograma anterior, y cada proceso recibe bloques no consecutivos: en paralelo
+no se admite. Cada proceso del pool construye UNA instancia del estimador al
+arrancar (queda "caliente") y procesa bloques de fotogramas; los resultados se
+devuelven en el orden original.
+"""
+import logging
+import multiprocessing as mp
+import os
+import queue
+import time
+from collections import deque
+from multiprocessing import util as mp_util
+from typing import Iterable, Iterator
+
+import numpy as np
+
+from src import config
+from src.A_preprocessing.frame_extraction import VideoFrameStream
+from src.A_preprocessing.shared_frames import SharedFrameRing, decode_into_ring
+from .estimators import BaseEstimator, EstimationResult, PoseEstimator, CroppedPoseEstimator
+
+logger = logging.getLogger(__name__)
+
+# Solo los estimadores sin estado entre fotogramas admiten reparto entre procesos
+# (CroppedPoseEstimator, únicamente con track_roi=False)
+STATIC_ESTIMATORS = (PoseEstimator, CroppedPoseEstimator)
+
+# Estimador propio de cada proceso del pool
+_worker_estimator: BaseEstimator | None = None
+# Rings de memoria compartida a los que se ha adjuntado cada proceso del pool
+_worker_rings: dict[str, SharedFrameRing] = {}
+# Última generación de reset() vista por el proceso (ver ParallelPoseEstimator.reset)
+_worker_generation = 0
+
+
+def _close_worker_estimator():
+    global _worker_estimator
+    for ring in _worker_rings.values():
+        ring.close()
+    _worker_rings.clear()
+    if _worker_estimator is not None:
+        _worker_estimator.close()
+        _worker_estimator = None
+
+
+def _init_worker(estimator_cls, estimator_kwargs: dict):
+    """Inicializador del pool: construye el estimador una sola vez por proceso."""
+    global _worker_estimator
+    _worker_estimator = estimator_cls(**estimator_kwargs)
+    mp_util.Finalize(None, _close_worker_estimator, exitpriority=10)
+
+
+def _sync_worker_generation(generation: int):
+    """Reinicia el estimador del proceso la primera vez que recibe una tarea de una generación nueva."""
+    global _worker_generation
+    if generation != _worker_generation:
+        _worker_estimator.reset()
+        _worker_generation = generation
+
+
+def _estimate_chunk(frames: list, generation: int = 0) -> list[EstimationResult]:
+    """Procesa un bloque de fotogramas en el proceso trabajador."""
+    _sync_worker_generation(generation)
+    return [_worker_estimator.estimate(frame) for frame in frames]
+
+
+def _estimate_shared_slot(ring_spec: tuple, slot: int, generation: int = 0) -> EstimationResult:
+    """Procesa, sin copiarlo, el fotograma que ocupa un hueco del ring compartido."""
+    _sync_worker_generation(generation)
+    name = ring_spec[2]
+    ring = _worker_rings.get(name)
+    if ring is None:
+        # Un ring por vídeo: soltamos los anteriores antes de adjuntarnos al nuevo
+        for old in _worker_rings.values():
+            old.close()
+        _worker_rings.clear()
+        ring = _worker_rings[name] = SharedFrameRing.attach(ring_spec)
+    return _worker_estimator.estimate(ring.view(slot))
+
+
+def resolve_worker_count(workers) -> int:
+    """Traduce el ajuste 'workers' (None/0 = todos los núcleos) a un entero >= 1."""
+    if not workers:
+        return os.cpu_count() or 1
+    return max(1, int(workers))
+
+
+class ParallelPoseEstimator(BaseEstimator):
+    """
+    Estimador que reparte los fotogramas entre N procesos, cada uno con su propia
+    instancia caliente de un estimador estático (PoseEstimator o CroppedPoseEstimator).
+
+    estimate_many() mantiene como máximo 'max_pending' bloques en vuelo, de modo que
+    consume la fuente de fotogramas en streaming y con contrapresión.
+    """
+    def __init__(self, estimator_cls=CroppedPoseEstimator, workers=None,
+                 chunk_size: int = config.PARALLEL_CHUNK_SIZE, max_pending: int | None = None,
+                 **estimator_kwargs):
+        if estimator_cls not in STATIC_ESTIMATORS:
+            raise ValueError(f"{estimator_cls.__name__} no admite inferencia en paralelo "
+                             "(necesita static_image_mode=True).")
+        if estimator_kwargs.get('track_roi'):
+            raise ValueError("El seguimiento del ROI (track_roi=True) no admite inferencia en paralelo: "
+                             "cada proceso recibe bloques de fotogramas no consecutivos.")
+        self.estimator_cls = estimator_cls
+        self.workers = resolve_worker_count(workers)
+        self.chunk_size = max(1, int(chunk_size))
+        self.max_pending = max_pending or 2 * self.workers
+        # 'spawn' evita heredar grafos de MediaPipe ya inicializados en el proceso padre
+        self._pool = mp.get_context('spawn').Pool(
+            processes=self.workers,
+            initializer=_init_worker,
+            initargs=(estimator_cls, estimator_kwargs),
+        )
+        self._failed = False
+        self._generation = 0
+        logger.info(f"Pool de inferencia iniciado: {self.workers} procesos con {estimator_cls.__name__}.")
+
+    def estimate(self, image: np.ndarray) -> EstimationResult:
+        return self._pool.apply(_estimate_chunk, ([image], self._generation))[0]
+
+    def reset(self):
+        """
+        Reinicia el estimador de cada proceso antes del siguiente vídeo. El pool no
+        permite elegir qué proceso ejecuta una tarea, así que cada tarea lleva la
+        generación actual y cada proceso se reinicia al ver una nueva.
+        """
+        self._generation += 1
+
+    def estimate_many(self, frames: Iterable[np.ndarray]) -> Iterator[EstimationResult]:
+        pending = deque()
+        chunk = []
+        try:
+            for frame in frames:
+                chunk.append(frame)
+                if len(chunk) == self.chunk_size:
+                    pending.append(self._pool.apply_async(_estimate_chunk, (chunk, self._generation)))
+                    chunk = []
+                    # Contrapresión: esperamos al bloque más antiguo antes de encolar más
+                    while len(pending) >= self.max_pending:
+                        yield from pending.popleft().get()
+            if chunk:
+                pending.append(self._pool.apply_async(_estimate_chunk, (chunk, self._generation)))
+            while pending:
+                yield from pending.popleft().get()
+        except BaseException:
+            self._failed = True
+            raise
+
+    def estimate_video(self, video_path: str, sample_rate: int = 1, rotate: int | None = None,
+                       decode_mode: str = config.FRAME_DECODE_MODE, slots: int | None = None,
+                       profiler=None):
+        """
+        Estima la pose de un vídeo completo con un proceso decodificador aparte que
+        escribe los fotogramas en un ring de memoria compartida; los procesos del
+        pool los leen sin copia y devuelven solo los landmarks.
+
+        Con un PipelineProfiler, registra la fase 'extraccion' del proceso
+        decodificador y la latencia 'inferencia' de cada fotograma (de su envío
+        al pool a la entrega de su resultado), como el resto de caminos del pipeline.
+
+        Devuelve (fps, nº esperado de fotogramas, iterador de EstimationResult en orden).
+        """
+        # Abrimos el vídeo solo para resolver rotación, fps y tamaño de fotograma
+        with VideoFrameStream(video_path, sample_rate=sample_rate, rotate=rotate,
+                              decode_mode=decode_mode) as probe:
+            fps, total_frames = probe.fps, probe.expected_frames
+            frame_shape, rotate = probe.frame_shape, probe.rotate
+        slots = slots or config.SHM_RING_SLOTS or (2 * self.workers + 2)
+        results = self._estimate_from_decoder(video_path, frame_shape, max(2, slots),
+                                              sample_rate, rotate, decode_mode, profiler)
+        return fps, total_frames, results
+
+    def _estimate_from_decoder(self, video_path, frame_shape, slots, sample_rate, rotate, decode_mode,
+                               profiler=None):
+        ctx = mp.get_context('spawn')
+        ring = SharedFrameRing(frame_shape, slots)
+        free_slots, ready = ctx.Queue(), ctx.Queue()
+        for slot in range(slots):
+            free_slots.put(slot)
+        decoder = ctx.Process(
+            target=decode_into_ring,
+            args=(video_path, ring.spec, free_slots, ready, sample_rate, rotate, decode_mode),
+            name="decoder",
+            daemon=True,
+        )
+        decoder.start()
+        # Cada tarea en vuelo ocupa un hueco del ring
+        max_pending = min(self.max_pending, slots - 1)
+        pending = deque()
+
+        def finish_oldest():
+            slot, async_result, submitted_at = pending.popleft()
+            result = async_result.get()
+            free_slots.put(slot)
+            if profiler is not None:
+                profiler.record_latency('inferencia', (time.perf_counter() - submitted_at) * 1000.0)
+            return result
+
+        try:
+            while True:
+                message = self._next_decoded(ready, decoder)
+                if message is None:
+                    break
+                if message[0] == 'error':
+                    raise RuntimeError(f"Fallo en el proceso decodificador: {message[1]}")
+                if message[0] == 'extraccion':
+                    if profiler is not None:
+                        profiler.add(*message)
+                    continue
+                _, slot = message
+                task = self._pool.apply_async(_estimate_shared_slot, (ring.spec, slot, self._generation))
+                pending.append((slot, task, time.perf_counter()))
+                while len(pending) >= max_pending:
+                    yield finish_oldest()
+            while pending:
+                yield finish_oldest()
+        except BaseException:
+            self._failed = True
+            raise
+        finally:
+            free_slots.put(None)  # Desbloquea al decodificador si espera un hueco
+            decoder.join(timeout=5)
+            if decoder.is_alive():
+                decoder.terminate()
+                decoder.join()
+            # Si hubo fallo, el pool se termina en close(); el segmento se borra aquí
+            ring.close()
+
+    @staticmethod
+    def _next_decoded(ready, decoder):
+        """Espera el siguiente mensaje del decodificador, detectando si ha muerto."""
+        while True:
+            try:
+                return ready.get(timeout=1.0)
+            except queue.Empty:
+                if not decoder.is_alive():
+                    raise RuntimeError(f"El proceso decodificador terminó inesperadamente "
+                                       f"(código {decoder.exitcode}).")
+
+    def close(self):
+        if self._pool is None:
+            return
+        if self._failed:
+            self._pool.terminate()
+        else:
+            self._pool.close()
+        self._pool.join()
+        self._pool = None
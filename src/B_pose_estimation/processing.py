@@ -4,7 +4,7 @@ import numpy as np
 import pandas as pd
 import logging
 from .estimators import PoseEstimator, CroppedPoseEstimator
-from .metrics import normalize_landmarks, extract_joint_angles, calculate_distances, calculate_angular_velocity, calculate_symmetry
+from .metrics import calculate_metrics_batch
 
 logger = logging.getLogger(__name__)
 
@@ -43,57 +43,77 @@ def extract_landmarks_from_frames(frames: list, use_crop: bool = False, visibili
     estimator.close()
     return pd.DataFrame(rows)
 
+def landmarks_to_dataframe(landmarks: np.ndarray, crop_boxes: np.ndarray | None = None) -> pd.DataFrame:
+    """
+    Convierte un tensor (T, 33, 4) de landmarks en el DataFrame raw con columnas
+    frame_idx, x{i}, y{i}, z{i}, v{i} (y crop_x1..crop_y2 si hay cajas de recorte).
+    Los fotogramas sin detección quedan como filas de NaN.
+    """
+    n_frames, n_points = landmarks.shape[0], landmarks.shape[1]
+    # (T, 33, 4) -> (T, 4, 33) para que las columnas salgan agrupadas como x0..x32, y0..y32, ...
+    values = landmarks.transpose(0, 2, 1).reshape(n_frames, 4 * n_points).astype(float)
+    columns = [f"{axis}{i}" for axis in ('x', 'y', 'z', 'v') for i in range(n_points)]
+    df = pd.DataFrame(values, columns=columns)
+    df.insert(0, 'frame_idx', np.arange(n_frames))
+    if crop_boxes is not None:
+        df[['crop_x1', 'crop_y1', 'crop_x2', 'crop_y2']] = np.asarray(crop_boxes, dtype=float)
+    return df
+
+def _interpolate_missing(values: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    """
+    Interpolación lineal a lo largo del eje temporal de todas las series a la vez.
+    values es (T, N, C) y valid (T, N); cada serie n se rellena a partir de sus
+    fotogramas válidos, replicando el primer/último valor en los extremos (como
+    np.interp). Las series con menos de dos fotogramas válidos no se tocan.
+    """
+    n_frames = values.shape[0]
+    frames = np.arange(n_frames)[:, None]
+    # Índice del fotograma válido anterior y siguiente de cada (t, n)
+    prev_idx = np.maximum.accumulate(np.where(valid, frames, -1), axis=0)
+    next_idx = np.minimum.accumulate(np.where(valid, frames, n_frames)[::-1], axis=0)[::-1]
+    # Fuera del rango válido se replica el extremo más cercano
+    prev_idx = np.where(prev_idx < 0, next_idx, prev_idx)
+    next_idx = np.where(next_idx >= n_frames, prev_idx, next_idx)
+
+    interpolable = valid.sum(axis=0) > 1
+    prev_idx, next_idx = prev_idx[:, interpolable], next_idx[:, interpolable]
+    series = values[:, interpolable]
+    prev_vals = np.take_along_axis(series, prev_idx[..., None], axis=0)
+    next_vals = np.take_along_axis(series, next_idx[..., None], axis=0)
+    span = (next_idx - prev_idx)[..., None]
+    slope = np.divide(next_vals - prev_vals, span, out=np.zeros_like(prev_vals), where=span > 0)
+
+    out = values.copy()
+    out[:, interpolable] = slope * (frames - prev_idx)[..., None] + prev_vals
+    return out
+
 def filter_and_interpolate_landmarks(df_raw: pd.DataFrame, min_confidence: float = 0.5) -> tuple[np.ndarray, np.ndarray | None]:
-    """Filtra e interpola landmarks, devuelve la secuencia y las cajas de recorte."""
+    """
+    Filtra e interpola landmarks, devuelve la secuencia y las cajas de recorte.
+
+    La secuencia es un array (T, 33, 4) float [x, y, z, visibility]: los landmarks
+    con visibilidad menor que min_confidence se descartan y x, y, z se interpolan
+    linealmente desde los fotogramas válidos; la visibilidad descartada queda a 0.
+    Los landmarks con menos de dos fotogramas válidos no se interpolan: conservan
+    su valor en el único fotograma válido (si lo hay) y quedan a NaN en el resto.
+    """
     logger.info(f"Filtrando e interpolando {len(df_raw)} frames de landmarks.")
     n_frames, n_points = len(df_raw), 33
-    arr = np.full((n_frames, n_points, 4), np.nan, dtype=float)
-    
-    for t, (_, row) in enumerate(df_raw.iterrows()):
-        for i in range(n_points):
-            visibility = row.get(f"v{i}", np.nan)
-            if pd.notna(visibility) and visibility >= min_confidence:
-                arr[t, i, 0], arr[t, i, 1], arr[t, i, 2], arr[t, i, 3] = row.get(f"x{i}"), row.get(f"y{i}"), row.get(f"z{i}"), visibility
+    columns = [f"{axis}{i}" for axis in ('x', 'y', 'z', 'v') for i in range(n_points)]
+    # (T, 4*33) agrupado por eje -> (T, 33, 4); las columnas ausentes quedan a NaN
+    values = df_raw.reindex(columns=columns).to_numpy(dtype=float)
+    arr = values.reshape(n_frames, 4, n_points).transpose(0, 2, 1).copy()
 
-    for i in range(n_points):
-        valid_mask = ~np.isnan(arr[:, i, 0])
-        valid_indices = np.where(valid_mask)[0]
-        if len(valid_indices) > 1:
-            interp_indices = np.arange(n_frames)
-            for j in range(3):
-                arr[:, i, j] = np.interp(interp_indices, valid_indices, arr[valid_indices, i, j])
+    visibility = arr[:, :, 3]
+    arr[~(visibility >= min_confidence)] = np.nan  # Incluye visibilidad NaN
+    valid = ~np.isnan(arr[:, :, 0])
+    arr[:, :, :3] = _interpolate_missing(arr[:, :, :3], valid)
+    arr[:, :, 3] = np.nan_to_num(arr[:, :, 3], nan=0.0)
 
-    filtered_sequence = []
-    for t in range(n_frames):
-        frame_landmarks = [{'x': arr[t, i, 0], 'y': arr[t, i, 1], 'z': arr[t, i, 2], 'visibility': arr[t, i, 3] if pd.notna(arr[t, i, 3]) else 0.0} for i in range(n_points)]
-        filtered_sequence.append(frame_landmarks)
-    
     crop_coords = df_raw[['crop_x1', 'crop_y1', 'crop_x2', 'crop_y2']].to_numpy() if 'crop_x1' in df_raw.columns else None
-    return np.array(filtered_sequence, dtype=object), crop_coords
+    return arr, crop_coords
 
 def calculate_metrics_from_sequence(sequence: np.ndarray, fps: float) -> pd.DataFrame:
-    """Calcula métricas biomecánicas desde una secuencia de landmarks."""
+    """Calcula métricas biomecánicas desde una secuencia (T, 33, 4) de landmarks."""
     logger.info(f"Calculando métricas para una secuencia de {len(sequence)} frames.")
-    all_metrics = []
-    for idx, frame_landmarks in enumerate(sequence):
-        row = {"frame_idx": idx}
-        if frame_landmarks is None or any(np.isnan(lm['x']) for lm in frame_landmarks):
-            row.update({'rodilla_izq': np.nan, 'rodilla_der': np.nan, 'codo_izq': np.nan, 'codo_der': np.nan, 'anchura_hombros': np.nan, 'separacion_pies': np.nan})
-        else:
-            norm_lm = normalize_landmarks(frame_landmarks)
-            angles = extract_joint_angles(norm_lm)
-            dists = calculate_distances(norm_lm)
-            row.update(angles); row.update(dists)
-        all_metrics.append(row)
-    
-    dfm = pd.DataFrame(all_metrics)
-    if dfm.empty: return dfm
-    
-    # Corregir advertencia de fillna
-    dfm_filled = dfm.ffill().bfill()
-    for col in ['rodilla_izq', 'rodilla_der', 'codo_izq', 'codo_der']:
-        dfm[f"vel_ang_{col}"] = calculate_angular_velocity(dfm_filled[col].tolist(), fps)
-        
-    dfm["sim_rodilla"] = dfm.apply(lambda r: calculate_symmetry(r['rodilla_izq'], r['rodilla_der']), axis=1)
-    dfm["sim_codo"] = dfm.apply(lambda r: calculate_symmetry(r['codo_izq'], r['codo_der']), axis=1)
-    return dfm
\ No newline at end of file
+    return calculate_metrics_batch(sequence, fps)
@@ -0,0 +1,138 @@
+# src/B_pose_estimation/replay.py
+"""
+Grabación y reproducción de estimaciones de pose.
+
+RecordingEstimator envuelve cualquier estimador y guarda los EstimationResult
+que produce; save_recording() escribe una sesión en un .npz (landmarks,
+landmarks del mundo, recortes, fps y redetecciones de ROI: el formato de la
+caché de landmarks más 'roi_redetected'). ReplayEstimator lee ese fichero y
+devuelve los resultados en orden sin mirar la imagen, así que el pipeline puede
+ejecutarse sobre una sesión grabada sin MediaPipe y medir por separado todo lo
+que hay después de la fase 2.
+"""
+import logging
+import os
+from typing import Iterable, Iterator, List
+
+import numpy as np
+
+from .estimators import BaseEstimator, EstimationResult, SessionLandmarks
+
+logger = logging.getLogger(__name__)
+
+
+def save_recording(path: str, session: SessionLandmarks, roi_redetected: np.ndarray | None = None) -> str:
+    """Guarda la sesión en 'path' (.npz); sin roi_redetected se graba como si no hubiera redetecciones."""
+    if roi_redetected is None:
+        roi_redetected = np.zeros(len(session), dtype=bool)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'wb') as f:
+        np.savez_compressed(
+            f,
+            landmarks=session.landmarks,
+            world_landmarks=session.world_landmarks,
+            crop_boxes=session.crop_boxes,
+            fps=np.float64(session.fps),
+            roi_redetected=np.asarray(roi_redetected, dtype=bool),
+        )
+    logger.info(f"Grabación de {len(session)} fotogramas guardada en {path}")
+    return path
+
+
+def load_recording(path: str) -> tuple[SessionLandmarks, np.ndarray]:
+    """Devuelve (SessionLandmarks, máscara roi_redetected) de una grabación o de una entrada de la caché."""
+    with np.load(path, allow_pickle=False) as data:
+        session = SessionLandmarks(
+            landmarks=data['landmarks'],
+            world_landmarks=data['world_landmarks'],
+            crop_boxes=data['crop_boxes'],
+            fps=float(data['fps']),
+        )
+        redetected = data['roi_redetected'] if 'roi_redetected' in data.files else np.zeros(len(session), bool)
+    return session, redetected
+
+
+class RecordingEstimator(BaseEstimator):
+    """
+    Envuelve un estimador y conserva en 'results' todo lo que devuelve. Con
+    output_path y fps, la grabación se guarda al cerrar.
+    """
+    def __init__(self, estimator: BaseEstimator, output_path: str | None = None, fps: float | None = None):
+        self.estimator = estimator
+        self.output_path = output_path
+        self.fps = fps
+        self.results: List[EstimationResult] = []
+
+    def estimate(self, image: np.ndarray) -> EstimationResult:
+        result = self.estimator.estimate(image)
+        self.results.append(result)
+        return result
+
+    def estimate_many(self, frames: Iterable[np.ndarray]) -> Iterator[EstimationResult]:
+        # Se delega para conservar el procesamiento por bloques del estimador envuelto
+        for result in self.estimator.estimate_many(frames):
+            self.results.append(result)
+            yield result
+
+    def reset(self):
+        """Empieza una grabación nueva."""
+        self.estimator.reset()
+        self.results = []
+
+    def save(self, path: str | None = None, fps: float | None = None) -> str:
+        session = SessionLandmarks.from_results(self.results, fps or self.fps)
+        redetected = np.array([res.roi_redetected for res in self.results], dtype=bool)
+        return save_recording(path or self.output_path, session, redetected)
+
+    def close(self):
+        try:
+            if self.output_path and self.fps:
+                self.save()
+        finally:
+            self.estimator.close()
+
+
+class ReplayEstimator(BaseEstimator):
+    """
+    Devuelve, fotograma a fotograma, los resultados de una grabación (ruta .npz
+    o SessionLandmarks). La imagen recibida se ignora. reset() vuelve al
+    principio; si se piden más fotogramas de los grabados, se devuelven
+    resultados vacíos (sin detección).
+    """
+    def __init__(self, source, roi_redetected: np.ndarray | None = None):
+        if isinstance(source, SessionLandmarks):
+            self.session = source
+            self.roi_redetected = roi_redetected if roi_redetected is not None else np.zeros(len(source), bool)
+        else:
+            self.session, self.roi_redetected = load_recording(source)
+        self.fps = self.session.fps
+        self._detected = self.session.detected
+        self._has_world = ~np.isnan(self.session.world_landmarks[:, :, 0]).all(axis=1)
+        self._has_crop = ~np.isnan(self.session.crop_boxes).any(axis=1)
+        self._index = 0
+
+    def __len__(self) -> int:
+        return len(self.session)
+
+    def estimate(self, image: np.ndarray) -> EstimationResult:
+        idx = self._index
+        self._index += 1
+        if idx >= len(self.session):
+            if idx == len(self.session):
+                logger.warning(f"La grabación solo tiene {len(self.session)} fotogramas; "
+                               "el resto se devuelve sin detección.")
+            return EstimationResult()
+        return EstimationResult(
+            landmarks=self.session.landmarks[idx] if self._detected[idx] else None,
+            world_landmarks=self.session.world_landmarks[idx] if self._has_world[idx] else None,
+            crop_box=self.session.crop_boxes[idx].astype(int).tolist() if self._has_crop[idx] else None,
+            roi_redetected=bool(self.roi_redetected[idx]),
+        )
+
+    def reset(self):
+        self._index = 0
+
+    def close(self):
+        pass
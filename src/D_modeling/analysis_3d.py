@@ -1,12 +1,13 @@
 # src/D_modeling/analysis_3d.py
 
+import numpy as np
 import pandas as pd
 from typing import List, Tuple
 import logging
 
-# Importamos las clases y funciones que hemos creado
-from src.B_pose_estimation.estimators import EstimationResult
-from src.D_modeling.math_utils import calculate_angle_3d
+# Importamos las funciones que hemos creado
+from src.D_modeling.math_utils import calculate_angles_3d
+from src.D_modeling.count_reps import REP_COLUMNS, depth_fault, detect_reps_hysteresis
 
 # Importamos el enumerado de landmarks de MediaPipe para tener una referencia clara
 try:
@@ -18,91 +19,82 @@ except ImportError:
 logger = logging.getLogger(__name__)
 
 
-def calculate_3d_metrics(estimation_results: List[EstimationResult], fps: int) -> pd.DataFrame:
+# Landmarks (hombro, cadera, rodilla, tobillo) de cada lado y sufijo de sus columnas
+SIDE_LANDMARKS = {
+    'izq': ('LEFT_SHOULDER', 'LEFT_HIP', 'LEFT_KNEE', 'LEFT_ANKLE'),
+    'der': ('RIGHT_SHOULDER', 'RIGHT_HIP', 'RIGHT_KNEE', 'RIGHT_ANKLE'),
+}
+
+
+def knee_angle_3d(frame_world_landmarks: np.ndarray, side: str = 'izq') -> float:
+    """Ángulo de rodilla (grados) de un único fotograma (33, 4); NaN si falta algún landmark."""
+    if not PoseLandmark or frame_world_landmarks is None:
+        return np.nan
+    _, hip, knee, ankle = (frame_world_landmarks[PoseLandmark[name].value] for name in SIDE_LANDMARKS[side])
+    return float(calculate_angles_3d(hip, knee, ankle))
+
+
+def calculate_3d_metrics(world_landmarks: np.ndarray, fps: int) -> pd.DataFrame:
     """
-    Calcula las métricas 3D clave a partir de una lista de resultados de estimación.
+    Calcula las métricas 3D clave a partir del tensor (T, 33, 4) de landmarks
+    del mundo real de la sesión. Los fotogramas sin detección (NaN) se omiten.
+
+    Para cada lado se obtienen rodilla_<lado>, cadera_<lado> y la altura de la
+    cadera (altura_cadera para el izquierdo, altura_cadera_der para el derecho),
+    todo en llamadas vectorizadas sobre la sesión completa. Si falta alguno de
+    los cuatro landmarks de un lado, sus métricas quedan a NaN en ese fotograma.
     """
     if not PoseLandmark:
         logger.error("MediaPipe no está disponible para calcular métricas 3D.")
         return pd.DataFrame()
 
-    metrics_list = []
-
-    for frame_idx, result in enumerate(estimation_results):
-        if not result.world_landmarks:
-            continue
-            
-        landmarks = {lm_name.name: result.world_landmarks[lm_name.value] for lm_name in PoseLandmark}
-
-        left_shoulder = landmarks.get('LEFT_SHOULDER')
-        left_hip = landmarks.get('LEFT_HIP')
-        left_knee = landmarks.get('LEFT_KNEE')
-        left_ankle = landmarks.get('LEFT_ANKLE')
-
-        if all([left_shoulder, left_hip, left_knee, left_ankle]):
-            knee_angle = calculate_angle_3d(left_hip, left_knee, left_ankle)
-            hip_angle = calculate_angle_3d(left_shoulder, left_hip, left_knee)
-            hip_height = left_hip.y
-        else:
-            knee_angle, hip_angle, hip_height = None, None, None
-
-        # --- Llenamos la lista de métricas con los datos del fotograma actual
-        metrics_list.append({
-            'frame_idx': frame_idx,
-            'time_s': frame_idx / fps,
-            'rodilla_izq': knee_angle,
-            'cadera_izq': hip_angle,
-            'altura_cadera': hip_height
-        })
-
-    if not metrics_list:
+    world_landmarks = np.asarray(world_landmarks, dtype=float)
+    frame_idx = np.flatnonzero(~np.isnan(world_landmarks[:, :, 0]).all(axis=1))
+    if len(frame_idx) == 0:
         logger.warning("No se pudieron calcular métricas 3D para ningún fotograma.")
         return pd.DataFrame()
 
-    return pd.DataFrame(metrics_list)
+    columns = {'frame_idx': frame_idx, 'time_s': frame_idx / fps}
+    for side, names in SIDE_LANDMARKS.items():
+        # (T, 4, 3): hombro, cadera, rodilla y tobillo de este lado
+        points = world_landmarks[frame_idx][:, [PoseLandmark[name].value for name in names], :3]
+        shoulder, hip, knee, ankle = (points[:, k] for k in range(4))
+        complete = ~np.isnan(points).any(axis=(1, 2))
+        hip_height_col = 'altura_cadera' if side == 'izq' else f'altura_cadera_{side}'
+
+        columns[f'rodilla_{side}'] = np.where(complete, calculate_angles_3d(hip, knee, ankle), np.nan)
+        columns[f'cadera_{side}'] = np.where(complete, calculate_angles_3d(shoulder, hip, knee), np.nan)
+        columns[hip_height_col] = np.where(complete, hip[:, 1], np.nan)
+
+    return pd.DataFrame(columns)
 
 
 def count_reps_3d(df_metrics: pd.DataFrame, 
                   up_thresh: float, 
                   down_thresh: float,
-                  depth_fail_thresh: float = 90.0) -> Tuple[int, List[dict]]:
+                  depth_fail_thresh: float = 90.0) -> Tuple[int, List[dict], pd.DataFrame]:
     """
     Cuenta repeticiones y detecta fallos básicos usando métricas 3D.
+
+    Devuelve (nº de repeticiones, fallos, detalle) donde el detalle es el
+    DataFrame de detect_reps_hysteresis: fotogramas de inicio, fondo y fin y
+    ángulo mínimo de rodilla de cada repetición.
     """
     if df_metrics.empty or 'rodilla_izq' not in df_metrics.columns:
-        return 0, []
+        return 0, [], pd.DataFrame(columns=REP_COLUMNS)
 
-    df_metrics = df_metrics.dropna(subset=['rodilla_izq']).copy()
-    if df_metrics.empty:
-        return 0, []
+    df_metrics = df_metrics.dropna(subset=['rodilla_izq'])
+    reps = detect_reps_hysteresis(
+        df_metrics['rodilla_izq'].to_numpy(),
+        up_thresh=up_thresh,
+        down_thresh=down_thresh,
+        frame_index=df_metrics['frame_idx'].to_numpy(),
+    )
 
-    reps = 0
     faults = []
-    state = 'up'
-    min_angle_in_rep = 180.0
-
-    for row in df_metrics.itertuples():
-        angle = row.rodilla_izq
-        
-        if state == 'up' and angle < down_thresh:
-            state = 'down'
-            min_angle_in_rep = angle
-        
-        elif state == 'down':
-            if angle < min_angle_in_rep:
-                min_angle_in_rep = angle
-                
-            if angle > up_thresh:
-                reps += 1
-                state = 'up'
-                
-                if min_angle_in_rep > depth_fail_thresh:
-                    fault_info = {
-                        "rep": reps,
-                        "type": "Poca Profundidad",
-                        "value": f"Ángulo mínimo: {min_angle_in_rep:.1f}° (no bajó de {depth_fail_thresh}°)"
-                    }
-                    faults.append(fault_info)
-                    logger.warning(f"Fallo detectado en repetición {reps}: {fault_info['type']}")
-
-    return reps, faults
\ No newline at end of file
+    for rep in reps[reps['angulo_minimo'] > depth_fail_thresh].itertuples():
+        fault_info = depth_fault(rep.rep, rep.angulo_minimo, depth_fail_thresh, rep.frame_fondo)
+        faults.append(fault_info)
+        logger.warning(f"Fallo detectado en repetición {fault_info['rep']}: {fault_info['type']}")
+
+    return len(reps), faults, reps
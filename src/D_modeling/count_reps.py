@@ -13,6 +13,72 @@ from src import config
 
 logger = logging.getLogger(__name__)
 
+# Columnas del DataFrame de repeticiones que devuelve detect_reps_hysteresis
+REP_COLUMNS = ['rep', 'frame_inicio', 'frame_fondo', 'frame_fin', 'angulo_minimo']
+
+
+def detect_reps_hysteresis(
+        angles,
+        up_thresh: float,
+        down_thresh: float,
+        frame_index=None
+    ) -> pd.DataFrame:
+    """
+    Detecta repeticiones con histéresis sobre una serie de ángulos, sin bucles en Python.
+
+    Una repetición empieza en el primer fotograma con ángulo < down_thresh estando
+    "arriba" y termina en el primer fotograma posterior con ángulo > up_thresh.
+    Equivale a la máquina de estados fotograma a fotograma: el estado es el
+    último umbral cruzado (marcadores propagados hacia delante), los bordes del
+    estado dan inicios y finales, y el mínimo de cada tramo se obtiene con
+    np.minimum.reduceat. Una bajada sin subida final no cuenta.
+
+    Args:
+        angles: Serie de ángulos (en grados) sin NaN.
+        up_thresh: Umbral superior (fin de la repetición).
+        down_thresh: Umbral inferior (inicio de la repetición); no puede superar a up_thresh.
+        frame_index: Números de fotograma de cada muestra; por defecto, su posición.
+
+    Returns:
+        DataFrame con una fila por repetición y columnas REP_COLUMNS: número de
+        repetición, fotogramas de inicio, fondo (primer mínimo) y fin, y ángulo mínimo.
+    """
+    if down_thresh > up_thresh:
+        raise ValueError(f"El umbral inferior ({down_thresh}) no puede superar al superior ({up_thresh}).")
+    angles = np.asarray(angles, dtype=float)
+    frame_index = np.arange(len(angles)) if frame_index is None else np.asarray(frame_index)
+    if len(angles) == 0:
+        return pd.DataFrame(columns=REP_COLUMNS)
+
+    # Estado tras cada muestra: 1 = abajo, 0 = arriba (se mantiene entre cruces)
+    markers = np.where(angles < down_thresh, 1.0, np.where(angles > up_thresh, 0.0, np.nan))
+    state = pd.Series(markers).ffill().fillna(0.0).to_numpy(dtype=np.int8)
+    edges = np.diff(state, prepend=np.int8(0))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    # Cada final cierra el inicio anterior; una bajada final sin subida se descarta
+    starts = starts[:len(ends)]
+    if len(starts) == 0:
+        return pd.DataFrame(columns=REP_COLUMNS)
+
+    bounds = np.column_stack([starts, ends]).ravel()
+    min_angles = np.minimum.reduceat(angles, bounds)[::2]
+    # Fondo: primera muestra de cada tramo [inicio, fin) que alcanza su mínimo
+    rep_id = np.cumsum(edges == 1) - 1
+    in_rep = (state == 1) & (rep_id < len(starts))
+    at_min = np.flatnonzero(in_rep & (angles == min_angles[np.clip(rep_id, 0, len(starts) - 1)]))
+    _, first = np.unique(rep_id[at_min], return_index=True)
+    bottoms = at_min[first]
+
+    return pd.DataFrame({
+        'rep': np.arange(1, len(starts) + 1),
+        'frame_inicio': frame_index[starts],
+        'frame_fondo': frame_index[bottoms],
+        'frame_fin': frame_index[ends],
+        'angulo_minimo': min_angles,
+    })
+
+
 def count_reps_by_valleys(
         angle_sequence: list, 
         peak_height_thresh: float, 
@@ -80,4 +146,168 @@ def count_repetitions_from_df(
         peak_height_thresh=low_thresh
     )
     
-    return n_reps
\ No newline at end of file
+    return n_reps
+
+
+def depth_fault(rep: int, min_angle: float, depth_fail_thresh: float, frame: int) -> dict:
+    """Fallo de 'Poca Profundidad' con el formato de fallos_detectados."""
+    return {
+        "rep": int(rep),
+        "type": "Poca Profundidad",
+        "value": f"Ángulo mínimo: {min_angle:.1f}° (no bajó de {depth_fail_thresh}°)",
+        "frame": int(frame),
+    }
+
+
+class StreamingRepCounter:
+    """
+    Versión incremental de detect_reps_hysteresis: recibe un ángulo cada vez con
+    push() y emite los eventos en cuanto se confirman, con memoria constante.
+
+    Eventos (diccionarios):
+      - {'evento': 'repeticion', 'rep', 'frame_inicio', 'frame_fondo', 'frame_fin', 'angulo_minimo'}
+        al cruzar up_thresh tras una bajada (sin retardo).
+      - {'evento': 'fallo', ...depth_fault()} a continuación, si el ángulo mínimo
+        de la repetición no bajó de depth_fail_thresh.
+    Las muestras NaN se ignoran.
+    """
+    def __init__(self, up_thresh: float, down_thresh: float, depth_fail_thresh: float | None = None):
+        if down_thresh > up_thresh:
+            raise ValueError(f"El umbral inferior ({down_thresh}) no puede superar al superior ({up_thresh}).")
+        self.up_thresh = up_thresh
+        self.down_thresh = down_thresh
+        self.depth_fail_thresh = depth_fail_thresh
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self._frame = -1
+        self._down = False
+        self._start = self._bottom = None
+        self._min_angle = np.inf
+
+    def push(self, angle: float, frame_idx: int | None = None) -> list[dict]:
+        self._frame = self._frame + 1 if frame_idx is None else int(frame_idx)
+        if angle is None or np.isnan(angle):
+            return []
+        if not self._down:
+            if angle < self.down_thresh:
+                self._down = True
+                self._start = self._bottom = self._frame
+                self._min_angle = angle
+            return []
+
+        if angle < self._min_angle:
+            self._min_angle, self._bottom = angle, self._frame
+        if angle <= self.up_thresh:
+            return []
+
+        self._down = False
+        self.count += 1
+        events = [{
+            'evento': 'repeticion',
+            'rep': self.count,
+            'frame_inicio': self._start,
+            'frame_fondo': self._bottom,
+            'frame_fin': self._frame,
+            'angulo_minimo': float(self._min_angle),
+        }]
+        if self.depth_fail_thresh is not None and self._min_angle > self.depth_fail_thresh:
+            events.append({'evento': 'fallo',
+                           **depth_fault(self.count, self._min_angle, self.depth_fail_thresh, self._bottom)})
+        return events
+
+    def flush(self) -> list[dict]:
+        """Fin de la serie: una bajada sin subida no es una repetición."""
+        return []
+
+
+class StreamingValleyCounter:
+    """
+    Versión incremental de count_reps_by_valleys (find_peaks sobre la señal
+    invertida) con memoria constante y retardo acotado.
+
+    Un valle queda confirmado cuando la señal sube 'prominence' grados sobre el
+    mínimo sin haber bajado antes de él (zigzag por prominencia: son justo los
+    mínimos con prominencia >= prominence) y es candidato si está por debajo de
+    peak_height_thresh. Los candidatos separados menos de 'distance' fotogramas
+    forman un grupo; cuando el grupo se cierra (pasan 'distance' fotogramas sin
+    otro candidato) se resuelve como find_peaks: gana el más profundo y elimina
+    a los cercanos. El grupo se limita a max_pending valles, así que el retardo
+    y la memoria quedan acotados.
+
+    Emite {'evento': 'repeticion', 'rep', 'frame_fondo', 'angulo_minimo'}.
+    Las muestras NaN se ignoran. Coincide con el conteo offline salvo en
+    señales patológicas (find_peaks aplica 'distance' antes que 'prominence',
+    así que un mínimo no prominente más profundo puede anular a un valle).
+    """
+    def __init__(self, peak_height_thresh: float, prominence: float = config.PEAK_PROMINENCE,
+                 distance: int = config.PEAK_DISTANCE, max_pending: int = 8):
+        self.peak_height_thresh = peak_height_thresh
+        self.prominence = prominence
+        self.distance = distance
+        self.max_pending = max(1, max_pending)
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self._frame = -1
+        self._falling = False
+        self._high = -np.inf                  # Máximo desde el último valle
+        self._low = np.inf                    # Mínimo candidato (en bajada)
+        self._low_frame = None
+        self._pending = []                    # Grupo de valles (frame, ángulo) a menos de 'distance'
+
+    def _resolve_pending(self) -> list[dict]:
+        """Selección por distancia de find_peaks dentro del grupo: los más profundos primero."""
+        kept = [True] * len(self._pending)
+        for j in sorted(range(len(self._pending)), key=lambda k: self._pending[k][1]):
+            if not kept[j]:
+                continue
+            for k in range(len(self._pending)):
+                if k != j and abs(self._pending[k][0] - self._pending[j][0]) < self.distance:
+                    kept[k] = False
+        events = []
+        for (frame, angle), keep in zip(self._pending, kept):
+            if keep:
+                self.count += 1
+                events.append({'evento': 'repeticion', 'rep': self.count,
+                               'frame_fondo': frame, 'angulo_minimo': float(angle)})
+        self._pending = []
+        return events
+
+    def _confirm_valley(self, frame: int, angle: float) -> list[dict]:
+        if angle > self.peak_height_thresh:
+            return []
+        events = []
+        if self._pending and (frame - self._pending[-1][0] >= self.distance
+                              or len(self._pending) >= self.max_pending):
+            events = self._resolve_pending()
+        self._pending.append((frame, angle))
+        return events
+
+    def push(self, angle: float, frame_idx: int | None = None) -> list[dict]:
+        self._frame = self._frame + 1 if frame_idx is None else int(frame_idx)
+        if angle is None or np.isnan(angle):
+            return []
+        events = []
+        if self._falling:
+            if angle < self._low:
+                self._low, self._low_frame = angle, self._frame
+            elif angle >= self._low + self.prominence:
+                events = self._confirm_valley(self._low_frame, self._low)
+                self._falling, self._high = False, angle
+        else:
+            self._high = max(self._high, angle)
+            if angle <= self._high - self.prominence:
+                self._falling = True
+                self._low, self._low_frame = angle, self._frame
+        if self._pending and self._frame - self._pending[-1][0] >= self.distance:
+            # Un candidato aún sin confirmar también podría quedar a menos de 'distance'
+            if not (self._falling and self._low_frame - self._pending[-1][0] < self.distance):
+                events += self._resolve_pending()
+        return events
+
+    def flush(self) -> list[dict]:
+        """Fin de la serie: resuelve el grupo retenido (la última bajada sin subida no cuenta)."""
+        return self._resolve_pending() if self._pending else []
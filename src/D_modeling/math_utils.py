@@ -2,14 +2,22 @@
 
 import numpy as np
 
+def _as_xyz(p) -> np.ndarray:
+    """Acepta un objeto con atributos .x, .y, .z o una fila de array [x, y, z, ...]."""
+    if hasattr(p, 'x'):
+        return np.array([p.x, p.y, p.z], dtype=float)
+    return np.asarray(p, dtype=float)[:3]
+
 def calculate_angle_3d(p1, p2, p3) -> float:
     """
     Calcula el ángulo ∡p1–p2–p3 en espacio 3D.
-    Asume que p1, p2, p3 son objetos con atributos .x, .y, .z.
+    p1, p2, p3 pueden ser objetos con atributos .x, .y, .z o filas de un
+    array de landmarks [x, y, z, visibility].
     """
     # Vectores desde el punto central (p2) a los otros dos puntos
-    v1 = np.array([p1.x - p2.x, p1.y - p2.y, p1.z - p2.z])
-    v2 = np.array([p3.x - p2.x, p3.y - p2.y, p3.z - p2.z])
+    c = _as_xyz(p2)
+    v1 = _as_xyz(p1) - c
+    v2 = _as_xyz(p3) - c
 
     # Fórmula del producto escalar: a · b = |a| |b| cos(theta)
     dot_product = np.dot(v1, v2)
@@ -23,4 +31,19 @@ def calculate_angle_3d(p1, p2, p3) -> float:
     
     angle_rad = np.arccos(cos_angle)
     
-    return np.degrees(angle_rad)
\ No newline at end of file
+    return np.degrees(angle_rad)
+
+def calculate_angles_3d(p1: np.ndarray, p2: np.ndarray, p3: np.ndarray) -> np.ndarray:
+    """
+    Variante vectorizada de calculate_angle_3d: p1, p2, p3 son arrays (..., >=3)
+    (p. ej. (T, 3) con un punto por fotograma) y devuelve los ángulos (...,) en
+    grados. Las filas con NaN dan NaN.
+    """
+    c = np.asarray(p2, dtype=float)[..., :3]
+    v1 = np.asarray(p1, dtype=float)[..., :3] - c
+    v2 = np.asarray(p3, dtype=float)[..., :3] - c
+
+    dot_product = np.einsum('...i,...i->...', v1, v2)
+    norm_product = np.linalg.norm(v1, axis=-1) * np.linalg.norm(v2, axis=-1) + 1e-8
+    cos_angle = np.clip(dot_product / norm_product, -1.0, 1.0)
+    return np.degrees(np.arccos(cos_angle))
@@ -0,0 +1,157 @@
+# src/E_storage/columnar.py
+"""
+Salidas de sesión en formato columnar.
+
+Cada sesión se guarda en dos tablas: '<vídeo>_metrics' (el DataFrame de
+métricas) y '<vídeo>_landmarks' (los tensores de landmarks 2D y del mundo, una
+fila por fotograma con columnas x{i}, y{i}, z{i}, v{i}, wx{i}, ..., wv{i} y
+crop_x1..crop_y2). Las dos llevan una cabecera con los metadatos de la sesión
+(fps, rotación, sample rate, configuración del estimador...).
+
+Formatos:
+    - 'parquet': comprimido por columnas; lo más compacto para el archivo.
+    - 'arrow': Arrow IPC sin comprimir; se lee con memory-map, sin copiar.
+    - 'csv': sin dependencias; los metadatos van en un '<fichero>.meta.json'.
+
+Parquet y Arrow necesitan pyarrow. Si no está instalado se avisa y se escribe
+en CSV. Los lectores cargan solo las columnas pedidas.
+"""
+import json
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.B_pose_estimation.estimators import LANDMARK_FIELDS, NUM_LANDMARKS, SessionLandmarks
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from pyarrow import ipc
+except ImportError:
+    pa = pq = ipc = None
+
+logger = logging.getLogger(__name__)
+
+FORMAT_EXTENSIONS = {'parquet': '.parquet', 'arrow': '.arrow', 'csv': '.csv'}
+METADATA_KEY = b'sesion'
+CROP_COLUMNS = ['crop_x1', 'crop_y1', 'crop_x2', 'crop_y2']
+_AXES = ('x', 'y', 'z', 'v')  # Mismos nombres de columna que landmarks_to_dataframe
+
+
+def landmark_columns(prefix: str = '') -> list[str]:
+    """Columnas de un tensor (T, 33, 4): x0..x32, y0..y32, z0..z32, v0..v32 con el prefijo dado."""
+    return [f"{prefix}{axis}{i}" for axis in _AXES for i in range(NUM_LANDMARKS)]
+
+
+def resolve_format(output_format: str) -> str:
+    if output_format not in FORMAT_EXTENSIONS:
+        raise ValueError(f"Formato de salida desconocido: {output_format!r} (opciones: {list(FORMAT_EXTENSIONS)})")
+    if output_format != 'csv' and pa is None:
+        logger.warning(f"pyarrow no está instalado: las salidas de sesión se escriben en CSV en lugar de {output_format}.")
+        return 'csv'
+    return output_format
+
+
+def session_file(session_dir: str, base_name: str, kind: str, output_format: str) -> str:
+    """Ruta de la tabla 'kind' ('metrics' o 'landmarks') de una sesión en el formato dado."""
+    return os.path.join(session_dir, f"{base_name}_{kind}{FORMAT_EXTENSIONS[output_format]}")
+
+
+def find_session_file(session_dir: str, base_name: str, kind: str) -> str | None:
+    """Tabla 'kind' de la sesión en el primer formato que exista (Parquet, Arrow, CSV)."""
+    for output_format in FORMAT_EXTENSIONS:
+        path = session_file(session_dir, base_name, kind, output_format)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def landmarks_frame(session: SessionLandmarks) -> pd.DataFrame:
+    """Tabla float32 con una fila por fotograma: landmarks 2D, del mundo y caja de recorte."""
+    n_frames = len(session)
+
+    def flat(tensor):
+        # (T, 33, 4) -> (T, 4 * 33) con columnas agrupadas por eje
+        return np.asarray(tensor, dtype=np.float32).transpose(0, 2, 1).reshape(n_frames, -1)
+
+    values = np.hstack([flat(session.landmarks), flat(session.world_landmarks),
+                        np.asarray(session.crop_boxes, dtype=np.float32)])
+    df = pd.DataFrame(values, columns=landmark_columns() + landmark_columns('w') + CROP_COLUMNS)
+    df.insert(0, 'frame_idx', np.arange(n_frames, dtype=np.int32))
+    return df
+
+
+def frame_to_session(df: pd.DataFrame, fps: float) -> SessionLandmarks:
+    """Inversa de landmarks_frame."""
+    n_frames = len(df)
+
+    def tensor(prefix):
+        flat = df[landmark_columns(prefix)].to_numpy(dtype=np.float32)
+        return np.ascontiguousarray(flat.reshape(n_frames, len(LANDMARK_FIELDS), NUM_LANDMARKS).transpose(0, 2, 1))
+
+    return SessionLandmarks(tensor(''), tensor('w'), df[CROP_COLUMNS].to_numpy(dtype=np.float32), fps)
+
+
+def write_frame(path: str, df: pd.DataFrame, metadata: dict | None = None, compression: str = 'zstd'):
+    """Escribe 'df' en el formato que indica la extensión de 'path', con 'metadata' como cabecera."""
+    metadata_json = json.dumps(metadata or {}, default=str, ensure_ascii=False)
+    if path.endswith('.csv'):
+        df.to_csv(path, index=False)
+        with open(path + '.meta.json', 'w', encoding='utf-8') as f:
+            f.write(metadata_json)
+        return
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), METADATA_KEY: metadata_json.encode()})
+    if path.endswith('.parquet'):
+        pq.write_table(table, path, compression=compression)
+    else:
+        with ipc.new_file(path, table.schema) as writer:
+            writer.write_table(table)
+
+
+def read_frame(path: str, columns: list[str] | None = None) -> pd.DataFrame:
+    """Lee la tabla de 'path' cargando solo 'columns' (todas si es None)."""
+    if path.endswith('.csv'):
+        return pd.read_csv(path, usecols=columns)
+    if pa is None:
+        raise ImportError(f"Hace falta pyarrow para leer {path}")
+    if path.endswith('.parquet'):
+        return pq.read_table(path, columns=columns).to_pandas()
+    with pa.memory_map(path) as source:
+        table = ipc.open_file(source).read_all()
+        return (table.select(columns) if columns is not None else table).to_pandas()
+
+
+def read_metadata(path: str) -> dict:
+    """Cabecera de metadatos de la tabla, sin leer los datos."""
+    if path.endswith('.csv'):
+        meta_path = path + '.meta.json'
+        if not os.path.exists(meta_path):
+            return {}
+        with open(meta_path, encoding='utf-8') as f:
+            return json.load(f)
+    if pa is None:
+        raise ImportError(f"Hace falta pyarrow para leer {path}")
+    if path.endswith('.parquet'):
+        schema = pq.read_schema(path)
+    else:
+        with pa.memory_map(path) as source:
+            schema = ipc.open_file(source).schema
+    return json.loads((schema.metadata or {}).get(METADATA_KEY, b'{}'))
+
+
+def load_session_landmarks(path: str) -> SessionLandmarks:
+    """Reconstruye los tensores de landmarks de la tabla '<vídeo>_landmarks'."""
+    return frame_to_session(read_frame(path), float(read_metadata(path).get('fps', 0.0)))
+
+
+def write_session_outputs(session_dir: str, base_name: str, df_metrics: pd.DataFrame, session: SessionLandmarks,
+                          metadata: dict, output_format: str = 'parquet', compression: str = 'zstd') -> dict:
+    """Escribe las tablas de métricas y landmarks de la sesión y devuelve sus rutas."""
+    output_format = resolve_format(output_format)
+    paths = {kind: session_file(session_dir, base_name, kind, output_format) for kind in ('metrics', 'landmarks')}
+    write_frame(paths['metrics'], df_metrics, metadata, compression)
+    write_frame(paths['landmarks'], landmarks_frame(session), metadata, compression)
+    return paths
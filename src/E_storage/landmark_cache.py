@@ -0,0 +1,167 @@
+# src/E_storage/landmark_cache.py
+"""
+Caché en disco de los landmarks de una sesión, direccionada por contenido.
+
+La clave combina el hash SHA-256 del fichero de vídeo con los parámetros que
+cambian el resultado de la estimación (estimador, complejidad del modelo,
+rotación, sample rate...). Cada entrada es un .npz comprimido con los tensores
+(T, 33, 4) float32 de SessionLandmarks, las cajas de recorte, los fps y unos
+metadatos en JSON. Renombrar o mover el vídeo no invalida la caché; cambiar
+un solo byte sí.
+
+El tamaño total se limita desalojando las entradas usadas hace más tiempo
+(LRU por fecha de modificación, que se actualiza en cada acierto).
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+import numpy as np
+
+from src import config
+from src.B_pose_estimation.estimators import SessionLandmarks
+
+logger = logging.getLogger(__name__)
+
+# Subir al cambiar el formato de las entradas o algo que altere los landmarks
+CACHE_FORMAT_VERSION = 1
+_SUFFIX = ".npz"
+
+
+def hash_video_file(video_path: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 (hex) del contenido del fichero, leído por bloques."""
+    digest = hashlib.sha256()
+    with open(video_path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def make_cache_key(video_hash: str, **params) -> str:
+    """
+    Clave de una entrada: '<hash del vídeo>-<hash de los parámetros>' (16 + 16 hex).
+    El prefijo permite invalidar de una vez todas las entradas de un vídeo.
+    """
+    payload = json.dumps({'version': CACHE_FORMAT_VERSION, **params}, sort_keys=True, default=str)
+    params_hash = hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    return f"{video_hash[:16]}-{params_hash[:16]}"
+
+
+class LandmarkCache:
+    """Directorio de entradas .npz con límite de tamaño y desalojo LRU."""
+    def __init__(self, cache_dir: str, max_bytes: int | None = None):
+        self.cache_dir = cache_dir
+        self.max_bytes = config.LANDMARK_CACHE_MAX_MB * 2**20 if max_bytes is None else max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + _SUFFIX)
+
+    def _entries(self) -> list[os.DirEntry]:
+        return [e for e in os.scandir(self.cache_dir) if e.is_file() and e.name.endswith(_SUFFIX)]
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def get(self, key: str) -> tuple[SessionLandmarks, dict] | None:
+        """Devuelve (SessionLandmarks, metadatos) o None si no está o la entrada es ilegible."""
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                session = SessionLandmarks(
+                    landmarks=data['landmarks'],
+                    world_landmarks=data['world_landmarks'],
+                    crop_boxes=data['crop_boxes'],
+                    fps=float(data['fps']),
+                )
+                metadata = json.loads(str(data['metadata']))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Entrada de caché corrupta ({path}): {e}. Se descarta.")
+            self.invalidate(key)
+            return None
+        os.utime(path)  # Marca de uso para el LRU
+        return session, metadata
+
+    def put(self, key: str, session: SessionLandmarks, metadata: dict | None = None) -> str:
+        """Guarda la sesión de forma atómica y aplica el límite de tamaño."""
+        path = self._path(key)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez_compressed(
+                    f,
+                    landmarks=session.landmarks.astype(np.float32, copy=False),
+                    world_landmarks=session.world_landmarks.astype(np.float32, copy=False),
+                    crop_boxes=session.crop_boxes.astype(np.float32, copy=False),
+                    fps=np.float64(session.fps),
+                    metadata=np.str_(json.dumps(metadata or {}, default=str)),
+                )
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.evict(keep=key)
+        return path
+
+    def invalidate(self, key: str) -> bool:
+        """Borra una entrada. Devuelve True si existía."""
+        try:
+            os.remove(self._path(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def invalidate_video(self, video_hash: str) -> int:
+        """Borra todas las entradas de un vídeo (cualquier combinación de parámetros)."""
+        prefix = video_hash[:16] + "-"
+        removed = 0
+        for entry in self._entries():
+            if entry.name.startswith(prefix):
+                os.remove(entry.path)
+                removed += 1
+        return removed
+
+    def clear(self) -> int:
+        removed = 0
+        for entry in self._entries():
+            os.remove(entry.path)
+            removed += 1
+        return removed
+
+    def size_bytes(self) -> int:
+        return sum(st.st_size for _, st in self._stats())
+
+    def _stats(self) -> list[tuple[str, os.stat_result]]:
+        """(nombre, stat) de cada entrada; otro proceso puede estar borrándolas a la vez."""
+        stats = []
+        for entry in self._entries():
+            try:
+                stats.append((entry.name, entry.stat()))
+            except FileNotFoundError:
+                pass
+        return stats
+
+    def evict(self, keep: str | None = None) -> int:
+        """Desaloja las entradas menos usadas hasta quedar por debajo de max_bytes."""
+        entries = sorted(self._stats(), key=lambda item: item[1].st_mtime)
+        total = sum(st.st_size for _, st in entries)
+        removed = 0
+        for name, st in entries:
+            if total <= self.max_bytes:
+                break
+            if keep is not None and name == keep + _SUFFIX:
+                continue
+            total -= st.st_size
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+                removed += 1
+            except FileNotFoundError:
+                pass
+        if removed:
+            logger.info(f"Caché de landmarks: {removed} entradas desalojadas ({total / 2**20:.1f} MB en uso).")
+        return removed
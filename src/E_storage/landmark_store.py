@@ -0,0 +1,201 @@
+# src/E_storage/landmark_store.py
+"""
+Almacén de landmarks de sesiones, de solo anexado y legible con memory-map.
+
+Todas las sesiones se concatenan, fotograma a fotograma, en tres ficheros
+binarios sin cabecera:
+    landmarks.dat        (N, 33, 4) landmarks 2D normalizados
+    world_landmarks.dat  (N, 33, 4) landmarks del mundo (metros)
+    crop_boxes.dat       (N, 4)     cajas de recorte, siempre float32
+Los landmarks se guardan en float32 o cuantizados a float16 (la mitad de
+espacio; error relativo < 1e-3, NaN incluidos), según se elija al crear el
+almacén. 'store.json' guarda el tipo y 'index.jsonl' una línea por sesión con
+su id, fotograma inicial, nº de fotogramas, fps y metadatos.
+
+La línea del índice se escribe después de los datos y es el punto de
+confirmación: si un proceso muere a mitad de un anexado, los bytes sobrantes se
+descartan en el siguiente. Los anexados de varios procesos se serializan con un
+fichero de bloqueo. Las lecturas devuelven vistas np.memmap: se puede recorrer
+un archivo de millones de fotogramas cargando solo las sesiones (o los tramos)
+que se tocan.
+"""
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+import numpy as np
+
+from src import config
+from src.B_pose_estimation.estimators import NUM_LANDMARKS, SessionLandmarks
+
+logger = logging.getLogger(__name__)
+
+STORE_FORMAT_VERSION = 1
+_HEADER_FILE = "store.json"
+_INDEX_FILE = "index.jsonl"
+_LOCK_FILE = "store.lock"
+_LOCK_STALE_S = 300  # Un bloqueo más antiguo se considera abandonado por un proceso muerto
+_ARRAYS = ('landmarks', 'world_landmarks', 'crop_boxes')
+
+
+class LandmarkStore:
+    """Sesiones de landmarks concatenadas en ficheros memory-mappable con un índice JSONL."""
+    def __init__(self, root: str, dtype: str | None = None):
+        """'dtype' ('float16' o 'float32') solo se usa al crear el almacén; después manda store.json."""
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        header_path = os.path.join(root, _HEADER_FILE)
+        if os.path.exists(header_path):
+            with open(header_path, encoding='utf-8') as f:
+                header = json.load(f)
+            if dtype is not None and dtype != header['dtype']:
+                logger.warning(f"El almacén {root} ya existe con dtype {header['dtype']}; se ignora {dtype}.")
+        else:
+            header = {'version': STORE_FORMAT_VERSION, 'dtype': dtype or config.LANDMARK_STORE_DTYPE}
+            if header['dtype'] not in ('float16', 'float32'):
+                raise ValueError(f"dtype no soportado para el almacén de landmarks: {header['dtype']}")
+            with open(header_path, 'w', encoding='utf-8') as f:
+                json.dump(header, f)
+        self.dtype = np.dtype(header['dtype'])
+        self._dtypes = {'landmarks': self.dtype, 'world_landmarks': self.dtype, 'crop_boxes': np.dtype(np.float32)}
+        self._shapes = {'landmarks': (NUM_LANDMARKS, 4), 'world_landmarks': (NUM_LANDMARKS, 4), 'crop_boxes': (4,)}
+        self._entries: dict[str, dict] = {}
+        self._index_pos = 0
+        self._total_frames = 0
+        self._maps: dict[str, np.memmap] = {}
+        self.refresh()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, f"{name}.dat")
+
+    def _row_bytes(self, name: str) -> int:
+        return self._dtypes[name].itemsize * int(np.prod(self._shapes[name]))
+
+    def refresh(self):
+        """Lee las sesiones que otros procesos hayan añadido al índice desde la última lectura."""
+        index_path = os.path.join(self.root, _INDEX_FILE)
+        if not os.path.exists(index_path):
+            return
+        with open(index_path, 'rb') as f:
+            f.seek(self._index_pos)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # Línea a medio escribir: aún no está confirmada
+                self._index_pos += len(line)
+                entry = json.loads(line)
+                self._entries[entry['id']] = entry
+                self._total_frames = max(self._total_frames, entry['inicio'] + entry['fotogramas'])
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._entries
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._entries))
+
+    @property
+    def total_frames(self) -> int:
+        return self._total_frames
+
+    def entry(self, session_id: str) -> dict:
+        """Entrada del índice: id, inicio, fotogramas, fps y metadatos."""
+        try:
+            return self._entries[session_id]
+        except KeyError:
+            raise KeyError(f"Sesión desconocida en el almacén de landmarks: {session_id}") from None
+
+    def select(self, **criteria) -> list[str]:
+        """Ids de las sesiones cuyos metadatos tienen exactamente los valores indicados."""
+        return [sid for sid, entry in self._entries.items()
+                if all(entry['metadatos'].get(key) == value for key, value in criteria.items())]
+
+    @contextmanager
+    def _lock(self, timeout: float = 60.0):
+        path = os.path.join(self.root, _LOCK_FILE)
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                break
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(path) > _LOCK_STALE_S:
+                        logger.warning(f"Se libera un bloqueo abandonado del almacén de landmarks: {path}")
+                        os.remove(path)
+                        continue
+                except FileNotFoundError:
+                    continue
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"No se pudo bloquear el almacén de landmarks {self.root}")
+                time.sleep(0.01)
+        try:
+            yield
+        finally:
+            os.close(fd)
+            os.remove(path)
+
+    def append(self, session_id: str, session: SessionLandmarks, metadata: dict | None = None) -> dict:
+        """
+        Añade la sesión y devuelve su entrada del índice. El almacén es de solo
+        anexado: si el id ya existe no se escribe nada y se devuelve la entrada existente.
+        """
+        with self._lock():
+            self.refresh()
+            if session_id in self._entries:
+                return self._entries[session_id]
+            start, n_frames = self._total_frames, len(session)
+            self._maps = {}  # En Windows no se puede truncar un fichero con un mapa abierto
+            for name in _ARRAYS:
+                array = np.ascontiguousarray(getattr(session, name), dtype=self._dtypes[name])
+                with open(self._path(name), 'ab') as f:
+                    # Descarta lo que dejara un anexado interrumpido (no está en el índice)
+                    f.truncate(start * self._row_bytes(name))
+                    f.write(array.tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+            entry = {'id': session_id, 'inicio': start, 'fotogramas': n_frames, 'fps': float(session.fps),
+                     'creado': time.time(), 'metadatos': metadata or {}}
+            with open(os.path.join(self.root, _INDEX_FILE), 'ab') as f:
+                f.truncate(self._index_pos)  # Y una línea del índice a medio escribir
+                f.write((json.dumps(entry, default=str, ensure_ascii=False) + '\n').encode('utf-8'))
+            self.refresh()
+        logger.info(f"Sesión {session_id} añadida al almacén de landmarks ({n_frames} fotogramas).")
+        return entry
+
+    def _array(self, name: str) -> np.memmap:
+        """Mapa de solo lectura del fichero completo; se rehace si el almacén ha crecido."""
+        mapped = self._maps.get(name)
+        if mapped is None or len(mapped) < self._total_frames:
+            mapped = np.memmap(self._path(name), dtype=self._dtypes[name], mode='r',
+                               shape=(self._total_frames, *self._shapes[name]))
+            self._maps[name] = mapped
+        return mapped
+
+    def get(self, session_id: str, start: int = 0, stop: int | None = None) -> SessionLandmarks:
+        """
+        Fotogramas [start, stop) de la sesión como vistas memory-mapped, sin copiar
+        (en float16 si el almacén está cuantizado). Usar load() para tenerlos en RAM.
+        """
+        entry = self.entry(session_id)
+        first, last, _ = slice(start, stop).indices(entry['fotogramas'])
+        rows = slice(entry['inicio'] + first, entry['inicio'] + max(first, last))
+        return SessionLandmarks(*(self._array(name)[rows] for name in _ARRAYS), entry['fps'])
+
+    def load(self, session_id: str, start: int = 0, stop: int | None = None) -> SessionLandmarks:
+        """Como get(), pero copiado a memoria en float32."""
+        view = self.get(session_id, start, stop)
+        return SessionLandmarks(*(np.array(getattr(view, name), dtype=np.float32) for name in _ARRAYS), view.fps)
+
+    def iter_sessions(self, session_ids=None) -> Iterator[tuple[dict, SessionLandmarks]]:
+        """(entrada, vistas) de cada sesión, en orden de anexado o en el de 'session_ids'."""
+        for session_id in (list(self._entries) if session_ids is None else session_ids):
+            yield self.entry(session_id), self.get(session_id)
+
+    def close(self):
+        """Suelta los mapas abiertos (se vuelven a crear en la siguiente lectura)."""
+        self._maps = {}
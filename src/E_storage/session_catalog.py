@@ -0,0 +1,309 @@
+# src/E_storage/session_catalog.py
+"""
+Catálogo de sesiones en SQLite: una fila por sesión analizada, una por
+repetición y una por fallo, para consultar el histórico sin reanalizar.
+
+    sesiones      vídeo, atleta, fecha de la grabación, fecha del análisis,
+                  modo, fotogramas, fps, repeticiones, nº de fallos, tiempo
+                  de análisis y, en JSON, umbrales, estimador y fases
+    repeticiones  inicio, fondo y fin (fotogramas), ángulo mínimo de
+                  rodilla, duración y tipos de fallo de cada repetición
+                  (separados por ', '; el detalle está en 'fallos')
+    fallos        tipo, repetición, fotograma y valor de cada fallo
+
+Hay índices por atleta y fecha, por fecha y por tipo de fallo. Cada vídeo
+(ruta absoluta) tiene una sola fila: reanalizarlo la sustituye. La base usa
+WAL, así que los procesos del análisis por lotes pueden escribir a la vez que
+la GUI consulta.
+
+Uso:
+    python -m src.E_storage.session_catalog data/processed/catalogo_sesiones.sqlite \\
+        --atleta ana --fallo "Poca Profundidad" --desde 2026-09-01
+"""
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+
+from src import config
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sesiones (
+    id INTEGER PRIMARY KEY,
+    ruta_video TEXT NOT NULL UNIQUE,
+    video TEXT NOT NULL,
+    atleta TEXT,
+    fecha TEXT NOT NULL,
+    analizado TEXT NOT NULL,
+    modo TEXT,
+    fotogramas INTEGER,
+    fps REAL,
+    repeticiones INTEGER,
+    n_fallos INTEGER,
+    tiempo_analisis_s REAL,
+    umbrales TEXT,
+    estimador TEXT,
+    fases TEXT,
+    sesion_almacen TEXT
+);
+CREATE TABLE IF NOT EXISTS repeticiones (
+    sesion_id INTEGER NOT NULL REFERENCES sesiones(id) ON DELETE CASCADE,
+    rep INTEGER NOT NULL,
+    frame_inicio INTEGER,
+    frame_fondo INTEGER,
+    frame_fin INTEGER,
+    angulo_minimo REAL,
+    duracion_s REAL,
+    fallo TEXT,
+    PRIMARY KEY (sesion_id, rep)
+);
+CREATE TABLE IF NOT EXISTS fallos (
+    sesion_id INTEGER NOT NULL REFERENCES sesiones(id) ON DELETE CASCADE,
+    rep INTEGER,
+    tipo TEXT NOT NULL,
+    frame INTEGER,
+    valor TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_sesiones_atleta_fecha ON sesiones(atleta, fecha);
+CREATE INDEX IF NOT EXISTS idx_sesiones_fecha ON sesiones(fecha);
+CREATE INDEX IF NOT EXISTS idx_fallos_tipo ON fallos(tipo, sesion_id);
+CREATE INDEX IF NOT EXISTS idx_fallos_sesion ON fallos(sesion_id);
+"""
+SESSION_COLUMNS = ('id', 'video', 'ruta_video', 'atleta', 'fecha', 'analizado', 'modo', 'fotogramas', 'fps',
+                   'repeticiones', 'n_fallos', 'tiempo_analisis_s', 'sesion_almacen')
+_JSON_COLUMNS = ('umbrales', 'estimador', 'fases')
+
+
+def _iso(value) -> str | None:
+    """
+    Fecha como texto ISO 8601 comparable en SQL (acepta str ISO, date, datetime o
+    timestamp). Los textos se normalizan igual que los objetos ('2026-10-01' o
+    '2026-10-01T10:00:00'), así que filas y filtros se ordenan de forma coherente.
+    Lanza ValueError o TypeError si no es una fecha válida.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        try:
+            try:
+                return date.fromisoformat(value).isoformat()
+            except ValueError:
+                value = datetime.fromisoformat(value)
+        except ValueError:
+            raise ValueError(f"Fecha no válida (se espera ISO 8601, p. ej. 2026-10-01): {value!r}") from None
+    if isinstance(value, (int, float)):
+        value = datetime.fromtimestamp(value)
+    if isinstance(value, datetime):
+        return value.isoformat(timespec='seconds')
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Fecha no válida: {value!r}")
+
+
+def _optional_int(value):
+    return None if value is None or value != value else int(value)  # NaN -> None
+
+
+class SessionCatalog:
+    """Conexión al catálogo; segura entre hilos (las operaciones se serializan)."""
+    def __init__(self, path: str, timeout: float = 30.0):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def record(self, video_path: str, results: dict, settings: dict | None = None,
+               estimator: dict | None = None, recorded_at=None) -> int:
+        """
+        Guarda (o sustituye) la sesión de 'video_path' a partir del resultado de
+        run_full_pipeline_in_memory y devuelve su id. El atleta sale de
+        settings['athlete']; 'estimator' es la configuración del estimador y
+        'recorded_at' la fecha de la grabación (por defecto settings['session_date']
+        o la fecha de modificación del fichero).
+        """
+        settings = settings or {}
+        if recorded_at is None:
+            recorded_at = settings.get('session_date') or os.path.getmtime(video_path)
+        recorded_at = _iso(recorded_at)  # Se valida antes de tocar la base
+        performance = results.get('metricas_rendimiento') or {}
+        rep_details = results.get('detalle_repeticiones')
+        faults = results.get('fallos_detectados') or []
+        fps = getattr(results.get('landmarks_sesion'), 'fps', None)
+        row = {
+            'ruta_video': os.path.abspath(video_path),
+            'video': os.path.basename(video_path),
+            'atleta': settings.get('athlete'),
+            'fecha': recorded_at,
+            'analizado': _iso(datetime.now()),
+            'modo': performance.get('modo'),
+            'fotogramas': performance.get('fotogramas'),
+            'fps': fps,
+            'repeticiones': results.get('repeticiones_contadas'),
+            'n_fallos': len(faults),
+            'tiempo_analisis_s': performance.get('total_wall_s'),
+            'umbrales': json.dumps(results.get('umbrales'), default=str),
+            'estimador': json.dumps(estimator, default=str),
+            'fases': json.dumps(performance.get('fases'), default=str),
+            'sesion_almacen': results.get('sesion_almacen'),
+        }
+        # Una repetición puede tener varios fallos: se guardan todos sus tipos
+        fault_by_rep: dict = {}
+        for fault in faults:
+            types = fault_by_rep.setdefault(fault.get('rep'), [])
+            if fault.get('type') not in types:
+                types.append(fault.get('type'))
+        rep_rows = []
+        if rep_details is not None:
+            for rep in rep_details.itertuples(index=False):
+                start, end = _optional_int(rep.frame_inicio), _optional_int(rep.frame_fin)
+                duration = (end - start) / fps if fps and start is not None and end is not None else None
+                rep_rows.append((int(rep.rep), start, _optional_int(rep.frame_fondo), end,
+                                 float(rep.angulo_minimo), duration,
+                                 ', '.join(fault_by_rep.get(int(rep.rep), [])) or None))
+
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM sesiones WHERE ruta_video = ?", (row['ruta_video'],))
+            cursor = self._conn.execute(
+                f"INSERT INTO sesiones ({', '.join(row)}) VALUES ({', '.join('?' * len(row))})",
+                tuple(row.values()))
+            session_id = cursor.lastrowid
+            self._conn.executemany(
+                "INSERT INTO repeticiones VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(session_id, *rep_row) for rep_row in rep_rows])
+            self._conn.executemany(
+                "INSERT INTO fallos VALUES (?, ?, ?, ?, ?)",
+                [(session_id, fault.get('rep'), fault.get('type'), fault.get('frame'), fault.get('value'))
+                 for fault in faults])
+        return session_id
+
+    def _query(self, sql: str, params=()) -> list[dict]:
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params)]
+
+    def sessions(self, athlete: str | None = None, since=None, until=None, fault_type: str | None = None,
+                 video: str | None = None, limit: int | None = 100, offset: int = 0) -> list[dict]:
+        """
+        Sesiones que cumplen todos los filtros, de la más reciente a la más
+        antigua. 'since' es inclusivo y 'until' exclusivo (fechas de grabación);
+        'fault_type' deja las sesiones con al menos un fallo de ese tipo.
+        """
+        where, params = [], []
+        if athlete is not None:
+            where.append("atleta = ?")
+            params.append(athlete)
+        if since is not None:
+            where.append("fecha >= ?")
+            params.append(_iso(since))
+        if until is not None:
+            where.append("fecha < ?")
+            params.append(_iso(until))
+        if video is not None:
+            where.append("video = ?")
+            params.append(video)
+        if fault_type is not None:
+            where.append("id IN (SELECT sesion_id FROM fallos WHERE tipo = ?)")
+            params.append(fault_type)
+        sql = f"SELECT {', '.join(SESSION_COLUMNS)} FROM sesiones"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY fecha DESC"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params += [limit, offset]
+        return self._query(sql, params)
+
+    def session(self, session_id: int) -> dict | None:
+        """Sesión completa (umbrales, estimador y fases decodificados) o None."""
+        rows = self._query("SELECT * FROM sesiones WHERE id = ?", (session_id,))
+        if not rows:
+            return None
+        session = rows[0]
+        for column in _JSON_COLUMNS:
+            session[column] = json.loads(session[column]) if session[column] else None
+        return session
+
+    def reps(self, session_id: int) -> list[dict]:
+        return self._query("SELECT rep, frame_inicio, frame_fondo, frame_fin, angulo_minimo, duracion_s, fallo "
+                           "FROM repeticiones WHERE sesion_id = ? ORDER BY rep", (session_id,))
+
+    def faults(self, session_id: int) -> list[dict]:
+        return self._query("SELECT rep, tipo, frame, valor FROM fallos WHERE sesion_id = ? ORDER BY rep",
+                           (session_id,))
+
+    def fault_counts(self, athlete: str | None = None, since=None, until=None) -> dict[str, int]:
+        """Nº de fallos por tipo en las sesiones que cumplen los filtros."""
+        where, params = [], []
+        for clause, value in (("s.atleta = ?", athlete), ("s.fecha >= ?", _iso(since)), ("s.fecha < ?", _iso(until))):
+            if value is not None:
+                where.append(clause)
+                params.append(value)
+        sql = "SELECT f.tipo, COUNT(*) AS n FROM fallos f JOIN sesiones s ON s.id = f.sesion_id"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return {row['tipo']: row['n'] for row in self._query(sql + " GROUP BY f.tipo ORDER BY n DESC", params)}
+
+    def athletes(self) -> list[str]:
+        return [row['atleta'] for row in self._query(
+            "SELECT DISTINCT atleta FROM sesiones WHERE atleta IS NOT NULL ORDER BY atleta")]
+
+    def fault_types(self) -> list[str]:
+        return [row['tipo'] for row in self._query("SELECT DISTINCT tipo FROM fallos ORDER BY tipo")]
+
+
+def catalog_path_for(settings: dict) -> str:
+    """Ruta del catálogo: settings['catalog_path'] o config.SESSION_CATALOG_FILENAME en la carpeta de salida."""
+    return settings.get('catalog_path') or os.path.join(settings.get('output_dir', '.'),
+                                                        config.SESSION_CATALOG_FILENAME)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('catalog', help="Fichero SQLite del catálogo")
+    parser.add_argument('--atleta')
+    parser.add_argument('--fallo', help="Tipo de fallo (p. ej. 'Poca Profundidad')")
+    parser.add_argument('--desde', help="Fecha de grabación mínima (YYYY-MM-DD, inclusiva)")
+    parser.add_argument('--hasta', help="Fecha de grabación máxima (YYYY-MM-DD, exclusiva)")
+    parser.add_argument('--limite', type=int, default=50)
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.catalog):
+        parser.error(f"No existe el catálogo {args.catalog}")
+    with SessionCatalog(args.catalog) as catalog:
+        start = time.perf_counter()
+        rows = catalog.sessions(athlete=args.atleta, since=args.desde, until=args.hasta,
+                                fault_type=args.fallo, limit=args.limite)
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+        print(f"{'id':>6} {'fecha':<19} {'atleta':<12} {'reps':>4} {'fallos':>6}  vídeo")
+        for row in rows:
+            print(f"{row['id']:>6} {row['fecha'][:19]:<19} {(row['atleta'] or '-'):<12} "
+                  f"{row['repeticiones'] if row['repeticiones'] is not None else '-':>4} {row['n_fallos']:>6}  {row['video']}")
+        print(f"{len(rows)} sesiones en {elapsed_ms:.1f} ms")
+        counts = catalog.fault_counts(athlete=args.atleta, since=args.desde, until=args.hasta)
+        if counts:
+            print("Fallos por tipo: " + ", ".join(f"{tipo}: {n}" for tipo, n in counts.items()))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -7,9 +7,90 @@ from src import config
 
 logger = logging.getLogger(__name__)
 
+
+class DebugVideoWriter:
+    """
+    Escribe el vídeo de depuración de forma incremental, fotograma a fotograma,
+    para no tener que guardar todos los fotogramas anotados en memoria.
+    El VideoWriter se abre con el tamaño del primer fotograma recibido.
+    """
+    def __init__(self, output_path: str, fps: float, fourcc: str = 'mp4v'):
+        self.output_path = output_path
+        self.fps = fps
+        self.fourcc = fourcc
+        self.frames_written = 0
+        self._writer = None
+        self._size = None
+
+    def write(self, frame: np.ndarray):
+        if frame is None:
+            return
+        if self._writer is None:
+            height, width = frame.shape[:2]
+            self._size = (width, height)
+            self._writer = cv2.VideoWriter(
+                self.output_path,
+                cv2.VideoWriter_fourcc(*self.fourcc),
+                self.fps,
+                self._size
+            )
+        # VideoWriter descarta en silencio los fotogramas de otro tamaño
+        if (frame.shape[1], frame.shape[0]) != self._size:
+            frame = cv2.resize(frame, self._size, interpolation=cv2.INTER_LINEAR)
+        self._writer.write(frame)
+        self.frames_written += 1
+
+    def release(self):
+        if self._writer is not None:
+            self._writer.release()
+            self._writer = None
+
+def _draw_skeleton(image: np.ndarray, xs: np.ndarray, ys: np.ndarray, valid: np.ndarray):
+    """Dibuja conexiones y puntos (coordenadas en píxeles) de los landmarks marcados en 'valid'."""
+    points_to_draw = {
+        int(lm_idx): (int(xs[lm_idx]), int(ys[lm_idx]))
+        for lm_idx in np.flatnonzero(valid)
+    }
+    for p1_idx, p2_idx in config.POSE_CONNECTIONS:
+        if p1_idx in points_to_draw and p2_idx in points_to_draw:
+            cv2.line(image, points_to_draw[p1_idx], points_to_draw[p2_idx], config.CONNECTION_COLOR, 2)
+    for point in points_to_draw.values():
+        cv2.circle(image, point, 4, config.LANDMARK_COLOR, -1)
+
+
+def draw_pose_landmarks(frame: np.ndarray, landmarks, crop_box=None,
+                        min_visibility: float = 0.5, copy: bool = True) -> np.ndarray:
+    """
+    Anota bajo demanda el esqueleto de un fotograma a partir de un array (33, 4)
+    [x, y, z, visibility] normalizado. Si hay crop_box [x1, y1, x2, y2] (píxeles
+    del fotograma), los landmarks son relativos a ese recorte.
+
+    Los estimadores solo devuelven landmarks; la anotación la piden los consumidores
+    que la necesitan (vídeo de depuración, vista previa de la GUI). Con copy=False
+    se dibuja directamente sobre 'frame'.
+    """
+    annotated = frame.copy() if copy else frame
+    if landmarks is None:
+        return annotated
+    landmarks = np.asarray(landmarks)
+    valid = ~np.isnan(landmarks[:, 0]) & ~(landmarks[:, 3] < min_visibility)
+    if not valid.any():
+        return annotated
+
+    xs, ys = landmarks[:, 0], landmarks[:, 1]
+    if crop_box is not None and not np.isnan(np.asarray(crop_box, dtype=float)).any():
+        x1, y1, x2, y2 = crop_box
+        xs, ys = x1 + xs * (x2 - x1), y1 + ys * (y2 - y1)
+    else:
+        h, w = frame.shape[:2]
+        xs, ys = xs * w, ys * h
+    _draw_skeleton(annotated, xs, ys, valid)
+    return annotated
+
+
 def render_landmarks_on_video_hq(
     original_frames: list,
-    landmarks_sequence: np.ndarray,
+    landmarks_sequence: np.ndarray,  # (T, 33, 4)
     crop_boxes: np.ndarray,
     output_path: str,
     fps: float
@@ -38,48 +119,32 @@ def render_landmarks_on_video_hq(
     for i, frame in enumerate(original_frames):
         annotated_frame = frame.copy()
         
-        if i < len(landmarks_sequence) and landmarks_sequence[i] is not None:
+        if i < len(landmarks_sequence):
             frame_landmarks = landmarks_sequence[i]
-            if all(np.isnan(lm['x']) for lm in frame_landmarks):
+            valid = ~np.isnan(frame_landmarks[:, 0])
+            if not valid.any():
                 writer.write(annotated_frame)
                 continue
             
-            points_to_draw = {}
             crop_box = crop_boxes[i] if crop_boxes is not None and i < len(crop_boxes) and not np.isnan(crop_boxes[i]).all() else None
 
-            for lm_idx, lm in enumerate(frame_landmarks):
-                if not np.isnan(lm['x']):
-                    
-                    # --- LÓGICA DE TRANSFORMACIÓN CORREGIDA ---
-                    
-                    if crop_box is not None:
-                        # --- Caso CON CROP ---
-                        # 1. Convertir landmark de [0,1] (relativo al crop) a píxeles en la imagen procesada (256x256)
-                        x1_p, y1_p, x2_p, y2_p = crop_box
-                        crop_w_p = x2_p - x1_p
-                        crop_h_p = y2_p - y1_p
-                        
-                        abs_x_p = x1_p + lm['x'] * crop_w_p
-                        abs_y_p = y1_p + lm['y'] * crop_h_p
-                        
-                        # 2. Escalar el punto de la imagen procesada a la imagen original (alta resolución)
-                        final_x = int(abs_x_p * scale_x)
-                        final_y = int(abs_y_p * scale_y)
-                        
-                    else:
-                        # --- Caso SIN CROP ---
-                        # Los landmarks son relativos a la imagen procesada (256x256). Solo necesitamos escalarlos.
-                        final_x = int(lm['x'] * orig_w)
-                        final_y = int(lm['y'] * orig_h)
-                        
-                    points_to_draw[lm_idx] = (final_x, final_y)
+            # --- LÓGICA DE TRANSFORMACIÓN (vectorizada sobre los 33 landmarks) ---
+            xs, ys = frame_landmarks[:, 0], frame_landmarks[:, 1]
+            if crop_box is not None:
+                # --- Caso CON CROP ---
+                # 1. Convertir landmark de [0,1] (relativo al crop) a píxeles en la imagen procesada (256x256)
+                x1_p, y1_p, x2_p, y2_p = crop_box
+                abs_x_p = x1_p + xs * (x2_p - x1_p)
+                abs_y_p = y1_p + ys * (y2_p - y1_p)
+                # 2. Escalar el punto de la imagen procesada a la imagen original (alta resolución)
+                final_xs, final_ys = abs_x_p * scale_x, abs_y_p * scale_y
+            else:
+                # --- Caso SIN CROP ---
+                # Los landmarks están normalizados a la imagen. Solo necesitamos escalarlos.
+                final_xs, final_ys = xs * orig_w, ys * orig_h
 
             # Dibujar el esqueleto con los puntos ya transformados
-            for p1_idx, p2_idx in config.POSE_CONNECTIONS:
-                if p1_idx in points_to_draw and p2_idx in points_to_draw:
-                    cv2.line(annotated_frame, points_to_draw[p1_idx], points_to_draw[p2_idx], config.CONNECTION_COLOR, 2)
-            for point in points_to_draw.values():
-                cv2.circle(annotated_frame, point, 4, config.LANDMARK_COLOR, -1)
+            _draw_skeleton(annotated_frame, final_xs, final_ys, valid)
         
         writer.write(annotated_frame)
 
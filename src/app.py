@@ -1,43 +1,68 @@
 # app.py
 import streamlit as st
-import tempfile, os
-from subprocess import run
+import tempfile, os, sys, time
+import pandas as pd
+from subprocess import Popen
+
+from src.service import AnalysisClient
 
 st.title("Gym Performance Analysis")
 
 uploaded = st.file_uploader("Sube un vídeo de sentadilla", type=["mp4","mov"])
 low = st.slider("Umbral bajo (°)",  0, 180, 80)
 high = st.slider("Umbral alto (°)", 0, 180, 150)
-fps = st.number_input("FPS del vídeo", 1.0, 120.0, 28.57)
+
+client = AnalysisClient()
+
+
+def ensure_service(timeout_s: float = 30.0) -> bool:
+    """Arranca el servicio de análisis local una sola vez si no está escuchando."""
+    if client.is_alive():
+        return True
+    Popen([sys.executable, "-m", "src.service"])
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        time.sleep(0.5)
+        if client.is_alive():
+            return True
+    return False
+
 
 if uploaded is not None:
-    tfile = tempfile.NamedTemporaryFile(delete=False, suffix=".mov")
+    suffix = os.path.splitext(uploaded.name)[1] or ".mov"
+    tfile = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
     tfile.write(uploaded.read())
+    tfile.close()
     video_path = tfile.name
     st.video(video_path)
 
     if st.button("Empezar análisis"):
+        if not ensure_service():
+            st.error("No se pudo contactar con el servicio de análisis (python -m src.service).")
+            st.stop()
+
         # Creamos un directorio de salida temporal
         outdir = tempfile.mkdtemp(prefix="gym_out_")
-        # Llamamos al pipeline (igual que hicimos en consola)
-        cmd = [
-          "python", "-m", "src.run_pipeline",
-          "--video", video_path,
-          "--fps", str(fps),
-          "--sample_rate", "1",
-          "--low_thresh", str(low),
-          "--high_thresh", str(high)
-        ]
-        with st.spinner("Procesando vídeo…"):
-            res = run(cmd, capture_output=True, text=True)
-        if res.returncode == 0:
+        settings = {"output_dir": outdir, "sample_rate": 1, "low_thresh": low, "high_thresh": high}
+        try:
+            job = client.submit(video_path, settings)
+        except RuntimeError as e:
+            st.error(f"El servicio rechazó el análisis: {e}")
+            st.stop()
+
+        progress = st.progress(0, text="En cola…")
+        status = client.wait(job["id"], on_progress=lambda p: progress.progress(p, text=f"Procesando vídeo… {p}%"))
+        if status.get("estado") == "completado":
+            result = client.result(job["id"], include_metrics=True)
             st.success("Análisis completado ✅")
-            st.text(res.stdout)
-            # Mostrar el TXT de repeticiones
-            count_txt = os.path.join("data/processed/counts", os.path.basename(video_path).split(".")[0] + "_count.txt")
-            if os.path.exists(count_txt):
-                st.markdown("### Recuento de repeticiones:")
-                st.code(open(count_txt).read())
+            st.metric("Repeticiones", result["repeticiones_contadas"])
+            if result["fallos_detectados"]:
+                st.markdown("### Fallos detectados:")
+                st.table(pd.DataFrame(result["fallos_detectados"]))
+            if result["metricas"]:
+                df = pd.DataFrame(result["metricas"])
+                if "rodilla_izq" in df.columns:
+                    st.line_chart(df.set_index("frame_idx")["rodilla_izq"] if "frame_idx" in df.columns else df["rodilla_izq"])
         else:
             st.error("Ha ocurrido un error:")
-            st.code(res.stderr)
+            st.code(status.get("error") or status)
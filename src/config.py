@@ -2,6 +2,7 @@
 """
 Archivo de Configuración Centralizado
 """
+import os
 
 # Flag para activar el nuevo análisis 3D. Si es False, usará el estimador 2D antiguo.
 USE_3D_ANALYSIS = True
@@ -16,10 +17,61 @@ MODEL_COMPLEXITY = 1
 MIN_DETECTION_CONFIDENCE = 0.5
 DEFAULT_TARGET_WIDTH = 256
 DEFAULT_TARGET_HEIGHT = 256
+# Seguimiento de la ROI en CroppedPoseEstimator (evita la detección completa en cada frame)
+TRACK_ROI = False
+ROI_MIN_VISIBILITY = 0.5  # Visibilidad media mínima para seguir confiando en la caja seguida
+ROI_SMOOTHING = 0.5       # Peso de la caja anterior en el suavizado exponencial
+# Decodificación de vídeo: 'auto', 'read', 'grab' o 'seek' (ver VideoFrameStream)
+FRAME_DECODE_MODE = "auto"
+# A partir de este sample_rate, 'auto' salta en lugar de recorrer. Saltar solo compensa
+# cuando el paso supera el intervalo entre keyframes (GOP), típicamente 30-60 en móviles.
+SEEK_MIN_STRIDE = 30
+# Ejecución segmentada: decodificación, inferencia y escritura de vídeo en hilos solapados
+PIPELINED_EXECUTION = True
+PIPELINE_QUEUE_SIZE = 8  # Fotogramas máximos en cada cola entre etapas
+# Inferencia 2D en paralelo: nº de procesos (1 = sin paralelismo, 0 = todos los núcleos)
+POSE_WORKERS = 1
+PARALLEL_CHUNK_SIZE = 4  # Fotogramas por tarea enviada a cada proceso
+# Transporte de fotogramas hacia los procesos: 'pickle' o 'shared_memory'
+FRAME_TRANSPORT = "pickle"
+SHM_RING_SLOTS = 0  # Huecos del ring de memoria compartida (0 = 2 * workers + 2)
+# Instrumentación: guardar '<vídeo>_rendimiento.json' en la carpeta de sesión (siempre en debug_mode)
+SAVE_PERFORMANCE_JSON = False
+# Reutilizar estimadores ya cargados entre análisis del mismo proceso (ver estimator_pool.py)
+REUSE_ESTIMATORS = True
+ESTIMATOR_POOL_MAX_IDLE = 1  # Instancias ociosas que se conservan por tipo/configuración
+# Caché de landmarks en disco: un reanálisis del mismo vídeo con otros umbrales
+# salta la decodificación y la inferencia (ver E_storage/landmark_cache.py)
+USE_LANDMARK_CACHE = True
+LANDMARK_CACHE_DIRNAME = ".landmark_cache"  # Dentro de la carpeta de salida, salvo settings['cache_dir']
+# Caché por defecto si no se indica carpeta de salida (no se crea nada en el directorio actual)
+LANDMARK_CACHE_DEFAULT_DIR = os.path.join(os.path.expanduser("~"), ".cache", "gym_performance", "landmarks")
+LANDMARK_CACHE_MAX_MB = 1024               # Tamaño máximo; se desalojan las entradas menos usadas
+# Tablas de métricas y landmarks de cada sesión (ver E_storage/columnar.py); siempre en debug_mode
+SAVE_SESSION_DATA = False
+SESSION_OUTPUT_FORMAT = "parquet"  # 'parquet', 'arrow' o 'csv' (sin pyarrow se escribe CSV)
+PARQUET_COMPRESSION = "zstd"
+# Almacén de landmarks de todas las sesiones (ver E_storage/landmark_store.py); None = desactivado
+LANDMARK_STORE_DIR = None
+LANDMARK_STORE_DTYPE = "float16"  # 'float16' (cuantizado, la mitad de espacio) o 'float32'
+# Catálogo SQLite de sesiones, repeticiones y fallos (ver E_storage/session_catalog.py)
+USE_SESSION_CATALOG = True
+SESSION_CATALOG_FILENAME = "catalogo_sesiones.sqlite"  # Dentro de la carpeta de salida, salvo settings['catalog_path']
+# Servicio HTTP local de análisis (src/service.py)
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8765
+SERVICE_WORKERS = 1              # Análisis simultáneos, cada uno con su estimador caliente
+SERVICE_QUEUE_SIZE = 16          # Trabajos en espera antes de responder 503
+SERVICE_MAX_RETAINED_JOBS = 100  # Trabajos terminados que se conservan para consultar su resultado
+SERVICE_RESULT_TTL_S = 3600      # Segundos que se conserva un resultado
+# Modo en vivo: los fotogramas más antiguos que este presupuesto se descartan sin analizar
+LIVE_LATENCY_BUDGET_MS = 250
+LIVE_MODEL_COMPLEXITY = 2  # BlazePose completo; 1 es más rápido en equipos modestos
 
 # --- PARÁMETROS DE CONTEO ---
 SQUAT_HIGH_THRESH = 140.0
 SQUAT_LOW_THRESH = 80.0
+DEPTH_FAIL_THRESH = 90.0  # Ángulo mínimo de rodilla por encima del cual la rep es "Poca Profundidad"
 PEAK_PROMINENCE = 10  # Prominencia para el detector de picos
 PEAK_DISTANCE = 15    # Distancia mínima en frames entre repeticiones
 
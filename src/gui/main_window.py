@@ -13,6 +13,8 @@ from src import config
 from src.gui.style_utils import load_stylesheet
 from src.gui.widgets.video_display import VideoDisplayWidget
 from .widgets.results_panel import ResultsPanel
+from .widgets.history_panel import HistoryPanel
+from src.E_storage.session_catalog import catalog_path_for
 from src.gui.worker import AnalysisWorker
 
 logger = logging.getLogger(__name__)
@@ -41,6 +43,9 @@ class MainWindow(QMainWindow):
         self.tabs.addTab(self.results_panel, "Resultados")
         self.tabs.setTabEnabled(1, False) # Deshabilitada hasta que haya resultados
 
+        self.history_panel = HistoryPanel()
+        self.tabs.addTab(self.history_panel, "Historial")
+
         self.tabs.addTab(self._create_settings_tab(), "Ajustes")
         self.setCentralWidget(self.tabs)
 
@@ -90,6 +95,7 @@ class MainWindow(QMainWindow):
         layout = QFormLayout(widget)
         
         self.output_dir_edit = QLineEdit()
+        self.athlete_edit = QLineEdit()
         self.sample_rate_spin = QSpinBox(); self.sample_rate_spin.setMinimum(1)
         self.width_spin = QSpinBox(); self.width_spin.setRange(16,4096)
         self.height_spin = QSpinBox(); self.height_spin.setRange(16,4096)
@@ -97,6 +103,7 @@ class MainWindow(QMainWindow):
         self.use_crop_check = QCheckBox("Usar recorte centrado (más preciso)")
         self.generate_video_check = QCheckBox("Generar vídeo de depuración con esqueleto")
         self.debug_mode_check = QCheckBox("Modo Depuración (guarda CSVs intermedios)")
+        self.use_cache_check = QCheckBox("Reutilizar landmarks en caché (re-análisis rápido)")
         self.dark_mode_check = QCheckBox("Modo oscuro")
         self.dark_mode_check.stateChanged.connect(self._toggle_theme)
 
@@ -106,11 +113,13 @@ class MainWindow(QMainWindow):
         h_layout.addWidget(self.height_spin)
 
         layout.addRow("Carpeta base de salida:", self.output_dir_edit)
+        layout.addRow("Atleta:", self.athlete_edit)
         layout.addRow("Sample Rate (1 de cada N frames):", self.sample_rate_spin)
         layout.addRow("Ancho/Alto (px) de preproceso:", h_layout)
         layout.addRow(self.use_crop_check)
         layout.addRow(self.generate_video_check)
         layout.addRow(self.debug_mode_check)
+        layout.addRow(self.use_cache_check)
         layout.addRow(self.dark_mode_check)
         
         return widget
@@ -172,8 +181,12 @@ class MainWindow(QMainWindow):
             'target_height': self.height_spin.value(),
             'use_crop': self.use_crop_check.isChecked(),
             'generate_debug_video': self.generate_video_check.isChecked(),
-            'debug_mode': self.debug_mode_check.isChecked()
+            'debug_mode': self.debug_mode_check.isChecked(),
+            'use_cache': self.use_cache_check.isChecked()
         }
+        athlete = self.athlete_edit.text().strip()
+        if athlete:
+            settings['athlete'] = athlete
         
         self.worker = AnalysisWorker(self.video_path, settings)
         self.worker.progress.connect(self.progress_bar.setValue)
@@ -209,6 +222,16 @@ class MainWindow(QMainWindow):
         self.results_panel.update_results(results)
         self.tabs.setTabEnabled(1, True) # Habilitamos la pestaña
         self.tabs.setCurrentWidget(self.results_panel) # Cambiamos a la pestaña de resultados
+        self._refresh_history()
+
+    def _refresh_history(self):
+        if not config.USE_SESSION_CATALOG:
+            return
+        catalog_path = catalog_path_for({'output_dir': self.output_dir_edit.text().strip()})
+        try:
+            self.history_panel.set_catalog(catalog_path)
+        except Exception as e:
+            logger.error(f"No se pudo leer el catálogo de sesiones {catalog_path}: {e}")
 
     
     def _load_settings(self):
@@ -219,9 +242,12 @@ class MainWindow(QMainWindow):
         self.use_crop_check.setChecked(self.settings.value("use_crop", config.DEFAULT_USE_CROP, type=bool))
         self.generate_video_check.setChecked(self.settings.value("generate_debug_video", config.DEFAULT_GENERATE_VIDEO, type=bool))
         self.debug_mode_check.setChecked(self.settings.value("debug_mode", config.DEFAULT_DEBUG_MODE, type=bool))
+        self.use_cache_check.setChecked(self.settings.value("use_cache", config.USE_LANDMARK_CACHE, type=bool))
+        self.athlete_edit.setText(self.settings.value("athlete", ""))
         is_dark = self.settings.value("dark_mode", config.DEFAULT_DARK_MODE, type=bool)
         self.dark_mode_check.setChecked(is_dark)
         self._toggle_theme(Qt.Checked if is_dark else Qt.Unchecked)
+        self._refresh_history()
 
     def closeEvent(self, event):
         self.settings.setValue("output_dir", self.output_dir_edit.text())
@@ -231,6 +257,8 @@ class MainWindow(QMainWindow):
         self.settings.setValue("use_crop", self.use_crop_check.isChecked())
         self.settings.setValue("generate_debug_video", self.generate_video_check.isChecked())
         self.settings.setValue("debug_mode", self.debug_mode_check.isChecked())
+        self.settings.setValue("use_cache", self.use_cache_check.isChecked())
+        self.settings.setValue("athlete", self.athlete_edit.text())
         self.settings.setValue("dark_mode", self.dark_mode_check.isChecked())
         super().closeEvent(event)
 
@@ -0,0 +1,87 @@
+# src/gui/widgets/history_panel.py
+
+import logging
+import os
+from datetime import date, timedelta
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QComboBox, QSpinBox,
+                             QPushButton, QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView)
+
+from src.E_storage.session_catalog import SessionCatalog
+
+logger = logging.getLogger(__name__)
+
+ALL_FAULTS = "Todos los fallos"
+COLUMNS = [("fecha", "Fecha"), ("atleta", "Atleta"), ("video", "Vídeo"), ("modo", "Modo"),
+           ("repeticiones", "Reps"), ("n_fallos", "Fallos"), ("tiempo_analisis_s", "Análisis (s)")]
+
+class HistoryPanel(QWidget):
+    """Histórico de sesiones del catálogo SQLite, con filtros por atleta, fallo y antigüedad."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.catalog_path = None
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+
+        filters = QHBoxLayout()
+        self.athlete_edit = QLineEdit(); self.athlete_edit.setPlaceholderText("Atleta (vacío = todos)")
+        self.fault_combo = QComboBox()
+        self.days_spin = QSpinBox(); self.days_spin.setRange(0, 3650); self.days_spin.setValue(90)
+        self.days_spin.setSpecialValueText("Sin límite"); self.days_spin.setSuffix(" días")
+        self.search_btn = QPushButton("Buscar")
+        self.search_btn.clicked.connect(self.refresh)
+        self.athlete_edit.returnPressed.connect(self.refresh)
+        filters.addWidget(self.athlete_edit, 2)
+        filters.addWidget(self.fault_combo, 2)
+        filters.addWidget(self.days_spin, 1)
+        filters.addWidget(self.search_btn)
+        layout.addLayout(filters)
+
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels([title for _, title in COLUMNS])
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        layout.addWidget(self.table)
+
+        self.status_label = QLabel("Sin catálogo")
+        layout.addWidget(self.status_label)
+
+    def set_catalog(self, catalog_path):
+        self.catalog_path = catalog_path
+        self.refresh()
+
+    def refresh(self):
+        if not self.catalog_path or not os.path.exists(self.catalog_path):
+            self.table.setRowCount(0)
+            self.status_label.setText("Aún no hay sesiones analizadas.")
+            return
+
+        athlete = self.athlete_edit.text().strip() or None
+        fault_type = self.fault_combo.currentText()
+        fault_type = None if fault_type in ("", ALL_FAULTS) else fault_type
+        days = self.days_spin.value()
+        since = date.today() - timedelta(days=days) if days else None
+
+        with SessionCatalog(self.catalog_path) as catalog:
+            rows = catalog.sessions(athlete=athlete, since=since, fault_type=fault_type, limit=500)
+            fault_types = catalog.fault_types()
+
+        # Se rehace la lista de fallos conservando la selección actual
+        current = self.fault_combo.currentText()
+        self.fault_combo.blockSignals(True)
+        self.fault_combo.clear()
+        self.fault_combo.addItems([ALL_FAULTS] + fault_types)
+        if current in fault_types:
+            self.fault_combo.setCurrentText(current)
+        self.fault_combo.blockSignals(False)
+
+        self.table.setRowCount(len(rows))
+        for row_idx, row in enumerate(rows):
+            for col_idx, (key, _) in enumerate(COLUMNS):
+                value = row.get(key)
+                if key == "tiempo_analisis_s" and value is not None:
+                    value = f"{value:.1f}"
+                self.table.setItem(row_idx, col_idx, QTableWidgetItem("-" if value is None else str(value)))
+        self.status_label.setText(f"{len(rows)} sesiones")
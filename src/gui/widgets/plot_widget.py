@@ -1,6 +1,7 @@
 # src/gui/widgets/plot_widget.py
 
 from PyQt5.QtWidgets import QWidget, QVBoxLayout
+from PyQt5.QtCore import pyqtSignal
 import pyqtgraph as pg
 import pandas as pd
 import logging
@@ -10,8 +11,13 @@ from src.gui.gui_utils import get_first_available_series
 logger = logging.getLogger(__name__)
 
 class PlotWidget(QWidget):
+    # Emitido al arrastrar una línea de umbral: (umbral superior, umbral inferior)
+    thresholds_changed = pyqtSignal(float, float)
+
     def __init__(self, parent=None):
         super().__init__(parent)
+        self.high_line = None
+        self.low_line = None
         self.plot_item = pg.PlotWidget()
         self.plot_item.setBackground('w')
         self.plot_item.showGrid(x=True, y=True)
@@ -22,9 +28,10 @@ class PlotWidget(QWidget):
         layout.addWidget(self.plot_item)
         self.setLayout(layout)
 
-    def plot_data(self, df_metrics: pd.DataFrame):
+    def plot_data(self, df_metrics: pd.DataFrame, high_thresh: float | None = None, low_thresh: float | None = None):
         """
         Dibuja las métricas disponibles y las líneas de umbral en el DataFrame.
+        Las líneas se pueden arrastrar; cada movimiento emite thresholds_changed.
         """
         self.clear_plots()
 
@@ -41,24 +48,47 @@ class PlotWidget(QWidget):
             self.plot_item.plot(valid_data[x_series.name], valid_data[y_series.name], pen=pen)
             self.plot_item.setTitle("Ángulo de la Rodilla", color="k", size="12pt")
             
-            # --- CAMBIO CLAVE: Dibujar las líneas de umbral ---
-            high_thresh = config.SQUAT_HIGH_THRESH
-            low_thresh = config.SQUAT_LOW_THRESH
+            # --- Líneas de umbral arrastrables ---
+            high_thresh = config.SQUAT_HIGH_THRESH if high_thresh is None else high_thresh
+            low_thresh = config.SQUAT_LOW_THRESH if low_thresh is None else low_thresh
 
             # Línea para el umbral superior (verde)
             pen_high = pg.mkPen(color=(0, 180, 0), style=pg.QtCore.Qt.DashLine)
-            high_line = pg.InfiniteLine(pos=high_thresh, angle=0, pen=pen_high, label=f'Up Thresh: {high_thresh}°')
-            self.plot_item.addItem(high_line)
+            self.high_line = pg.InfiniteLine(pos=high_thresh, angle=0, pen=pen_high, movable=True,
+                                             label='Up Thresh: {value:.0f}°', labelOpts={'position': 0.95})
+            self.plot_item.addItem(self.high_line)
 
             # Línea para el umbral inferior (rojo)
             pen_low = pg.mkPen(color=(215, 60, 60), style=pg.QtCore.Qt.DashLine)
-            low_line = pg.InfiniteLine(pos=low_thresh, angle=0, pen=pen_low, label=f'Down Thresh: {low_thresh}°')
-            self.plot_item.addItem(low_line)
+            self.low_line = pg.InfiniteLine(pos=low_thresh, angle=0, pen=pen_low, movable=True,
+                                            label='Down Thresh: {value:.0f}°', labelOpts={'position': 0.95})
+            self.plot_item.addItem(self.low_line)
+
+            self._update_line_bounds()
+            self.high_line.sigPositionChanged.connect(self._on_threshold_moved)
+            self.low_line.sigPositionChanged.connect(self._on_threshold_moved)
 
             logger.info(f"Gráfico actualizado con la columna '{y_series.name}' y umbrales.")
         else:
             self.plot_item.setTitle("Datos de ángulo no disponibles", color="r", size="12pt")
             logger.warning("No se encontraron columnas de ángulo o de frame para dibujar.")
 
+    def thresholds(self) -> tuple[float, float] | None:
+        """Posición actual de las líneas (superior, inferior), o None si no hay gráfico."""
+        if self.high_line is None or self.low_line is None:
+            return None
+        return float(self.high_line.value()), float(self.low_line.value())
+
+    def _update_line_bounds(self):
+        # El umbral inferior nunca puede superar al superior
+        self.high_line.setBounds([self.low_line.value(), 180])
+        self.low_line.setBounds([0, self.high_line.value()])
+
+    def _on_threshold_moved(self, _line):
+        self._update_line_bounds()
+        self.thresholds_changed.emit(*self.thresholds())
+
     def clear_plots(self):
-        self.plot_item.clear()
\ No newline at end of file
+        self.plot_item.clear()
+        self.high_line = None
+        self.low_line = None
@@ -1,6 +1,7 @@
 # src/gui/widgets/results_panel.py
 
 import logging
+import time
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QListWidget, QFrame
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QFont
@@ -8,12 +9,16 @@ from PyQt5.QtGui import QFont
 from .video_player import VideoPlayerWidget
 from .plot_widget import PlotWidget
 from src.gui.gui_utils import get_first_available_series
+from src.pipeline import count_from_metrics
 
 logger = logging.getLogger(__name__)
 
 class ResultsPanel(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
+        # Métricas y umbrales del último análisis: permiten recontar sin reprocesar el vídeo
+        self.df_metrics = None
+        self.thresholds = {}
         self.init_ui()
 
     def init_ui(self):
@@ -42,6 +47,7 @@ class ResultsPanel(QWidget):
         right_column_layout.addLayout(top_layout)
 
         self.plot_widget = PlotWidget(self)
+        self.plot_widget.thresholds_changed.connect(self._recount)
         right_column_layout.addWidget(self.plot_widget)
         
         faults_label = QLabel("Fallos Detectados:")
@@ -72,23 +78,43 @@ class ResultsPanel(QWidget):
         
         df = results.get("dataframe_metricas")
         if df is None or df.empty:
+            self.df_metrics = None
             self.status_label.setText("Estado: No se generaron métricas.")
             self.plot_widget.clear_plots()
             self.fault_list.clear(); self.fault_list.addItem("Análisis no completado.")
             return
 
+        self.df_metrics = df
+        self.thresholds = dict(results.get("umbrales") or {})
         self.status_label.setText("Estado: Análisis completado.")
-        self.plot_widget.plot_data(df)
+        self.plot_widget.plot_data(df, self.thresholds.get('high_thresh'), self.thresholds.get('low_thresh'))
+        self._show_faults(results.get("fallos_detectados", []))
 
+    def _show_faults(self, faults):
         self.fault_list.clear()
-        faults = results.get("fallos_detectados", [])
         if not faults:
             self.fault_list.addItem("¡No se detectaron fallos!")
         else:
             for fault in faults:
                 self.fault_list.addItem(f"Rep {fault['rep']}: {fault['type']} ({fault['value']})")
 
+    def _recount(self, high_thresh: float, low_thresh: float):
+        """Recuenta con los umbrales de las líneas arrastradas, sobre las métricas en memoria."""
+        if self.df_metrics is None:
+            return
+        self.thresholds.update(high_thresh=high_thresh, low_thresh=low_thresh)
+        start = time.perf_counter()
+        counting = count_from_metrics(self.df_metrics, self.thresholds)
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+
+        self.rep_counter.setText(str(counting["repeticiones_contadas"]))
+        self._show_faults(counting["fallos_detectados"])
+        self.status_label.setText(f"Estado: Recontado con umbrales {high_thresh:.0f}°/{low_thresh:.0f}° "
+                                  f"({elapsed_ms:.1f} ms).")
+
     def clear_results(self):
+        self.df_metrics = None
+        self.thresholds = {}
         self.rep_counter.setText("0")
         self.status_label.setText("Listo para analizar")
         self.plot_widget.clear_plots()
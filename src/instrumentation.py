@@ -0,0 +1,131 @@
+# src/instrumentation.py
+"""
+Instrumentación del pipeline: tiempo de reloj, tiempo de CPU, fotogramas y
+fotogramas/s de cada fase, y percentiles de la latencia de inferencia por
+fotograma.
+
+El tiempo de CPU se mide con time.thread_time() en el hilo que ejecuta cada
+fase, así que las etapas en hilos (decodificación, escritura del vídeo) se
+miden por separado aunque se solapen con la inferencia. La estimación de pose
+se mide con la CPU de todo el proceso (MediaPipe usa hilos internos) menos la
+de esas etapas. La CPU de los procesos hijos (ParallelPoseEstimator) no se
+incluye.
+
+El resumen incluye las versiones de MediaPipe, OpenCV y NumPy para poder
+comparar ejecuciones antes y después de actualizar dependencias.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from importlib import metadata
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_VERSIONED_PACKAGES = ('mediapipe', 'opencv-python', 'numpy', 'pandas', 'scipy')
+
+
+def latency_percentiles(latencies_ms) -> dict:
+    """Percentiles p50/p90/p99 y máximo de una lista de latencias (ms)."""
+    if len(latencies_ms) == 0:
+        return {'p50': None, 'p90': None, 'p99': None, 'max': None}
+    p50, p90, p99 = np.percentile(latencies_ms, [50, 90, 99])
+    return {'p50': float(p50), 'p90': float(p90), 'p99': float(p99), 'max': float(np.max(latencies_ms))}
+
+
+def package_versions() -> dict:
+    versions = {}
+    for package in _VERSIONED_PACKAGES:
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    return versions
+
+
+class PipelineProfiler:
+    """
+    Acumula por fase el tiempo de reloj y de CPU y los fotogramas procesados.
+    Es seguro entre hilos: varias etapas pueden registrar a la vez.
+    """
+    def __init__(self):
+        self._stages: dict[str, dict] = {}
+        self._latencies: dict[str, list[float]] = {}
+        self._lock = threading.Lock()
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+
+    def add(self, stage: str, wall_s: float, cpu_s: float = 0.0, frames: int = 0):
+        with self._lock:
+            entry = self._stages.setdefault(stage, {'wall_s': 0.0, 'cpu_s': 0.0, 'fotogramas': 0})
+            entry['wall_s'] += wall_s
+            entry['cpu_s'] += cpu_s
+            entry['fotogramas'] += frames
+
+    def totals(self, stage: str) -> tuple[float, float]:
+        """(wall_s, cpu_s) acumulados hasta ahora en la fase."""
+        with self._lock:
+            entry = self._stages.get(stage, {'wall_s': 0.0, 'cpu_s': 0.0})
+            return entry['wall_s'], entry['cpu_s']
+
+    @contextmanager
+    def stage(self, stage: str, frames: int = 0):
+        """Mide el bloque 'with' como una ejecución de la fase."""
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - wall, time.thread_time() - cpu, frames)
+
+    def timed_iter(self, stage: str, iterable):
+        """Itera 'iterable' midiendo cada next() como un fotograma de la fase (en el hilo que itera)."""
+        iterator = iter(iterable)
+        wall = cpu = 0.0
+        frames = 0
+        try:
+            while True:
+                t0, c0 = time.perf_counter(), time.thread_time()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    wall += time.perf_counter() - t0
+                    cpu += time.thread_time() - c0
+                frames += 1
+                yield item
+        finally:
+            self.add(stage, wall, cpu, frames)
+
+    def timed(self, stage: str, func):
+        """Envuelve una función para que cada llamada cuente como un fotograma de la fase."""
+        def wrapper(*args, **kwargs):
+            t0, c0 = time.perf_counter(), time.thread_time()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add(stage, time.perf_counter() - t0, time.thread_time() - c0, 1)
+        return wrapper
+
+    def record_latency(self, name: str, latency_ms: float):
+        with self._lock:
+            self._latencies.setdefault(name, []).append(latency_ms)
+
+    def summary(self) -> dict:
+        """Resumen serializable en JSON."""
+        with self._lock:
+            stages = {name: dict(entry) for name, entry in self._stages.items()}
+            latencies = {name: list(values) for name, values in self._latencies.items()}
+        for entry in stages.values():
+            entry['fps'] = entry['fotogramas'] / entry['wall_s'] if entry['fotogramas'] and entry['wall_s'] > 0 else None
+        return {
+            'fases': stages,
+            'latencias_ms': {name: {**latency_percentiles(values), 'n': len(values)}
+                             for name, values in latencies.items()},
+            'total_wall_s': time.perf_counter() - self._wall_start,
+            'total_cpu_s': time.process_time() - self._cpu_start,
+            'versiones': package_versions(),
+        }
+
@@ -0,0 +1,248 @@
+# src/live.py
+"""
+Análisis en vivo desde una cámara (índice de dispositivo) o un stream (URL).
+
+Un hilo de captura lee sin parar y conserva SOLO el fotograma más reciente:
+si la inferencia se retrasa, los fotogramas intermedios se sobrescriben en
+lugar de encolarse, y los que superan el presupuesto de latencia se descartan.
+Cada fotograma analizado alimenta un StreamingRepCounter, de modo que las
+repeticiones y los fallos se notifican en cuanto se confirman.
+
+Para probarlo sin cámara, un vídeo grabado se reproduce a ritmo real
+(realtime=True, por defecto con ficheros).
+
+Uso:
+    python -m src.live --source 0 [--latency-budget-ms 250] [--duration 60]
+    python -m src.live --source grabacion.mp4 --model-complexity 1
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from src import config
+from src.B_pose_estimation.estimators import BaseEstimator, BlazePose3DEstimator
+from src.D_modeling.analysis_3d import knee_angle_3d
+from src.D_modeling.count_reps import StreamingRepCounter
+from src.instrumentation import latency_percentiles
+
+logger = logging.getLogger(__name__)
+
+
+class LatestFrameGrabber:
+    """
+    Hilo de captura que guarda únicamente el último fotograma leído, con su
+    índice y el instante de captura. get() entrega cada fotograma una sola vez.
+    'clock' y 'sleep' marcan el ritmo real (se sustituyen en las pruebas).
+    """
+    def __init__(self, source, realtime: bool | None = None, clock=time.perf_counter, sleep=time.sleep):
+        self.source = source
+        self._clock = clock
+        self._sleep = sleep
+        self._capture = cv2.VideoCapture(source)
+        if not self._capture.isOpened():
+            raise IOError(f"No se pudo abrir la fuente de vídeo: {source}")
+        fps = self._capture.get(cv2.CAP_PROP_FPS)
+        self.fps = fps if fps and fps > 0 else 30.0
+        # Los ficheros se leen tan rápido como se decodifican: los pausamos a ritmo real
+        self.realtime = isinstance(source, str) and os.path.isfile(source) if realtime is None else realtime
+        self.frames_captured = 0
+        self.frames_overwritten = 0
+        self._latest = None
+        self._finished = False
+        self._stop = threading.Event()
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="capture", daemon=True)
+
+    def start(self) -> "LatestFrameGrabber":
+        self._thread.start()
+        return self
+
+    def _run(self):
+        start = self._clock()
+        try:
+            while not self._stop.is_set():
+                ok, frame = self._capture.read()
+                if not ok:
+                    break
+                if self.realtime:
+                    delay = start + self.frames_captured / self.fps - self._clock()
+                    if delay > 0:
+                        self._sleep(delay)
+                with self._cond:
+                    if self._latest is not None:
+                        self.frames_overwritten += 1
+                    self._latest = (self.frames_captured, self._clock(), frame)
+                    self.frames_captured += 1
+                    self._cond.notify()
+        finally:
+            with self._cond:
+                self._finished = True
+                self._cond.notify()
+
+    def get(self, timeout: float = 1.0):
+        """Devuelve (frame_idx, instante de captura, fotograma), o None si la fuente ha terminado."""
+        with self._cond:
+            while self._latest is None:
+                if self._finished:
+                    return None
+                self._cond.wait(timeout)
+            item, self._latest = self._latest, None
+            return item
+
+    def wait_finished(self, timeout: float | None = None) -> bool:
+        """Espera a que la fuente se agote; devuelve False si vence el timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._finished, timeout)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self._capture.release()
+
+
+class LiveAnalyzer:
+    """
+    Cuenta repeticiones en vivo con BlazePose3DEstimator (que ya hace tracking
+    entre fotogramas) y un contador incremental.
+
+    on_event recibe cada evento del StreamingRepCounter ('repeticion' o 'fallo')
+    en cuanto se confirma. run() termina al acabarse la fuente, al alcanzar
+    max_frames/duration_s o al llamar a stop() desde otro hilo.
+
+    'clock' mide latencias y duración y se pasa al capturador, que se crea con
+    grabber_factory(source, realtime=..., clock=...); las pruebas sustituyen
+    ambos para decidir qué fotogramas se descartan sin depender del reloj real.
+    """
+    def __init__(self, estimator: BaseEstimator | None = None,
+                 up_thresh: float = config.SQUAT_HIGH_THRESH,
+                 down_thresh: float = config.SQUAT_LOW_THRESH,
+                 depth_fail_thresh: float = config.DEPTH_FAIL_THRESH,
+                 latency_budget_ms: float = config.LIVE_LATENCY_BUDGET_MS,
+                 model_complexity: int = config.LIVE_MODEL_COMPLEXITY,
+                 on_event=None, clock=time.perf_counter, grabber_factory=LatestFrameGrabber):
+        self._owns_estimator = estimator is None
+        self.estimator = estimator or BlazePose3DEstimator(model_complexity=model_complexity)
+        self.counter = StreamingRepCounter(up_thresh, down_thresh, depth_fail_thresh)
+        self.latency_budget_ms = latency_budget_ms
+        self.on_event = on_event
+        self.clock = clock
+        self.grabber_factory = grabber_factory
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self, source, realtime: bool | None = None, max_frames: int | None = None,
+            duration_s: float | None = None) -> dict:
+        self._stop.clear()
+        self.estimator.reset()
+        self.counter.reset()
+        events, latencies = [], []
+        stale = processed = 0
+        grabber = self.grabber_factory(source, realtime=realtime, clock=self.clock).start()
+        logger.info(f"Análisis en vivo iniciado sobre {source} (presupuesto de latencia "
+                    f"{self.latency_budget_ms} ms).")
+        started = self.clock()
+        try:
+            while not self._stop.is_set():
+                if duration_s is not None and self.clock() - started >= duration_s:
+                    break
+                if max_frames is not None and processed >= max_frames:
+                    break
+                item = grabber.get()
+                if item is None:
+                    break
+                frame_idx, captured_at, frame = item
+                if (self.clock() - captured_at) * 1000.0 > self.latency_budget_ms:
+                    stale += 1
+                    continue
+
+                result = self.estimator.estimate(frame)
+                angle = knee_angle_3d(result.world_landmarks) if result.world_landmarks is not None else np.nan
+                for event in self.counter.push(angle, frame_idx):
+                    event['t_s'] = frame_idx / grabber.fps
+                    events.append(event)
+                    if self.on_event:
+                        self.on_event(event)
+                latencies.append((self.clock() - captured_at) * 1000.0)
+                processed += 1
+        except KeyboardInterrupt:
+            logger.info("Análisis en vivo interrumpido por el usuario.")
+        finally:
+            grabber.stop()
+        elapsed = self.clock() - started
+
+        summary = {
+            'repeticiones_contadas': self.counter.count,
+            'fallos_detectados': [{k: v for k, v in e.items() if k not in ('evento', 't_s')}
+                                  for e in events if e['evento'] == 'fallo'],
+            'eventos': events,
+            'fotogramas_capturados': grabber.frames_captured,
+            'fotogramas_procesados': processed,
+            'fotogramas_descartados': grabber.frames_captured - processed,
+            'descartados_por_latencia': stale,
+            'fps_procesado': processed / elapsed if elapsed > 0 else 0.0,
+            'latencia_ms': latency_percentiles(latencies),
+        }
+        logger.info(f"Análisis en vivo terminado: {summary['repeticiones_contadas']} repeticiones, "
+                    f"{processed}/{grabber.frames_captured} fotogramas analizados.")
+        return summary
+
+    def close(self):
+        if self._owns_estimator:
+            self.estimator.close()
+
+
+def _parse_source(source: str):
+    """Un número se interpreta como índice de cámara; lo demás, como fichero o URL."""
+    return int(source) if source.isdigit() else source
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--source', required=True, help="Índice de cámara, URL del stream o vídeo grabado")
+    parser.add_argument('--latency-budget-ms', type=float, default=config.LIVE_LATENCY_BUDGET_MS)
+    parser.add_argument('--low-thresh', type=float, default=config.SQUAT_LOW_THRESH)
+    parser.add_argument('--high-thresh', type=float, default=config.SQUAT_HIGH_THRESH)
+    parser.add_argument('--depth-fail-thresh', type=float, default=config.DEPTH_FAIL_THRESH)
+    parser.add_argument('--model-complexity', type=int, default=config.LIVE_MODEL_COMPLEXITY, choices=(0, 1, 2))
+    parser.add_argument('--duration', type=float, help="Segundos de análisis (por defecto, hasta agotar la fuente)")
+    parser.add_argument('--no-realtime', action='store_true',
+                        help="Con un fichero, leerlo a la velocidad de decodificación en vez de a ritmo real")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    def print_event(event):
+        if event['evento'] == 'repeticion':
+            print(f"[{event['t_s']:7.2f}s] Repetición {event['rep']} (ángulo mínimo {event['angulo_minimo']:.1f}°)")
+        else:
+            print(f"[{event['t_s']:7.2f}s] Fallo en la repetición {event['rep']}: {event['type']} ({event['value']})")
+
+    analyzer = LiveAnalyzer(
+        up_thresh=args.high_thresh,
+        down_thresh=args.low_thresh,
+        depth_fail_thresh=args.depth_fail_thresh,
+        latency_budget_ms=args.latency_budget_ms,
+        model_complexity=args.model_complexity,
+        on_event=print_event,
+    )
+    try:
+        summary = analyzer.run(_parse_source(args.source),
+                               realtime=False if args.no_realtime else None,
+                               duration_s=args.duration)
+    finally:
+        analyzer.close()
+    summary.pop('eventos')
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -1,22 +1,37 @@
 # src/pipeline.py
 
+import json
 import logging
 import os
+import time
+from collections import deque
 
+import numpy as np
 import pandas as pd
-import cv2
 
 from src import config
-from src.A_preprocessing.frame_extraction import extract_and_preprocess_frames
-from src.F_visualization.video_renderer import render_landmarks_on_video_hq
+from src.A_preprocessing.frame_extraction import VideoFrameStream, resolve_decode_mode
+from src.E_storage.columnar import write_session_outputs
+from src.E_storage.landmark_cache import LandmarkCache, hash_video_file, make_cache_key
+from src.E_storage.landmark_store import LandmarkStore
+from src.E_storage.session_catalog import SessionCatalog, catalog_path_for
+from src.F_visualization.video_renderer import DebugVideoWriter, draw_pose_landmarks
+from src.instrumentation import PipelineProfiler
+from src.threaded_stages import PrefetchIterator, ThreadedSink
 
 from src.B_pose_estimation.estimators import (
     BaseEstimator,
+    PoseEstimator,
     CroppedPoseEstimator,
     BlazePose3DEstimator,
-    EstimationResult
+    EstimationResult,
+    SessionLandmarks
 )
+from src.B_pose_estimation.estimator_pool import get_estimator_pool
+from src.B_pose_estimation.parallel import ParallelPoseEstimator, resolve_worker_count
+from src.B_pose_estimation.replay import ReplayEstimator, save_recording
 from src.B_pose_estimation.processing import (
+    landmarks_to_dataframe,
     filter_and_interpolate_landmarks,
     calculate_metrics_from_sequence
 )
@@ -32,21 +47,403 @@ except ImportError:
 logger = logging.getLogger(__name__)
 
 
-def build_estimator() -> BaseEstimator:
+def build_estimator(settings: dict | None = None) -> BaseEstimator:
     """
     Fábrica de estimadores: devuelve BlazePose3DEstimator si USE_3D_ANALYSIS=True,
-    o CroppedPoseEstimator en caso contrario.
+    o un estimador 2D (CroppedPoseEstimator o PoseEstimator según settings['use_crop'])
+    en caso contrario. Con settings['workers'] > 1 el estimador 2D se reparte
+    entre varios procesos (ParallelPoseEstimator). Con settings['replay_landmarks']
+    (ruta de una grabación) se devuelve un ReplayEstimator, sin MediaPipe.
     """
+    settings = settings or {}
+    if settings.get('replay_landmarks'):
+        return ReplayEstimator(settings['replay_landmarks'])
     if config.USE_3D_ANALYSIS:
+        if resolve_worker_count(settings.get('workers', config.POSE_WORKERS)) > 1:
+            logger.warning("BlazePose3DEstimator hace tracking entre fotogramas; se ignora 'workers'.")
         return BlazePose3DEstimator()
+
+    estimator_cls = CroppedPoseEstimator if settings.get('use_crop', config.DEFAULT_USE_CROP) else PoseEstimator
+    estimator_kwargs = {}
+    workers = resolve_worker_count(settings.get('workers', config.POSE_WORKERS))
+    if estimator_cls is CroppedPoseEstimator:
+        if workers > 1 and settings.get('track_roi', config.TRACK_ROI):
+            logger.warning("El seguimiento del ROI necesita el fotograma anterior; con 'workers' > 1 se desactiva.")
+        estimator_kwargs['track_roi'] = _effective_track_roi(settings, workers)
+    if workers > 1:
+        return ParallelPoseEstimator(estimator_cls, workers=workers, **estimator_kwargs)
+    return estimator_cls(**estimator_kwargs)
+
+
+def _effective_track_roi(settings: dict, workers: int) -> bool:
+    # Los procesos del pool reciben bloques no consecutivos: no hay "fotograma anterior"
+    return workers == 1 and settings.get('track_roi', config.TRACK_ROI)
+
+
+def estimator_pool_key(settings: dict | None = None) -> tuple:
+    """
+    Clave del pool de estimadores: identifica el estimador que build_estimator
+    construiría con estos settings y la configuración de modelo vigente. Los
+    ReplayEstimator no pasan por el pool (ver _estimate_session).
+    """
+    settings = settings or {}
+    if config.USE_3D_ANALYSIS:
+        return ('BlazePose3DEstimator',)
+    use_crop = settings.get('use_crop', config.DEFAULT_USE_CROP)
+    workers = resolve_worker_count(settings.get('workers', config.POSE_WORKERS))
+    key = ('CroppedPoseEstimator' if use_crop else 'PoseEstimator',
+           config.MODEL_COMPLEXITY, config.MIN_DETECTION_CONFIDENCE, workers)
+    if use_crop:
+        key += (_effective_track_roi(settings, workers),)
+    return key
+
+
+def summarize_roi_tracking(estimation_results: list[EstimationResult]) -> dict:
+    """Cuenta cuántas veces hizo falta la detección sobre la imagen completa."""
+    n_frames = len(estimation_results)
+    redetections = sum(1 for res in estimation_results if res.roi_redetected)
+    return {
+        "fotogramas": n_frames,
+        "redetecciones": redetections,
+        "tasa_redeteccion": redetections / n_frames if n_frames else 0.0,
+    }
+
+
+def _run_pose_estimation(video_path: str, settings: dict, estimator: BaseEstimator,
+                         debug_video_path: str | None, notify, profiler: PipelineProfiler | None = None):
+    """
+    FASES 1 y 2: decodifica el vídeo en streaming y estima la pose de cada fotograma.
+
+    En modo segmentado (settings['pipelined'], por defecto config.PIPELINED_EXECUTION)
+    la decodificación y la escritura del vídeo de depuración corren en hilos propios,
+    conectados al bucle de inferencia por colas acotadas de config.PIPELINE_QUEUE_SIZE.
+
+    El perfilador registra las fases 'extraccion', 'estimacion_pose' y 'render_video',
+    y la latencia 'inferencia' de cada fotograma (de su entrega al estimador a su resultado).
+
+    Con un ReplayEstimator, si no hay que conservar ni anotar fotogramas, el vídeo
+    no se decodifica: los resultados grabados no dependen de la imagen.
+
+    Devuelve (resultados de estimación, fps, fotogramas retenidos o None).
+    """
+    pipelined = settings.get('pipelined', config.PIPELINED_EXECUTION)
+    queue_size = settings.get('pipeline_queue_size', config.PIPELINE_QUEUE_SIZE)
+    keep_frames = settings.get('keep_frames', False)
+    kept_frames = [] if keep_frames else None
+    estimation_results: list[EstimationResult] = []
+    profiler = profiler or PipelineProfiler()
+
+    def report_progress(idx: int, total_frames: int):
+        # Reportar cada ~10% de los fotogramas
+        if total_frames > 0 and idx % max(1, total_frames // 10) == 0:
+            prog = 15 + int(60 * min(idx, total_frames) / total_frames)
+            notify(prog, f"Procesando frame {idx+1}/{total_frames}...")
+
+    notify(5, "FASE 1: Abriendo el vídeo y preparando la extracción de fotogramas...")
+    transport = settings.get('frame_transport', config.FRAME_TRANSPORT)
+    if transport == 'shared_memory' and isinstance(estimator, ParallelPoseEstimator):
+        if keep_frames or debug_video_path:
+            logger.warning("El transporte por memoria compartida no conserva los fotogramas; "
+                           "se decodifica en este proceso para generar el vídeo de depuración.")
+        else:
+            # Decodificador en un proceso aparte y fotogramas por memoria compartida
+            fps, total_frames, results = estimator.estimate_video(
+                video_path,
+                sample_rate=settings.get('sample_rate', 1),
+                rotate=settings.get('rotate'),
+                decode_mode=settings.get('decode_mode', config.FRAME_DECODE_MODE),
+                profiler=profiler,
+            )
+            notify(15, "FASE 2: Estimando pose en los fotogramas (memoria compartida)...")
+            # La decodificación va en otro proceso: no hay que descontar su tiempo del bucle
+            loop_wall, loop_cpu = time.perf_counter(), time.process_time()
+            for idx, result in enumerate(results):
+                report_progress(idx, total_frames)
+                estimation_results.append(result)
+            profiler.add('estimacion_pose', time.perf_counter() - loop_wall, time.process_time() - loop_cpu,
+                         len(estimation_results))
+            return estimation_results, fps, None
+
+    if isinstance(estimator, ReplayEstimator) and not (keep_frames or debug_video_path):
+        # Los resultados grabados no dependen de la imagen: no hace falta decodificar el vídeo
+        notify(15, "FASE 2: Reproduciendo landmarks grabados (sin decodificar el vídeo)...")
+        with profiler.stage('estimacion_pose', len(estimator)):
+            estimation_results = list(estimator.estimate_many([None] * len(estimator)))
+        return estimation_results, estimator.fps, None
+
+    with VideoFrameStream(
+        video_path=video_path,
+        rotate=settings.get('rotate'),
+        sample_rate=settings.get('sample_rate', 1),
+        decode_mode=settings.get('decode_mode', config.FRAME_DECODE_MODE),
+    ) as frame_stream:
+        fps = frame_stream.fps
+        total_frames = frame_stream.expected_frames
+
+        # La decodificación se mide en el hilo que la ejecuta (el productor si hay prefetch)
+        timed_stream = profiler.timed_iter('extraccion', frame_stream)
+        frames = PrefetchIterator(timed_stream, queue_size, name="decode") if pipelined else timed_stream
+        debug_writer = DebugVideoWriter(debug_video_path, fps) if debug_video_path else None
+        writer_sink = None
+        write_debug = None
+        # Fotogramas ya entregados al estimador cuyo resultado aún no ha salido
+        # (con el pool en paralelo puede haber varios bloques en vuelo)
+        awaiting_frames = deque()
+        handed_at = deque()  # Instante en que cada fotograma en vuelo se entregó al estimador
+        if debug_writer is not None:
+            def annotate_and_write(item):
+                frame, result = item
+                # Si se conservan los fotogramas, no dibujamos sobre ellos
+                debug_writer.write(draw_pose_landmarks(frame, result.landmarks, result.crop_box,
+                                                       copy=keep_frames))
+            annotate_and_write = profiler.timed('render_video', annotate_and_write)
+
+            if pipelined:
+                # La anotación se hace en el hilo del writer, fuera del bucle de inferencia
+                writer_sink = ThreadedSink(annotate_and_write, queue_size, name="encode")
+                write_debug = writer_sink.put
+            else:
+                write_debug = annotate_and_write
+
+        def counted_frames():
+            for idx, frame in enumerate(frames):
+                report_progress(idx, total_frames)
+                if keep_frames:
+                    kept_frames.append(frame)
+                if write_debug is not None:
+                    awaiting_frames.append(frame)
+                handed_at.append(time.perf_counter())
+                yield frame
+
+        notify(15, "FASE 2: Estimando pose en los fotogramas...")
+        other_stages = ('extraccion', 'render_video')
+        before = [profiler.totals(stage) for stage in other_stages]
+        # CPU de todo el proceso: MediaPipe infiere en sus propios hilos internos
+        loop_wall, loop_cpu = time.perf_counter(), time.process_time()
+        try:
+            for result in estimator.estimate_many(counted_frames()):
+                profiler.record_latency('inferencia', (time.perf_counter() - handed_at.popleft()) * 1000.0)
+                if write_debug is not None:
+                    write_debug((awaiting_frames.popleft(), result))
+                estimation_results.append(result)
+            loop_wall, loop_cpu = time.perf_counter() - loop_wall, time.process_time() - loop_cpu
+            # Se descuenta lo que las otras etapas gastaron mientras tanto (y, sin hilos, su tiempo de reloj)
+            for (wall_before, cpu_before), stage in zip(before, other_stages):
+                wall_after, cpu_after = profiler.totals(stage)
+                loop_cpu -= cpu_after - cpu_before
+                if not pipelined:
+                    loop_wall -= wall_after - wall_before
+            profiler.add('estimacion_pose', loop_wall, max(loop_cpu, 0.0), len(estimation_results))
+            if writer_sink is not None:
+                writer_sink.close()
+        finally:
+            if pipelined:
+                frames.close()
+            if writer_sink is not None:
+                writer_sink.abort()
+            if debug_writer is not None:
+                with profiler.stage('render_video'):
+                    debug_writer.release()
+
+    return estimation_results, fps, kept_frames
+
+
+def landmark_cache_params(settings: dict) -> dict:
+    """Ajustes que cambian los landmarks estimados y, por tanto, forman parte de la clave de la caché."""
+    sample_rate = settings.get('sample_rate', 1)
+    stride = max(1, int(sample_rate))
+    decode_mode = resolve_decode_mode(settings.get('decode_mode', config.FRAME_DECODE_MODE), stride)
+    params = {
+        'rotate': settings.get('rotate'),
+        'sample_rate': sample_rate,
+        # 'read' y 'grab' recorren el vídeo en orden y entregan los mismos fotogramas;
+        # 'seek' salta, y su precisión depende del códec: puede entregar otros
+        'decode_mode': 'seek' if decode_mode == 'seek' and stride > 1 else 'secuencial',
+    }
+    if config.USE_3D_ANALYSIS:
+        params.update(estimator='BlazePose3DEstimator', model_complexity=2)
+        return params
+    use_crop = settings.get('use_crop', config.DEFAULT_USE_CROP)
+    params.update(
+        estimator='CroppedPoseEstimator' if use_crop else 'PoseEstimator',
+        model_complexity=config.MODEL_COMPLEXITY,
+        min_detection_confidence=config.MIN_DETECTION_CONFIDENCE,
+    )
+    if use_crop:
+        workers = resolve_worker_count(settings.get('workers', config.POSE_WORKERS))
+        params['track_roi'] = _effective_track_roi(settings, workers)
+    return params
+
+
+def landmark_cache_dir(settings: dict) -> str:
+    """settings['cache_dir']; si no, dentro de settings['output_dir'] o, sin él, config.LANDMARK_CACHE_DEFAULT_DIR."""
+    if settings.get('cache_dir'):
+        return settings['cache_dir']
+    if settings.get('output_dir'):
+        return os.path.join(settings['output_dir'], config.LANDMARK_CACHE_DIRNAME)
+    return config.LANDMARK_CACHE_DEFAULT_DIR
+
+
+def _estimate_session(video_path: str, settings: dict, debug_video_path: str | None, notify,
+                      profiler: PipelineProfiler):
+    """
+    Obtiene el estimador, ejecuta las fases 1 y 2 y devuelve (SessionLandmarks, roi_stats, fotogramas).
+    Con settings['reuse_estimator'] el estimador sale del pool del proceso y vuelve a él al terminar.
+    """
+    def create_estimator():
+        # Solo se mide cuando hay que construirlo (no cuando sale caliente del pool)
+        with profiler.stage('carga_estimador'):
+            return build_estimator(settings)
+
+    # Una reproducción no tiene modelo que mantener caliente, y la grabación puede
+    # haberse reescrito desde el último análisis: se lee siempre de nuevo
+    reuse = settings.get('reuse_estimator', config.REUSE_ESTIMATORS) and not settings.get('replay_landmarks')
+    if reuse:
+        with get_estimator_pool().lease(estimator_pool_key(settings), create_estimator) as estimator:
+            estimation_results, fps, kept_frames = _run_pose_estimation(
+                video_path, settings, estimator, debug_video_path, notify, profiler
+            )
+    else:
+        estimator = create_estimator()
+        try:
+            estimation_results, fps, kept_frames = _run_pose_estimation(
+                video_path, settings, estimator, debug_video_path, notify, profiler
+            )
+        finally:
+            estimator.close()
+            logger.info("Estimator cerrado correctamente.")
+    if not estimation_results:
+        raise ValueError("No se pudieron extraer fotogramas del vídeo.")
+
+    roi_stats = None
+    if not config.USE_3D_ANALYSIS and settings.get('use_crop', config.DEFAULT_USE_CROP):
+        roi_stats = summarize_roi_tracking(estimation_results)
+        logger.info(f"Detección completa en {roi_stats['redetecciones']}/{roi_stats['fotogramas']} fotogramas.")
+
+    # Tensores (T, 33, 4) de la sesión: es lo que consumen todas las fases siguientes
+    return SessionLandmarks.from_results(estimation_results, fps), roi_stats, kept_frames
+
+
+def _replay_cached_frames(video_path: str, settings: dict, session: SessionLandmarks,
+                          debug_video_path: str | None, notify, profiler: PipelineProfiler):
+    """
+    Con landmarks de la caché solo se decodifica el vídeo si hace falta: para el
+    vídeo de depuración (dibujando los landmarks guardados) o para 'keep_frames'.
+    """
+    keep_frames = settings.get('keep_frames', False)
+    kept_frames = [] if keep_frames else None
+    debug_writer = DebugVideoWriter(debug_video_path, session.fps) if debug_video_path else None
+    notify(15, "FASE 1: Decodificando el vídeo (landmarks recuperados de la caché)...")
+
+    def draw_and_write(idx, frame):
+        crop_box = session.crop_boxes[idx]
+        debug_writer.write(draw_pose_landmarks(
+            frame, session.landmarks[idx],
+            None if np.isnan(crop_box).any() else crop_box,
+            copy=keep_frames,
+        ))
+    draw_and_write = profiler.timed('render_video', draw_and_write)
+
+    try:
+        with VideoFrameStream(
+            video_path=video_path,
+            rotate=settings.get('rotate'),
+            sample_rate=settings.get('sample_rate', 1),
+            decode_mode=settings.get('decode_mode', config.FRAME_DECODE_MODE),
+        ) as frame_stream:
+            for idx, frame in zip(range(len(session)), profiler.timed_iter('extraccion', frame_stream)):
+                if keep_frames:
+                    kept_frames.append(frame)
+                if debug_writer is not None:
+                    draw_and_write(idx, frame)
+    finally:
+        if debug_writer is not None:
+            debug_writer.release()
+    return kept_frames
+
+
+def counting_thresholds(settings: dict | None = None) -> dict:
+    """Umbrales de conteo de los settings, con los valores de config por defecto."""
+    settings = settings or {}
+    return {
+        'high_thresh': settings.get('high_thresh', config.SQUAT_HIGH_THRESH),
+        'low_thresh': settings.get('low_thresh', config.SQUAT_LOW_THRESH),
+        'depth_fail_thresh': settings.get('depth_fail_thresh', config.DEPTH_FAIL_THRESH),
+    }
+
+
+def count_from_metrics(df_metrics: pd.DataFrame, settings: dict | None = None) -> dict:
+    """
+    Fase de conteo aislada: cuenta repeticiones y fallos sobre un DataFrame de
+    métricas ya calculado, sin tocar el vídeo ni el estimador. Tarda milisegundos,
+    así que la GUI la usa para recontar al mover los umbrales.
+
+    Devuelve las claves de conteo del resultado del pipeline, más "umbrales".
+    """
+    thresholds = counting_thresholds(settings)
+    if config.USE_3D_ANALYSIS:
+        n_reps, faults_detected, rep_details = count_reps_3d(
+            df_metrics,
+            up_thresh=thresholds['high_thresh'],
+            down_thresh=thresholds['low_thresh'],
+            depth_fail_thresh=thresholds['depth_fail_thresh'],
+        )
     else:
-        return CroppedPoseEstimator()
+        n_reps = count_repetitions_from_df(df_metrics, low_thresh=thresholds['low_thresh'])
+        faults_detected = []
+        rep_details = None  # El conteo por valles 2D no delimita inicio y fin de cada repetición
+    return {
+        "repeticiones_contadas": n_reps,
+        "fallos_detectados": faults_detected,
+        "detalle_repeticiones": rep_details,
+        "umbrales": thresholds,
+    }
+
+
+def log_performance_summary(performance: dict):
+    """Una línea de log por fase: reloj, CPU y fotogramas/s."""
+    for stage, entry in performance['fases'].items():
+        fps = f", {entry['fps']:.1f} f/s" if entry['fps'] else ""
+        logger.info(f"Rendimiento [{stage}]: {entry['wall_s'] * 1000:.1f} ms reloj, "
+                    f"{entry['cpu_s'] * 1000:.1f} ms CPU{fps}")
+    inference = performance['latencias_ms'].get('inferencia')
+    if inference and inference['n']:
+        logger.info(f"Latencia de inferencia: p50 {inference['p50']:.1f} ms, p90 {inference['p90']:.1f} ms, "
+                    f"p99 {inference['p99']:.1f} ms")
 
 
 def run_full_pipeline_in_memory(video_path: str, settings: dict, progress_callback=None):
     """
     Ejecuta el pipeline completo de análisis en memoria,
     eligiendo estimación 2D o 3D según config.USE_3D_ANALYSIS.
+
+    Los fotogramas se procesan en streaming. Si una etapa posterior necesita
+    acceso aleatorio a los fotogramas, debe activarse settings['keep_frames'],
+    y se devolverán en la clave "fotogramas" del resultado.
+
+    Con settings['use_cache'] (por defecto config.USE_LANDMARK_CACHE) los landmarks
+    se guardan en una caché en disco (settings['cache_dir'], por defecto dentro de
+    la carpeta de salida si se indica y si no en config.LANDMARK_CACHE_DEFAULT_DIR);
+    si el mismo vídeo se vuelve a analizar con los mismos ajustes de estimación,
+    se salta directamente a las métricas y al conteo.
+
+    Con settings['record_landmarks'] (ruta .npz) se graban los resultados de la
+    estimación; con settings['replay_landmarks'] se reproducen en lugar de
+    ejecutar MediaPipe (sin usar la caché), para medir o probar las fases 3 a 5.
+
+    Con settings['save_session'] o en modo depuración, las métricas y los
+    landmarks se guardan en la carpeta de la sesión en formato columnar
+    (settings['output_format'], por defecto config.SESSION_OUTPUT_FORMAT); sus
+    rutas se devuelven en "archivos_sesion".
+
+    Con settings['landmark_store'] (por defecto config.LANDMARK_STORE_DIR) los
+    landmarks se anexan al almacén de sesiones de ese directorio, una sola vez
+    por vídeo y ajustes de estimación; el id se devuelve en "sesion_almacen".
+
+    Al terminar, la sesión, sus repeticiones y sus fallos se registran en el
+    catálogo SQLite (settings['catalog_path'], por defecto en la carpeta de
+    salida; se desactiva con settings['use_catalog']=False), con el atleta de
+    settings['athlete']. El id se devuelve en "sesion_catalogo".
     """
     def notify(progress: int, message: str):
         logger.info(message)
@@ -59,107 +456,135 @@ def run_full_pipeline_in_memory(video_path: str, settings: dict, progress_callba
     session_dir = os.path.join(output_dir, base_name)
     os.makedirs(session_dir, exist_ok=True)
 
-    estimator = build_estimator()
-    try:
-        mode = '3D' if config.USE_3D_ANALYSIS else '2D'
-        notify(0, f"Inicializando pipeline en modo {mode}...")
+    mode = '3D' if config.USE_3D_ANALYSIS else '2D'
+    notify(0, f"Inicializando pipeline en modo {mode}...")
 
-        # FASE 1: extracción y rotación de fotogramas
-        notify(5, "FASE 1: Extrayendo y rotando fotogramas...")
-        original_frames, fps = extract_and_preprocess_frames(
-            video_path=video_path,
-            rotate=settings.get('rotate'),
-            sample_rate=settings.get('sample_rate', 1),
+    debug_video_path = None
+    if settings.get('generate_debug_video', False):
+        debug_video_path = os.path.join(session_dir, f"{base_name}_debug.mp4")
+
+    profiler = PipelineProfiler()
+    cache, cache_key, cached = None, None, None
+    # Los landmarks reproducidos no salen del estimador que indica la clave de la caché
+    if settings.get('use_cache', config.USE_LANDMARK_CACHE) and not settings.get('replay_landmarks'):
+        with profiler.stage('cache_landmarks'):
+            cache = LandmarkCache(landmark_cache_dir(settings))
+            cache_key = make_cache_key(hash_video_file(video_path), **landmark_cache_params(settings))
+            cached = cache.get(cache_key)
+
+    if cached is not None:
+        session_landmarks, cache_metadata = cached
+        roi_stats = cache_metadata.get('redetecciones_roi')
+        logger.info(f"Landmarks recuperados de la caché ({cache_key}): se omite la estimación de pose.")
+        kept_frames = None
+        if debug_video_path or settings.get('keep_frames', False):
+            kept_frames = _replay_cached_frames(video_path, settings, session_landmarks, debug_video_path,
+                                                notify, profiler)
+    else:
+        # FASE 1 + 2: extracción en streaming y estimación de pose fotograma a fotograma.
+        # Los fotogramas no se acumulan en memoria salvo que se pida con 'keep_frames'.
+        session_landmarks, roi_stats, kept_frames = _estimate_session(
+            video_path, settings, debug_video_path, notify, profiler
         )
-        if not original_frames:
-            raise ValueError("No se pudieron extraer fotogramas del vídeo.")
+        if cache is not None:
+            with profiler.stage('cache_landmarks'):
+                cache.put(cache_key, session_landmarks, {'video': video_path, 'redetecciones_roi': roi_stats})
+    if settings.get('record_landmarks'):
+        save_recording(settings['record_landmarks'], session_landmarks)
+    if debug_video_path:
+        logger.info(f"Vídeo de depuración guardado en: {debug_video_path}")
+    fps = session_landmarks.fps
+    n_frames = len(session_landmarks)
 
-        # FASE 2: estimación de pose
-        notify(15, "FASE 2: Estimando pose en los fotogramas...")
-        estimation_results: list[EstimationResult] = []
-        total_frames = len(original_frames)
-        for idx, frame in enumerate(original_frames):
-            # Reportar cada ~10% de los fotogramas
-            if total_frames > 0 and idx % max(1, total_frames // 10) == 0:
-                prog = 15 + int(60 * idx / total_frames)
-                notify(prog, f"Procesando frame {idx+1}/{total_frames}...")
-            result = estimator.estimate(frame)
-            estimation_results.append(result)
-
-        if config.USE_3D_ANALYSIS:
-            # --- LÓGICA PARA EL MODO 3D ---
-            notify(75, "FASE 3/4/5 (3D): Analizando métricas 3D y contando repeticiones...")
-
-            # --- CAMBIO CLAVE: Pasamos los umbrales desde settings/config ---
-            df_metrics = calculate_3d_metrics(estimation_results, fps)
-            n_reps, faults_detected = count_reps_3d(
-                df_metrics,
-                up_thresh=settings.get('high_thresh', config.SQUAT_HIGH_THRESH),
-                down_thresh=settings.get('low_thresh', config.SQUAT_LOW_THRESH),
-                depth_fail_thresh=settings.get('depth_fail_thresh', 90.0) # Umbral de fallo de profundidad
-            )
+    if config.USE_3D_ANALYSIS:
+        # --- LÓGICA PARA EL MODO 3D ---
+        notify(75, "FASE 3/4/5 (3D): Analizando métricas 3D y contando repeticiones...")
 
-        else:
-            # Lógica 2D actual
-            notify(75, "FASE 3 (2D): Filtrando e interpolando landmarks...")
-            # Reconstruir raw DataFrame 2D
-            rows = []
-            for frame_idx, res in enumerate(estimation_results):
-                if res.landmarks:
-                    row = {'frame': frame_idx}
-                    for i, lm in enumerate(res.landmarks):
-                        row.update({
-                            f"x{i}": lm['x'],
-                            f"y{i}": lm['y'],
-                            f"z{i}": lm['z'],
-                            f"vis{i}": lm['visibility'],
-                        })
-                    rows.append(row)
-            df_raw_landmarks = pd.DataFrame(rows)
+        with profiler.stage('metricas', n_frames):
+            df_metrics = calculate_3d_metrics(session_landmarks.world_landmarks, fps)
+    else:
+        # Lógica 2D actual
+        notify(75, "FASE 3 (2D): Filtrando e interpolando landmarks...")
+        with profiler.stage('filtrado', n_frames):
+            df_raw_landmarks = landmarks_to_dataframe(session_landmarks.landmarks, session_landmarks.crop_boxes)
             filtered_sequence, crop_boxes = filter_and_interpolate_landmarks(df_raw_landmarks)
 
-            notify(85, "FASE 4 (2D): Calculando métricas biomecánicas...")
+        notify(85, "FASE 4 (2D): Calculando métricas biomecánicas...")
+        with profiler.stage('metricas', n_frames):
             df_metrics = calculate_metrics_from_sequence(filtered_sequence, fps)
 
-            notify(95, "FASE 5 (2D): Contando repeticiones...")
-            n_reps = count_repetitions_from_df(
-                df_metrics,
-                low_thresh=settings.get('low_thresh', config.SQUAT_LOW_THRESH)
-            )
-            faults_detected = []
-
-        # FASE EXTRA: vídeo de depuración
-        debug_video_path = None
-        if settings.get('generate_debug_video', False):
-            notify(100, "FASE EXTRA: Renderizando vídeo de depuración...")
-            annotated_frames = [res.annotated_image for res in estimation_results]
-            height, width = annotated_frames[0].shape[:2]
-            output_path = os.path.join(session_dir, f"{base_name}_debug.mp4")
-            writer = cv2.VideoWriter(
-                output_path,
-                cv2.VideoWriter_fourcc(*'mp4v'),
-                fps,
-                (width, height)
-            )
-            for fr in annotated_frames:
-                writer.write(fr)
-            writer.release()
-            debug_video_path = output_path
-
-        # Guardado de métricas si está en modo depuración
-        if settings.get('debug_mode', False):
-            metric_file = os.path.join(session_dir, f"{base_name}_metrics.csv")
-            df_metrics.to_csv(metric_file, index=False)
-            logger.info(f"Métricas guardadas en: {metric_file}")
-
-        notify(100, "PIPELINE COMPLETADO")
-        return {
-            "repeticiones_contadas": n_reps,
-            "dataframe_metricas": df_metrics,
-            "debug_video_path": debug_video_path,
-            "fallos_detectados": faults_detected,
+        notify(95, "FASE 5 (2D): Contando repeticiones...")
+
+    with profiler.stage('conteo', n_frames):
+        counting = count_from_metrics(df_metrics, settings)
+
+    # Archivo de sesiones: los landmarks se anexan al almacén con la clave de la caché
+    store_entry = None
+    store_dir = settings.get('landmark_store', config.LANDMARK_STORE_DIR)
+    if store_dir and not settings.get('replay_landmarks'):
+        with profiler.stage('almacen_landmarks', n_frames):
+            store_key = cache_key or make_cache_key(hash_video_file(video_path), **landmark_cache_params(settings))
+            store_entry = LandmarkStore(store_dir).append(store_key, session_landmarks, {
+                'video': os.path.basename(video_path),
+                'ruta_video': os.path.abspath(video_path),
+                'modo': mode,
+                'estimador': landmark_cache_params(settings),
+                'repeticiones': counting['repeticiones_contadas'],
+            })
+
+    # Tablas de métricas y landmarks de la sesión (siempre en modo depuración)
+    session_files = None
+    if settings.get('save_session', config.SAVE_SESSION_DATA) or settings.get('debug_mode', False):
+        metadata = {
+            'video': os.path.basename(video_path),
+            'fps': fps,
+            'fotogramas': n_frames,
+            'modo': mode,
+            'rotacion': settings.get('rotate'),
+            'sample_rate': settings.get('sample_rate', 1),
+            'estimador': landmark_cache_params(settings),
+            'landmarks_reproducidos': settings.get('replay_landmarks'),
+            'umbrales': counting['umbrales'],
         }
+        with profiler.stage('escritura_datos', n_frames):
+            session_files = write_session_outputs(
+                session_dir, base_name, df_metrics, session_landmarks, metadata,
+                output_format=settings.get('output_format', config.SESSION_OUTPUT_FORMAT),
+                compression=settings.get('compression', config.PARQUET_COMPRESSION),
+            )
+        logger.info(f"Métricas y landmarks guardados en: {session_files['metrics']}, {session_files['landmarks']}")
 
-    finally:
-        estimator.close()
-        logger.info("Estimator cerrado correctamente.")
+    performance = profiler.summary()
+    performance.update(modo=mode, fotogramas=n_frames, landmarks_desde_cache=cached is not None)
+    log_performance_summary(performance)
+    if settings.get('save_performance', config.SAVE_PERFORMANCE_JSON) or settings.get('debug_mode', False):
+        performance_file = os.path.join(session_dir, f"{base_name}_rendimiento.json")
+        with open(performance_file, 'w', encoding='utf-8') as f:
+            json.dump(performance, f, indent=2, ensure_ascii=False)
+        logger.info(f"Métricas de rendimiento guardadas en: {performance_file}")
+
+    results = {
+        "metricas_rendimiento": performance,
+        **counting,
+        "dataframe_metricas": df_metrics,
+        "debug_video_path": debug_video_path,
+        "fotogramas": kept_frames,
+        "redetecciones_roi": roi_stats,
+        "landmarks_sesion": session_landmarks,
+        "landmarks_desde_cache": cached is not None,
+        "archivos_sesion": session_files,
+        "sesion_almacen": None if store_entry is None else store_entry['id'],
+        "sesion_catalogo": None,
+    }
+    if settings.get('use_catalog', config.USE_SESSION_CATALOG):
+        # Un fallo del catálogo (p. ej. la base bloqueada demasiado tiempo o un
+        # settings['session_date'] que no es una fecha) no invalida el análisis
+        try:
+            with SessionCatalog(catalog_path_for(settings)) as catalog:
+                results["sesion_catalogo"] = catalog.record(video_path, results, settings,
+                                                            estimator=landmark_cache_params(settings))
+        except Exception as e:
+            logger.warning(f"No se pudo registrar la sesión en el catálogo: {type(e).__name__}: {e}")
+
+    notify(100, "PIPELINE COMPLETADO")
+    return results
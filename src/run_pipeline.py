@@ -0,0 +1,351 @@
+# src/run_pipeline.py
+"""
+Análisis por lotes: ejecuta run_full_pipeline_in_memory sobre muchos vídeos,
+repartidos entre un pool de procesos.
+
+La entrada puede ser un directorio (se buscan vídeos con las extensiones de
+config.VIDEO_EXTENSIONS, recursivamente), un manifiesto o vídeos sueltos:
+  - Manifiesto .txt: una ruta por línea (las líneas con '#' se ignoran).
+  - Manifiesto .csv: columna 'video' y, opcionalmente, columnas con ajustes
+    propios de cada vídeo (low_thresh, high_thresh, sample_rate, rotate,
+    use_crop, workers, athlete...).
+Las rutas relativas de un manifiesto se resuelven desde su carpeta.
+
+Los vídeos de las subcarpetas de un directorio dejan sus resultados en la misma
+subcarpeta relativa dentro de --output_dir, así que 'a/clip.mp4' y 'b/clip.mp4'
+no se pisan; la caché de landmarks y el catálogo se comparten en la raíz. Si
+dos trabajos acabarían aun así en la misma carpeta de sesión (p. ej. vídeos con
+el mismo nombre en un manifiesto), el lote no arranca.
+
+Cada vídeo deja un '<nombre>_summary.json' en su carpeta de sesión. Al relanzar
+el lote se saltan los vídeos cuyo resumen corresponde al mismo fichero y a los
+mismos ajustes (reanudación); --force los repite. Al final se escribe
+'batch_summary.csv' con repeticiones, fallos y tiempos de cada vídeo, y el
+código de salida es 1 si alguno falló.
+
+Cada proceso conserva sus estimadores calientes entre vídeos (estimator_pool),
+y con 'workers' > 1 cada vídeo reparte además su inferencia 2D entre varios
+procesos; por defecto --jobs = núcleos / workers.
+
+Uso:
+    python -m src.run_pipeline data/raw/nightly --output_dir data/processed/nightly
+    python -m src.run_pipeline --manifest lote.csv --jobs 4 --workers 2
+    python -m src.run_pipeline --video clip.mp4 --low_thresh 80 --high_thresh 150
+    python -m src.run_pipeline data/raw/archivo --save_session --output_format parquet
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing as mp
+
+from src import config
+from src.E_storage.session_catalog import catalog_path_for
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_SUFFIX = "_summary.json"
+BATCH_SUMMARY_FILE = "batch_summary.csv"
+SUMMARY_COLUMNS = ['video', 'estado', 'repeticiones', 'fallos', 'fotogramas',
+                   'duracion_s', 'fps_procesado', 'landmarks_desde_cache', 'sesion_catalogo', 'error']
+# Columnas de manifiesto CSV que se pasan tal cual a settings, con su tipo
+MANIFEST_SETTINGS = {
+    'low_thresh': float, 'high_thresh': float, 'depth_fail_thresh': float,
+    'sample_rate': int, 'rotate': int, 'workers': int, 'athlete': str.strip,
+    'use_crop': lambda v: v.strip().lower() in ('1', 'true', 'si', 'sí', 'yes'),
+}
+
+
+def discover_videos(directory: str) -> list[str]:
+    """Vídeos del directorio y sus subdirectorios, en orden alfabético."""
+    videos = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if os.path.splitext(name)[1].lower() in config.VIDEO_EXTENSIONS:
+                videos.append(os.path.join(root, name))
+    return sorted(videos)
+
+
+def output_dir_for(video_path: str, input_root: str, output_dir: str) -> str:
+    """Carpeta de salida de un vídeo encontrado en 'input_root': la misma ruta relativa dentro de 'output_dir'."""
+    relative_dir = os.path.relpath(os.path.dirname(os.path.abspath(video_path)), os.path.abspath(input_root))
+    return output_dir if relative_dir == os.curdir else os.path.join(output_dir, relative_dir)
+
+
+def read_manifest(manifest_path: str) -> list[tuple[str, dict]]:
+    """Devuelve [(ruta del vídeo, ajustes propios)] a partir de un manifiesto .txt o .csv."""
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    resolve = lambda path: path if os.path.isabs(path) else os.path.join(base_dir, path)
+    entries = []
+    with open(manifest_path, newline='', encoding='utf-8') as f:
+        if manifest_path.lower().endswith('.csv'):
+            for row in csv.DictReader(f):
+                overrides = {key: cast(row[key]) for key, cast in MANIFEST_SETTINGS.items()
+                             if row.get(key) not in (None, '')}
+                entries.append((resolve(row['video'].strip()), overrides))
+        else:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    entries.append((resolve(line), {}))
+    return entries
+
+
+def session_dir_for(video_path: str, output_dir: str) -> str:
+    """Carpeta de sesión que usa run_full_pipeline_in_memory para este vídeo."""
+    return os.path.join(output_dir, os.path.splitext(os.path.basename(video_path))[0])
+
+
+def summary_path_for(video_path: str, output_dir: str) -> str:
+    base_name = os.path.splitext(os.path.basename(video_path))[0]
+    return os.path.join(session_dir_for(video_path, output_dir), base_name + SUMMARY_SUFFIX)
+
+
+def job_fingerprint(video_path: str, settings: dict) -> dict:
+    """Identifica un trabajo: el fichero (tamaño y fecha) y los ajustes que cambian el resultado."""
+    stat = os.stat(video_path)
+    relevant = {k: v for k, v in settings.items()
+                if k not in ('output_dir', 'workers', 'use_cache', 'cache_dir', 'catalog_path')}
+    return {'tamano': stat.st_size, 'mtime': int(stat.st_mtime), 'ajustes': json.loads(json.dumps(relevant, default=str))}
+
+
+def load_completed(video_path: str, settings: dict) -> dict | None:
+    """Resumen de una ejecución anterior correcta del mismo trabajo, o None."""
+    try:
+        with open(summary_path_for(video_path, settings['output_dir']), encoding='utf-8') as f:
+            summary = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if summary.get('estado') != 'ok' or summary.get('huella') != job_fingerprint(video_path, settings):
+        return None
+    return summary
+
+
+def analyze_video(video_path: str, settings: dict) -> dict:
+    """
+    Analiza un vídeo y guarda su resumen JSON. Se ejecuta en los procesos del
+    pool, así que devuelve solo datos serializables y nunca lanza excepciones.
+    """
+    # Import diferido: el proceso principal no necesita cargar MediaPipe
+    from src.pipeline import run_full_pipeline_in_memory
+
+    summary = {'video': video_path, 'estado': 'error', 'huella': None}
+    start = time.perf_counter()
+    try:
+        summary['huella'] = job_fingerprint(video_path, settings)
+        results = run_full_pipeline_in_memory(video_path, settings)
+        n_frames = len(results['landmarks_sesion'])
+        elapsed = time.perf_counter() - start
+        summary.update(
+            estado='ok',
+            repeticiones=results['repeticiones_contadas'],
+            fallos=results['fallos_detectados'],
+            fotogramas=n_frames,
+            duracion_s=round(elapsed, 3),
+            fps_procesado=round(n_frames / elapsed, 2) if elapsed > 0 else None,
+            landmarks_desde_cache=results.get('landmarks_desde_cache', False),
+            sesion_catalogo=results.get('sesion_catalogo'),
+        )
+    except Exception as e:
+        logger.exception(f"Fallo al analizar {video_path}")
+        summary.update(error=f"{type(e).__name__}: {e}", duracion_s=round(time.perf_counter() - start, 3))
+
+    if summary['huella'] is not None:
+        path = summary_path_for(video_path, settings['output_dir'])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False, default=str)
+        write_count_file(summary, settings['output_dir'])
+    return summary
+
+
+def write_count_file(summary: dict, output_dir: str):
+    """'counts/<nombre>_count.txt' con el nº de repeticiones (lo lee la demo de Streamlit)."""
+    if summary['estado'] != 'ok':
+        return
+    counts_dir = os.path.join(output_dir, 'counts')
+    os.makedirs(counts_dir, exist_ok=True)
+    base_name = os.path.splitext(os.path.basename(summary['video']))[0]
+    with open(os.path.join(counts_dir, f"{base_name}_count.txt"), 'w', encoding='utf-8') as f:
+        f.write(f"{summary['repeticiones']}\n")
+
+
+def _init_batch_worker(log_level: int):
+    logging.basicConfig(level=log_level, format="%(asctime)s %(processName)s %(levelname)s %(message)s")
+
+
+def resolve_jobs(jobs: int | None, workers_per_video: int) -> int:
+    """Procesos del lote: por defecto, los núcleos disponibles entre los workers de cada vídeo."""
+    if jobs:
+        return max(1, jobs)
+    return max(1, (os.cpu_count() or 1) // max(1, workers_per_video))
+
+
+def run_batch(jobs_spec: list[tuple[str, dict]], jobs: int = 1, force: bool = False,
+              log_level: int = logging.INFO) -> list[dict]:
+    """
+    Ejecuta los trabajos (ruta, settings) y devuelve un resumen por vídeo, en el
+    orden de entrada. Con jobs=1 se analiza en el propio proceso. Lanza
+    ValueError si dos trabajos comparten carpeta de sesión.
+    """
+    session_dirs: dict[str, str] = {}
+    for video_path, settings in jobs_spec:
+        session_dir = os.path.normcase(os.path.abspath(session_dir_for(video_path, settings['output_dir'])))
+        if session_dir in session_dirs:
+            raise ValueError(f"{session_dirs[session_dir]} y {video_path} escribirían en la misma carpeta de "
+                             f"sesión ({session_dir}); renombra uno de ellos o analízalos en lotes distintos.")
+        session_dirs[session_dir] = video_path
+
+    summaries: dict[int, dict] = {}
+    pending = []
+    for idx, (video_path, settings) in enumerate(jobs_spec):
+        if not os.path.isfile(video_path):
+            summaries[idx] = {'video': video_path, 'estado': 'error', 'error': "El fichero no existe"}
+            continue
+        done = None if force else load_completed(video_path, settings)
+        if done is not None:
+            summaries[idx] = {**done, 'estado': 'omitido'}
+            continue
+        pending.append(idx)
+
+    logger.info(f"Lote: {len(jobs_spec)} vídeos, {len(jobs_spec) - len(pending)} ya resueltos, "
+                f"{len(pending)} por analizar con {jobs} procesos.")
+    # Los vídeos más grandes primero: la cola final queda con trabajos cortos y el pool no se vacía a medias
+    pending.sort(key=lambda idx: os.path.getsize(jobs_spec[idx][0]), reverse=True)
+
+    if jobs == 1:
+        for n, idx in enumerate(pending, 1):
+            summaries[idx] = analyze_video(*jobs_spec[idx])
+            _log_progress(n, len(pending), summaries[idx])
+    elif pending:
+        # 'spawn' evita heredar grafos de MediaPipe y permite pools anidados (workers > 1)
+        with ProcessPoolExecutor(max_workers=min(jobs, len(pending)), mp_context=mp.get_context('spawn'),
+                                 initializer=_init_batch_worker, initargs=(log_level,)) as executor:
+            futures = {executor.submit(analyze_video, *jobs_spec[idx]): idx for idx in pending}
+            for n, future in enumerate(as_completed(futures), 1):
+                idx = futures[future]
+                try:
+                    summaries[idx] = future.result()
+                except Exception as e:  # El proceso murió (p. ej. sin memoria)
+                    summaries[idx] = {'video': jobs_spec[idx][0], 'estado': 'error',
+                                      'error': f"{type(e).__name__}: {e}"}
+                _log_progress(n, len(pending), summaries[idx])
+    return [summaries[idx] for idx in range(len(jobs_spec))]
+
+
+def _log_progress(n: int, total: int, summary: dict):
+    if summary['estado'] == 'ok':
+        logger.info(f"[{n}/{total}] {summary['video']}: {summary['repeticiones']} repeticiones "
+                    f"en {summary['duracion_s']:.1f} s")
+    else:
+        logger.error(f"[{n}/{total}] {summary['video']}: {summary.get('error')}")
+
+
+def write_batch_summary(summaries: list[dict], output_path: str):
+    """Tabla CSV con una fila por vídeo."""
+    with open(output_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_COLUMNS, extrasaction='ignore')
+        writer.writeheader()
+        for summary in summaries:
+            row = dict(summary)
+            row['fallos'] = len(summary['fallos']) if isinstance(summary.get('fallos'), list) else ''
+            writer.writerow(row)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('inputs', nargs='*', help="Directorios o vídeos a analizar")
+    parser.add_argument('--manifest', action='append', default=[], help="Manifiesto .txt o .csv (repetible)")
+    parser.add_argument('--video', action='append', default=[], help="Vídeo suelto (repetible)")
+    parser.add_argument('--output_dir', default=os.path.join('data', 'processed'))
+    parser.add_argument('--jobs', type=int, default=0, help="Vídeos en paralelo (0 = núcleos / workers)")
+    parser.add_argument('--workers', type=int, default=config.POSE_WORKERS,
+                        help="Procesos de inferencia 2D por vídeo")
+    parser.add_argument('--sample_rate', type=int, default=1)
+    parser.add_argument('--low_thresh', type=float, default=config.SQUAT_LOW_THRESH)
+    parser.add_argument('--high_thresh', type=float, default=config.SQUAT_HIGH_THRESH)
+    parser.add_argument('--depth_fail_thresh', type=float, default=config.DEPTH_FAIL_THRESH)
+    parser.add_argument('--use_crop', action=argparse.BooleanOptionalAction, default=config.DEFAULT_USE_CROP)
+    parser.add_argument('--debug_video', action='store_true', help="Generar el vídeo de depuración de cada sesión")
+    parser.add_argument('--no_cache', action='store_true', help="No usar la caché de landmarks")
+    parser.add_argument('--athlete', help="Atleta de todos los vídeos (en un manifiesto CSV, columna 'athlete')")
+    parser.add_argument('--catalog', help="Catálogo SQLite de sesiones (por defecto, en --output_dir)")
+    parser.add_argument('--landmark_store', help="Directorio del almacén de landmarks al que anexar cada sesión")
+    parser.add_argument('--save_session', action='store_true',
+                        help="Guardar las tablas de métricas y landmarks de cada sesión")
+    parser.add_argument('--output_format', choices=('parquet', 'arrow', 'csv'), default=config.SESSION_OUTPUT_FORMAT,
+                        help="Formato de las tablas de --save_session")
+    parser.add_argument('--fps', type=float, help="Obsoleto: los fps se leen del propio vídeo")
+    parser.add_argument('--force', action='store_true', help="Repetir también los vídeos ya analizados")
+    parser.add_argument('--quiet', action='store_true', help="Mostrar solo avisos y errores")
+    args = parser.parse_args(argv)
+
+    log_level = logging.WARNING if args.quiet else logging.INFO
+    logging.basicConfig(level=log_level, format="%(asctime)s %(levelname)s %(message)s")
+    if args.fps is not None:
+        logger.warning("--fps se ignora: el pipeline usa los fps del contenedor de vídeo.")
+
+    entries = [(path, {}) for path in args.video]
+    for manifest in args.manifest:
+        entries += read_manifest(manifest)
+    for path in args.inputs:
+        if os.path.isdir(path):
+            entries += [(video, {'output_dir': output_dir_for(video, path, args.output_dir)})
+                        for video in discover_videos(path)]
+        else:
+            entries.append((path, {}))
+    if not entries:
+        parser.error("No se ha indicado ningún vídeo (directorio, --manifest o --video).")
+
+    base_settings = {
+        'output_dir': args.output_dir,
+        'sample_rate': args.sample_rate,
+        'low_thresh': args.low_thresh,
+        'high_thresh': args.high_thresh,
+        'depth_fail_thresh': args.depth_fail_thresh,
+        'use_crop': args.use_crop,
+        'workers': args.workers,
+        'generate_debug_video': args.debug_video,
+        'use_cache': not args.no_cache,
+        # Caché y catálogo del lote en la raíz, aunque cada subcarpeta tenga su 'output_dir'
+        'cache_dir': os.path.join(args.output_dir, config.LANDMARK_CACHE_DIRNAME),
+        'catalog_path': args.catalog or catalog_path_for({'output_dir': args.output_dir}),
+    }
+    if args.save_session:
+        # Solo se añaden si se piden, para no invalidar la reanudación de lotes anteriores
+        base_settings.update(save_session=True, output_format=args.output_format)
+    if args.landmark_store:
+        base_settings['landmark_store'] = args.landmark_store
+    if args.athlete:
+        base_settings['athlete'] = args.athlete
+    jobs_spec = [(path, {**base_settings, **overrides}) for path, overrides in entries]
+    jobs = resolve_jobs(args.jobs, args.workers)
+
+    start = time.perf_counter()
+    try:
+        summaries = run_batch(jobs_spec, jobs=jobs, force=args.force, log_level=log_level)
+    except ValueError as e:
+        parser.error(str(e))
+    elapsed = time.perf_counter() - start
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    summary_file = os.path.join(args.output_dir, BATCH_SUMMARY_FILE)
+    write_batch_summary(summaries, summary_file)
+
+    failed = [s for s in summaries if s['estado'] == 'error']
+    analysed = sum(s['estado'] == 'ok' for s in summaries)
+    print(f"{analysed} analizados, {len(summaries) - analysed - len(failed)} omitidos, "
+          f"{len(failed)} con error en {elapsed:.1f} s. Resumen: {summary_file}")
+    if config.USE_SESSION_CATALOG:
+        print(f"Catálogo de sesiones: {catalog_path_for(base_settings)}")
+    for summary in failed:
+        print(f"  ERROR {summary['video']}: {summary.get('error')}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
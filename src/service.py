@@ -0,0 +1,334 @@
+# src/service.py
+"""
+Servicio HTTP local de análisis.
+
+Un único proceso mantiene una cola acotada de trabajos y un número fijo de
+hilos trabajadores; cada hilo toma sus estimadores del pool del proceso
+(estimator_pool), de modo que los modelos se cargan una vez y no en cada
+petición. El progreso de cada trabajo llega por el progress_callback del
+pipeline.
+
+Endpoints (JSON):
+    POST /jobs                 {"video": ruta, "settings": {...}} -> 202 {"id", "estado"}
+                               503 si la cola está llena
+    GET  /jobs/<id>            estado, progreso (0-100) y tiempos
+    GET  /jobs/<id>/result     resultado (200), 409 si aún no ha terminado
+                               ?metricas=1 incluye el DataFrame de métricas por columnas
+    GET  /health               trabajos en cola y en curso
+
+Los trabajos terminados se conservan como máximo config.SERVICE_MAX_RETAINED_JOBS
+y durante config.SERVICE_RESULT_TTL_S segundos.
+
+Uso:
+    python -m src.service [--port 8765] [--workers 1] [--queue-size 16]
+"""
+import argparse
+import json
+import logging
+import math
+import queue
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src import config
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, DONE, FAILED = 'en_cola', 'procesando', 'completado', 'error'
+
+
+@dataclass
+class Job:
+    """Un análisis solicitado al servicio."""
+    id: str
+    video_path: str
+    settings: dict
+    estado: str = QUEUED
+    progreso: int = 0
+    creado: float = field(default_factory=time.time)
+    iniciado: float | None = None
+    terminado: float | None = None
+    resultado: dict | None = None
+    error: str | None = None
+
+    def status(self) -> dict:
+        return {
+            'id': self.id,
+            'video': self.video_path,
+            'estado': self.estado,
+            'progreso': self.progreso,
+            'creado': self.creado,
+            'iniciado': self.iniciado,
+            'terminado': self.terminado,
+            'duracion_s': None if self.iniciado is None else (self.terminado or time.time()) - self.iniciado,
+            'error': self.error,
+        }
+
+
+def _json_safe(value):
+    """Convierte NaN/inf en None y los tipos de numpy en tipos de Python."""
+    if isinstance(value, dict):
+        return {str(k): _json_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(v) for v in value]
+    if hasattr(value, 'item') and not hasattr(value, '__len__'):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def serialize_results(results: dict) -> dict:
+    """
+    Versión JSON del resultado del pipeline: sin fotogramas ni tensores de
+    landmarks; las métricas y el detalle de repeticiones, como listas por columna.
+    """
+    rep_details = results.get('detalle_repeticiones')
+    df_metrics = results.get('dataframe_metricas')
+    payload = {
+        'repeticiones_contadas': results.get('repeticiones_contadas'),
+        'fallos_detectados': results.get('fallos_detectados', []),
+        'detalle_repeticiones': None if rep_details is None else rep_details.to_dict(orient='list'),
+        'umbrales': results.get('umbrales'),
+        'debug_video_path': results.get('debug_video_path'),
+        'redetecciones_roi': results.get('redetecciones_roi'),
+        'landmarks_desde_cache': results.get('landmarks_desde_cache', False),
+        'archivos_sesion': results.get('archivos_sesion'),
+        'sesion_catalogo': results.get('sesion_catalogo'),
+        'metricas_rendimiento': results.get('metricas_rendimiento'),
+        'metricas': None if df_metrics is None else df_metrics.to_dict(orient='list'),
+    }
+    return _json_safe(payload)
+
+
+class AnalysisService:
+    """Cola acotada de trabajos, hilos trabajadores y retención de resultados."""
+    def __init__(self, workers: int = config.SERVICE_WORKERS, queue_size: int = config.SERVICE_QUEUE_SIZE,
+                 max_retained: int = config.SERVICE_MAX_RETAINED_JOBS,
+                 result_ttl_s: float = config.SERVICE_RESULT_TTL_S, runner=None):
+        if runner is None:
+            from src.pipeline import run_full_pipeline_in_memory as runner
+        self.runner = runner
+        self.max_retained = max_retained
+        self.result_ttl_s = result_ttl_s
+        self._queue: queue.Queue[Job | None] = queue.Queue(maxsize=queue_size)
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = [threading.Thread(target=self._work, name=f"analysis-{i}", daemon=True)
+                         for i in range(max(1, workers))]
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"Servicio de análisis: {len(self._threads)} trabajadores, cola de {queue_size}.")
+
+    def submit(self, video_path: str, settings: dict | None = None) -> Job:
+        """Encola un análisis. Lanza queue.Full si la cola está llena."""
+        job = Job(id=uuid.uuid4().hex, video_path=video_path, settings=dict(settings or {}))
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job.id]
+            raise
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            self._prune()
+            return self._jobs.get(job_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            states = [job.estado for job in self._jobs.values()]
+        return {
+            'trabajadores': len(self._threads),
+            'en_cola': states.count(QUEUED),
+            'procesando': states.count(RUNNING),
+            'retenidos': len(states),
+        }
+
+    def _prune(self):
+        """Olvida los trabajos terminados más antiguos o caducados (con el lock tomado)."""
+        now = time.time()
+        finished = [job for job in self._jobs.values() if job.terminado is not None]
+        expired = {job.id for job in finished if now - job.terminado > self.result_ttl_s}
+        excess = len(finished) - len(expired) - self.max_retained
+        if excess > 0:
+            survivors = sorted((job for job in finished if job.id not in expired), key=lambda job: job.terminado)
+            expired.update(job.id for job in survivors[:excess])
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+            job.estado, job.iniciado = RUNNING, time.time()
+
+            def on_progress(progress: int, job=job):
+                job.progreso = int(progress)
+
+            try:
+                results = self.runner(job.video_path, job.settings, progress_callback=on_progress)
+                job.resultado = serialize_results(results)
+                job.estado, job.progreso = DONE, 100
+            except Exception as e:
+                logger.exception(f"Fallo en el trabajo {job.id} ({job.video_path})")
+                job.error, job.estado = f"{type(e).__name__}: {e}", FAILED
+            finally:
+                job.terminado = time.time()
+                with self._lock:
+                    self._prune()
+
+    def shutdown(self):
+        """Deja terminar los trabajos en curso y para los hilos."""
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    service: AnalysisService  # Se fija en make_server
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urllib.parse.urlparse(self.path)
+        parts = [p for p in url.path.split('/') if p]
+        if parts == ['health']:
+            return self._send_json(200, {'estado': 'ok', **self.service.stats()})
+        if len(parts) in (2, 3) and parts[0] == 'jobs':
+            job = self.service.get(parts[1])
+            if job is None:
+                return self._send_json(404, {'error': "Trabajo desconocido o caducado"})
+            if len(parts) == 2:
+                return self._send_json(200, job.status())
+            if parts[2] == 'result':
+                if job.estado == FAILED:
+                    return self._send_json(500, {**job.status()})
+                if job.estado != DONE:
+                    return self._send_json(409, {**job.status(), 'error': "El trabajo no ha terminado"})
+                result = dict(job.resultado)
+                if urllib.parse.parse_qs(url.query).get('metricas', ['0'])[0] not in ('1', 'true'):
+                    result.pop('metricas')
+                return self._send_json(200, {**job.status(), 'resultado': result})
+        self._send_json(404, {'error': "Ruta no encontrada"})
+
+    def do_POST(self):
+        if self.path.rstrip('/') != '/jobs':
+            return self._send_json(404, {'error': "Ruta no encontrada"})
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            body = json.loads(self.rfile.read(length) or b'{}')
+            video_path = body['video']
+        except (ValueError, KeyError, TypeError):
+            return self._send_json(400, {'error': "Se esperaba JSON con la clave 'video'"})
+        try:
+            job = self.service.submit(video_path, body.get('settings'))
+        except queue.Full:
+            return self._send_json(503, {'error': "Cola llena, inténtalo más tarde"})
+        self._send_json(202, job.status())
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def make_server(service: AnalysisService, host: str = config.SERVICE_HOST,
+                port: int = config.SERVICE_PORT) -> ThreadingHTTPServer:
+    """Servidor HTTP ligado al servicio (port=0 elige un puerto libre)."""
+    handler = type('AnalysisHandler', (_Handler,), {'service': service})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+class AnalysisClient:
+    """Cliente mínimo del servicio (solo biblioteca estándar), usado por la demo de Streamlit."""
+    def __init__(self, base_url: str = f"http://{config.SERVICE_HOST}:{config.SERVICE_PORT}", timeout: float = 10.0):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def _request(self, method: str, path: str, payload: dict | None = None) -> tuple[int, dict]:
+        data = None if payload is None else json.dumps(payload).encode('utf-8')
+        request = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read() or b'{}')
+
+    def is_alive(self) -> bool:
+        try:
+            return self._request('GET', '/health')[0] == 200
+        except OSError:
+            return False
+
+    def submit(self, video_path: str, settings: dict | None = None) -> dict:
+        status, payload = self._request('POST', '/jobs', {'video': video_path, 'settings': settings or {}})
+        if status != 202:
+            raise RuntimeError(payload.get('error', f"HTTP {status}"))
+        return payload
+
+    def status(self, job_id: str) -> dict:
+        return self._request('GET', f'/jobs/{job_id}')[1]
+
+    def result(self, job_id: str, include_metrics: bool = False) -> dict:
+        status, payload = self._request('GET', f"/jobs/{job_id}/result{'?metricas=1' if include_metrics else ''}")
+        if status != 200:
+            raise RuntimeError(payload.get('error') or f"HTTP {status}")
+        return payload['resultado']
+
+    def wait(self, job_id: str, poll_s: float = 0.5, on_progress=None, timeout_s: float | None = None) -> dict:
+        """Espera a que el trabajo termine; on_progress(progreso) en cada sondeo."""
+        deadline = None if timeout_s is None else time.monotonic() + timeout_s
+        while True:
+            job = self.status(job_id)
+            if on_progress:
+                on_progress(job.get('progreso', 0))
+            if job.get('estado') in (DONE, FAILED) or 'estado' not in job:
+                return job
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"El trabajo {job_id} no terminó en {timeout_s} s")
+            time.sleep(poll_s)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default=config.SERVICE_HOST)
+    parser.add_argument('--port', type=int, default=config.SERVICE_PORT)
+    parser.add_argument('--workers', type=int, default=config.SERVICE_WORKERS, help="Análisis simultáneos")
+    parser.add_argument('--queue-size', type=int, default=config.SERVICE_QUEUE_SIZE)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(threadName)s %(levelname)s %(message)s")
+
+    service = AnalysisService(workers=args.workers, queue_size=args.queue_size)
+    server = make_server(service, args.host, args.port)
+    logger.info(f"Servicio escuchando en http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Deteniendo el servicio...")
+    finally:
+        server.server_close()
+        service.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
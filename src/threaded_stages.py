@@ -0,0 +1,137 @@
+# src/threaded_stages.py
+"""
+Etapas en hilos conectadas por colas acotadas, para solapar la decodificación,
+la inferencia y la codificación de vídeo. OpenCV libera el GIL al decodificar
+y codificar, así que estas etapas avanzan en paralelo con el bucle de inferencia.
+
+Las colas acotadas aplican contrapresión: si un consumidor se retrasa, el
+productor se bloquea en lugar de acumular fotogramas en memoria.
+"""
+import logging
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+_SENTINEL = object()
+_POLL_SECONDS = 0.1
+
+
+class PrefetchIterator:
+    """
+    Consume un iterable en un hilo productor y entrega sus elementos a través
+    de una cola acotada. Los errores del productor se relanzan en el consumidor.
+    """
+    def __init__(self, iterable, maxsize: int = 8, name: str = "prefetch"):
+        self._iterable = iterable
+        self._queue = queue.Queue(maxsize=max(1, maxsize))
+        self._stop = threading.Event()
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._started = False
+
+    def _put(self, item) -> bool:
+        """Encola con espera activa para poder abandonar si se pide parar."""
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=_POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self):
+        iterator = iter(self._iterable)
+        try:
+            for item in iterator:
+                if not self._put(item):
+                    break
+        except BaseException as e:
+            self._error = e
+        finally:
+            # Cerramos el generador en este mismo hilo para liberar sus recursos
+            close = getattr(iterator, 'close', None)
+            if close is not None:
+                close()
+            self._put(_SENTINEL)
+
+    def __iter__(self):
+        if not self._started:
+            self._started = True
+            self._thread.start()
+        while True:
+            item = self._queue.get()
+            if item is _SENTINEL:
+                break
+            yield item
+        if self._error is not None:
+            raise self._error
+
+    def close(self):
+        """Detiene el productor y espera a que termine (idempotente)."""
+        self._stop.set()
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        if self._started:
+            self._thread.join()
+
+
+class ThreadedSink:
+    """
+    Ejecuta una función consumidora (p. ej. DebugVideoWriter.write) en un hilo
+    propio, alimentada por una cola acotada. put() se bloquea si la cola está
+    llena y relanza el error si el consumidor ha fallado.
+    """
+    def __init__(self, consumer, maxsize: int = 8, name: str = "sink"):
+        self._consumer = consumer
+        self._queue = queue.Queue(maxsize=max(1, maxsize))
+        self._stop = threading.Event()
+        self._error = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _SENTINEL:
+                return
+            if self._error is not None or self._stop.is_set():
+                continue  # Vaciamos la cola sin procesar para no bloquear al productor
+            try:
+                self._consumer(item)
+            except BaseException as e:
+                self._error = e
+                logger.error(f"Error en la etapa '{self._thread.name}': {e}")
+
+    def put(self, item):
+        if self._closed:
+            raise RuntimeError("No se puede escribir en una etapa cerrada.")
+        while True:
+            if self._error is not None:
+                raise self._error
+            try:
+                self._queue.put(item, timeout=_POLL_SECONDS)
+                return
+            except queue.Full:
+                continue
+
+    def close(self):
+        """Procesa lo pendiente, espera al hilo y relanza cualquier error del consumidor."""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(_SENTINEL)
+            self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def abort(self):
+        """Descarta lo pendiente y detiene el hilo sin relanzar errores (idempotente)."""
+        self._stop.set()
+        if not self._closed:
+            self._closed = True
+            self._queue.put(_SENTINEL)
+        self._thread.join()
@@ -0,0 +1,47 @@
+# tests/test_analysis_3d.py
+
+import numpy as np
+
+from src.D_modeling.analysis_3d import calculate_3d_metrics
+from src.D_modeling.math_utils import calculate_angle_3d, calculate_angles_3d
+
+LEFT = (11, 23, 25, 27)   # Hombro, cadera, rodilla, tobillo
+RIGHT = (12, 24, 26, 28)
+
+
+def _random_world_landmarks(n_frames: int = 60, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    world = rng.normal(size=(n_frames, 33, 4)).astype(np.float32)
+    world[[3, 10]] = np.nan          # Fotogramas sin detección
+    world[5, 26] = np.nan            # Falta la rodilla derecha
+    return world
+
+
+def test_angles_3d_matches_scalar_version():
+    rng = np.random.default_rng(1)
+    points = rng.normal(size=(100, 3, 4))
+    batch = calculate_angles_3d(points[:, 0], points[:, 1], points[:, 2])
+    scalar = [calculate_angle_3d(*triplet) for triplet in points]
+    np.testing.assert_allclose(batch, scalar, rtol=1e-10)
+    assert np.isnan(calculate_angles_3d(np.full(3, np.nan), np.zeros(3), np.ones(3)))
+
+
+def test_3d_metrics_match_per_frame_computation():
+    world = _random_world_landmarks()
+    df = calculate_3d_metrics(world, fps=30)
+
+    assert list(df['frame_idx']) == [t for t in range(len(world)) if t not in (3, 10)]
+    for row in df.itertuples():
+        frame = world[row.frame_idx]
+        for side, (shoulder, hip, knee, ankle) in (('izq', LEFT), ('der', RIGHT)):
+            if side == 'der' and row.frame_idx == 5:
+                assert np.isnan(row.rodilla_der) and np.isnan(row.cadera_der) and np.isnan(row.altura_cadera_der)
+                continue
+            assert np.isclose(getattr(row, f'rodilla_{side}'), calculate_angle_3d(frame[hip], frame[knee], frame[ankle]))
+            assert np.isclose(getattr(row, f'cadera_{side}'), calculate_angle_3d(frame[shoulder], frame[hip], frame[knee]))
+        assert np.isclose(row.altura_cadera, frame[23, 1])
+        assert np.isclose(row.time_s, row.frame_idx / 30)
+
+
+def test_3d_metrics_empty_session():
+    assert calculate_3d_metrics(np.full((4, 33, 4), np.nan), fps=30).empty
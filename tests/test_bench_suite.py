@@ -0,0 +1,75 @@
+# tests/test_bench_suite.py
+
+import json
+
+import numpy as np
+
+from benchmarks import bench_suite
+from benchmarks.bench_suite import compare_to_baseline, create_estimator, main, run_suite
+from benchmarks.synthetic import squat_knee_angles, synthetic_session
+from src.D_modeling.analysis_3d import calculate_3d_metrics, count_reps_3d
+
+
+def test_synthetic_session_is_deterministic_and_realistic():
+    first, second = synthetic_session(300, seed=3), synthetic_session(300, seed=3)
+    np.testing.assert_array_equal(first.landmarks, second.landmarks)
+    assert first.landmarks.shape == (300, 33, 4) and first.landmarks.dtype == np.float32
+    assert 0 < (~first.detected).sum() < 30                      # Algún fotograma sin detección
+
+    clean = synthetic_session(300, dropout=0.0)
+    df_metrics = calculate_3d_metrics(clean.world_landmarks, clean.fps)
+    np.testing.assert_allclose(df_metrics['rodilla_izq'], squat_knee_angles(300), atol=1e-3)
+    assert count_reps_3d(df_metrics, up_thresh=140, down_thresh=120)[0] == 4
+
+
+def test_compare_flags_only_real_regressions():
+    baseline = {'fases': {
+        'metricas_2d': {'ms_por_fotograma': 0.01, 'fotogramas': 300},
+        'render_video': {'ms_por_fotograma': 2.0, 'fotogramas': 300},
+        'pipeline_2d': {'ms_por_fotograma': 20.0, 'fotogramas': 300},
+    }}
+    current = {'fases': {
+        'metricas_2d': {'ms_por_fotograma': 0.02, 'fotogramas': 300},     # 2x, pero solo 3 ms en total
+        'render_video': {'ms_por_fotograma': 3.0, 'fotogramas': 300},
+        'pipeline_2d': {'ms_por_fotograma': 22.0, 'fotogramas': 300},     # Dentro de la tolerancia
+        'conteo_2d': {'ms_por_fotograma': 1.0, 'fotogramas': 300},        # Sin línea base
+        'estimacion_pose_3d': {'omitida': 'RuntimeError: sin modelo'},
+    }}
+    regressions = compare_to_baseline(current, baseline, tolerance=0.25)
+    assert [r['fase'] for r in regressions] == ['render_video']
+    assert regressions[0]['ratio'] == 1.5
+
+
+def test_suite_writes_baseline_and_detects_regression(tmp_path):
+    output = tmp_path / "base.json"
+    argv = ['--frames', '60', '--width', '160', '--height', '96', '--repeat', '1',
+            '--stages', 'extraccion', 'filtrado', 'metricas_3d', 'conteo_3d', 'render_video']
+    assert main(argv + ['--output', str(output)]) == 0
+
+    report = json.loads(output.read_text(encoding='utf-8'))
+    assert report['parametros']['frames'] == 60 and 'numpy' in report['entorno']['versiones']
+    assert report['fases']['extraccion']['fotogramas'] == 60
+    assert report['fases']['render_video']['fotogramas'] == 60
+
+    report['fases']['render_video']['ms_por_fotograma'] /= 100     # Línea base imposible de igualar
+    output.write_text(json.dumps(report), encoding='utf-8')
+    assert main(argv + ['--baseline', str(output), '--min-delta', '0']) == 1
+
+
+def test_crashing_stage_fails_the_gate(monkeypatch):
+    def crash(fx, repeat, args):
+        raise IndexError("regresión")
+
+    def no_model(fx, repeat, args):
+        return create_estimator(lambda: (_ for _ in ()).throw(OSError("sin red")))
+
+    monkeypatch.setitem(bench_suite.BENCHMARKS, 'conteo_3d', crash)
+    monkeypatch.setitem(bench_suite.BENCHMARKS, 'estimacion_pose_3d', no_model)
+    stages = run_suite(None, ['conteo_3d', 'estimacion_pose_3d'], 1, None)
+    assert stages['conteo_3d'] == {'error': 'IndexError: regresión'}
+    assert stages['estimacion_pose_3d'] == {'omitida': 'OSError: sin red'}
+
+    baseline = {'fases': {'conteo_3d': {'ms_por_fotograma': 0.1, 'fotogramas': 300},
+                          'estimacion_pose_3d': {'ms_por_fotograma': 40.0, 'fotogramas': 30}}}
+    regressions = compare_to_baseline({'fases': stages}, baseline)
+    assert [(r['fase'], r['actual_ms']) for r in regressions] == [('conteo_3d', None), ('estimacion_pose_3d', None)]
@@ -0,0 +1,50 @@
+# tests/test_columnar.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.E_storage.columnar as columnar
+from benchmarks.synthetic import synthetic_session
+from src.E_storage.columnar import (
+    find_session_file,
+    load_session_landmarks,
+    read_frame,
+    read_metadata,
+    write_session_outputs,
+)
+
+METADATA = {'fps': 30.0, 'rotacion': 90, 'sample_rate': 2, 'estimador': {'estimator': 'PoseEstimator'}}
+
+
+def _metrics(n_frames):
+    return pd.DataFrame({'frame_idx': np.arange(n_frames), 'rodilla_izq': np.linspace(170, 80, n_frames),
+                         'cadera_izq': np.full(n_frames, np.nan)})
+
+
+@pytest.mark.parametrize('output_format', ['csv', 'parquet', 'arrow'])
+def test_session_outputs_roundtrip(tmp_path, output_format):
+    if output_format != 'csv':
+        pytest.importorskip('pyarrow')
+    session = synthetic_session(50, dropout=0.1)
+    paths = write_session_outputs(str(tmp_path), 'clip', _metrics(50), session, METADATA, output_format)
+
+    assert find_session_file(str(tmp_path), 'clip', 'landmarks') == paths['landmarks']
+    assert read_metadata(paths['metrics']) == METADATA
+    assert list(read_frame(paths['metrics'], columns=['rodilla_izq']).columns) == ['rodilla_izq']
+    subset = read_frame(paths['landmarks'], columns=['frame_idx', 'x25', 'wy25'])
+    np.testing.assert_allclose(subset['x25'], session.landmarks[:, 25, 0], rtol=1e-6)
+
+    loaded = load_session_landmarks(paths['landmarks'])
+    assert loaded.fps == 30.0
+    np.testing.assert_allclose(loaded.landmarks, session.landmarks, rtol=1e-6)        # NaN incluidos
+    np.testing.assert_allclose(loaded.world_landmarks, session.world_landmarks, rtol=1e-6)
+    np.testing.assert_array_equal(loaded.crop_boxes, session.crop_boxes)
+
+
+def test_falls_back_to_csv_without_pyarrow(tmp_path, monkeypatch):
+    monkeypatch.setattr(columnar, 'pa', None)
+    paths = write_session_outputs(str(tmp_path), 'clip', _metrics(5), synthetic_session(5), METADATA, 'parquet')
+    assert paths['metrics'].endswith('clip_metrics.csv') and paths['landmarks'].endswith('clip_landmarks.csv')
+    with pytest.raises(ValueError, match="Formato de salida desconocido"):
+        write_session_outputs(str(tmp_path), 'clip', _metrics(5), synthetic_session(5), METADATA, 'xlsx')
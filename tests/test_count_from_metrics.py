@@ -0,0 +1,43 @@
+# tests/test_count_from_metrics.py
+
+import numpy as np
+import pandas as pd
+
+from src import config
+from src.D_modeling.analysis_3d import count_reps_3d
+from src.D_modeling.count_reps import count_repetitions_from_df
+from src.pipeline import count_from_metrics
+
+
+def _metrics(n_reps: int = 6) -> pd.DataFrame:
+    depths = np.linspace(60, 110, n_reps)          # Las últimas repeticiones no bajan de 90°
+    angles = np.concatenate([d + (175 - d) * (0.5 + 0.5 * np.cos(np.linspace(0, 2 * np.pi, 40))) for d in depths])
+    return pd.DataFrame({'frame_idx': np.arange(len(angles)), 'rodilla_izq': angles})
+
+
+def test_count_from_metrics_3d_follows_thresholds(monkeypatch):
+    monkeypatch.setattr(config, 'USE_3D_ANALYSIS', True)
+    df = _metrics()
+
+    counting = count_from_metrics(df, {})
+    assert counting['umbrales'] == {'high_thresh': config.SQUAT_HIGH_THRESH,
+                                    'low_thresh': config.SQUAT_LOW_THRESH,
+                                    'depth_fail_thresh': config.DEPTH_FAIL_THRESH}
+
+    settings = {'high_thresh': 160, 'low_thresh': 120, 'depth_fail_thresh': 90}
+    counting = count_from_metrics(df, settings)
+    n_reps, faults, reps = count_reps_3d(df, up_thresh=160, down_thresh=120, depth_fail_thresh=90)
+    assert counting['repeticiones_contadas'] == n_reps == 6
+    assert counting['fallos_detectados'] == faults and len(faults) > 0
+    pd.testing.assert_frame_equal(counting['detalle_repeticiones'], reps)
+
+    # Bajar el umbral inferior deja fuera las repeticiones poco profundas
+    assert count_from_metrics(df, {**settings, 'low_thresh': 80})['repeticiones_contadas'] < 6
+
+
+def test_count_from_metrics_2d_uses_valleys(monkeypatch):
+    monkeypatch.setattr(config, 'USE_3D_ANALYSIS', False)
+    df = _metrics()
+    counting = count_from_metrics(df, {'low_thresh': 100})
+    assert counting['repeticiones_contadas'] == count_repetitions_from_df(df, low_thresh=100)
+    assert counting['fallos_detectados'] == [] and counting['detalle_repeticiones'] is None
@@ -0,0 +1,98 @@
+# tests/test_estimator_pool.py
+
+import pytest
+
+import src.pipeline
+from src import config
+from src.B_pose_estimation.estimator_pool import EstimatorPool
+from src.B_pose_estimation.estimators import BaseEstimator, CroppedPoseEstimator, EstimationResult
+from src.B_pose_estimation import parallel
+from src.B_pose_estimation.parallel import ParallelPoseEstimator
+from src.pipeline import estimator_pool_key
+
+
+class CountingEstimator(BaseEstimator):
+    """Estimador ficticio que registra cuántas veces se reinicia y si se ha cerrado."""
+    def __init__(self):
+        self.resets = 0
+        self.closed = False
+
+    def estimate(self, image):
+        return EstimationResult()
+
+    def reset(self):
+        self.resets += 1
+
+    def close(self):
+        self.closed = True
+
+
+def test_lease_reuses_a_reset_instance():
+    pool = EstimatorPool(max_idle_per_key=1)
+    with pool.lease('a', CountingEstimator) as first:
+        pass
+    with pool.lease('a', CountingEstimator) as second:
+        assert second is first and second.resets == 1
+    with pool.lease('b', CountingEstimator) as other:
+        assert other is not first
+    assert (pool.created, pool.reused) == (2, 1)
+    assert pool.idle_count() == 2
+
+    pool.close()
+    assert first.closed and other.closed
+    with pytest.raises(RuntimeError):
+        pool.acquire('a', CountingEstimator)
+
+
+def test_concurrent_leases_get_distinct_instances_and_extra_ones_are_closed():
+    pool = EstimatorPool(max_idle_per_key=1)
+    first, second = pool.acquire('a', CountingEstimator), pool.acquire('a', CountingEstimator)
+    assert first is not second
+    pool.release('a', first)
+    pool.release('a', second)
+    assert pool.idle_count('a') == 1 and second.closed and not first.closed
+
+
+def test_failed_lease_discards_the_instance():
+    pool = EstimatorPool()
+    with pytest.raises(ValueError):
+        with pool.lease('a', CountingEstimator) as estimator:
+            raise ValueError("fallo a mitad de vídeo")
+    assert estimator.closed and pool.idle_count() == 0
+
+
+def test_pool_key_follows_estimator_settings(monkeypatch):
+    monkeypatch.setattr(config, 'USE_3D_ANALYSIS', False)
+    base = estimator_pool_key({'use_crop': True, 'workers': 1})
+    assert base == estimator_pool_key({'use_crop': True, 'workers': 1, 'sample_rate': 3, 'low_thresh': 70})
+    assert base != estimator_pool_key({'use_crop': False, 'workers': 1})
+    assert base != estimator_pool_key({'use_crop': True, 'workers': 2})
+    assert base != estimator_pool_key({'use_crop': True, 'workers': 1, 'track_roi': not config.TRACK_ROI})
+
+
+def test_parallel_inference_disables_roi_tracking(monkeypatch, caplog):
+    monkeypatch.setattr(config, 'USE_3D_ANALYSIS', False)
+    built = {}
+    monkeypatch.setattr(src.pipeline, 'ParallelPoseEstimator',
+                        lambda estimator_cls, workers, **kwargs: built.update(kwargs, workers=workers))
+    settings = {'use_crop': True, 'workers': 2, 'track_roi': True}
+    src.pipeline.build_estimator(settings)
+    assert built == {'workers': 2, 'track_roi': False} and "se desactiva" in caplog.text
+    # La clave del pool y la de la caché reflejan el estimador que realmente se construye
+    assert estimator_pool_key(settings) == estimator_pool_key({**settings, 'track_roi': False})
+    assert src.pipeline.landmark_cache_params(settings)['track_roi'] is False
+
+    with pytest.raises(ValueError, match="track_roi"):
+        ParallelPoseEstimator(CroppedPoseEstimator, workers=2, track_roi=True)
+
+
+def test_parallel_reset_reaches_each_worker(monkeypatch):
+    # Lado del proceso trabajador: se reinicia una vez por generación nueva, no por tarea
+    worker_estimator = CountingEstimator()
+    monkeypatch.setattr(parallel, '_worker_estimator', worker_estimator)
+    monkeypatch.setattr(parallel, '_worker_generation', 0)
+    parallel._estimate_chunk([None, None], 0)
+    assert worker_estimator.resets == 0
+    parallel._estimate_chunk([None], 1)
+    parallel._estimate_chunk([None], 1)
+    assert worker_estimator.resets == 1
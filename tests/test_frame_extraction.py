@@ -0,0 +1,77 @@
+# tests/test_frame_extraction.py
+
+import numpy as np
+import cv2
+import pytest
+
+from src import config
+from src.A_preprocessing.frame_extraction import VideoFrameStream, extract_and_preprocess_frames
+
+
+def create_numbered_video(path, width=64, height=48, num_frames=30, fps=15):
+    """
+    Crea un vídeo sintético en el que cada fotograma tiene un nivel de gris
+    distinto (idx * 8), para poder identificar qué fotogramas se han extraído.
+    """
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, (width, height))
+    if not writer.isOpened():
+        writer.release()
+        pytest.skip("No se pudo abrir VideoWriter para crear vídeo de prueba")
+    for idx in range(num_frames):
+        writer.write(np.full((height, width, 3), idx * 8, dtype=np.uint8))
+    writer.release()
+
+
+def _frame_ids(frames):
+    return [int(round(float(f.mean()) / 8)) for f in frames]
+
+
+def test_stream_matches_list_extraction(tmp_path):
+    """El stream entrega los mismos fotogramas que la extracción en lista."""
+    video = str(tmp_path / "numbered.avi")
+    create_numbered_video(video)
+
+    frames_list, fps = extract_and_preprocess_frames(video, sample_rate=3, rotate=0)
+    with VideoFrameStream(video, sample_rate=3, rotate=0) as stream:
+        assert abs(stream.fps - fps) < 1e-6
+        assert stream.expected_frames == 10
+        frames_stream = list(stream)
+
+    assert _frame_ids(frames_stream) == _frame_ids(frames_list) == list(range(0, 30, 3))
+
+
+def test_stream_applies_rotation(tmp_path):
+    """La rotación de 90 grados intercambia ancho y alto."""
+    video = str(tmp_path / "numbered.avi")
+    create_numbered_video(video, width=64, height=48, num_frames=4)
+
+    with VideoFrameStream(video, rotate=90) as stream:
+        first = next(iter(stream))
+    assert first.shape[:2] == (64, 48)
+
+
+def test_stream_rejects_unknown_extension(tmp_path):
+    with pytest.raises(ValueError):
+        VideoFrameStream(str(tmp_path / "video.txt"))
+
+
+@pytest.mark.parametrize("decode_mode", ["read", "grab", "seek", "auto"])
+@pytest.mark.parametrize("sample_rate", [1, 3, 10])
+def test_decode_modes_extract_same_frames(tmp_path, decode_mode, sample_rate):
+    """Todos los modos de decodificación entregan los mismos fotogramas muestreados."""
+    video = str(tmp_path / "numbered.avi")
+    create_numbered_video(video)
+
+    with VideoFrameStream(video, sample_rate=sample_rate, rotate=0, decode_mode=decode_mode) as stream:
+        frames = list(stream)
+    assert _frame_ids(frames) == list(range(0, 30, sample_rate))
+
+
+def test_auto_mode_selects_seek_for_large_strides(tmp_path):
+    video = str(tmp_path / "numbered.avi")
+    create_numbered_video(video)
+
+    with VideoFrameStream(video, sample_rate=3, rotate=0, decode_mode="auto") as stream:
+        assert stream.decode_mode == "grab"
+    with VideoFrameStream(video, sample_rate=config.SEEK_MIN_STRIDE, rotate=0, decode_mode="auto") as stream:
+        assert stream.decode_mode == "seek"
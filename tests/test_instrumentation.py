@@ -0,0 +1,91 @@
+# tests/test_instrumentation.py
+
+import json
+import threading
+import time
+
+import cv2
+import numpy as np
+
+import src.pipeline
+from src import config
+from src.B_pose_estimation.estimators import BaseEstimator, EstimationResult
+from src.instrumentation import PipelineProfiler
+
+
+class SleepyEstimator(BaseEstimator):
+    """Estimador ficticio con un coste fijo por fotograma y landmarks constantes."""
+    def estimate(self, image):
+        time.sleep(0.005)
+        landmarks = np.full((33, 4), 0.5, dtype=np.float32)
+        return EstimationResult(landmarks=landmarks, world_landmarks=landmarks)
+
+    def close(self):
+        pass
+
+
+def test_profiler_accumulates_stages_across_threads():
+    profiler = PipelineProfiler()
+    assert list(profiler.timed_iter('lectura', range(5))) == [0, 1, 2, 3, 4]
+    work = profiler.timed('escritura', lambda: time.sleep(0.01))
+    thread = threading.Thread(target=lambda: [work() for _ in range(3)])
+    thread.start()
+    thread.join()
+    with profiler.stage('calculo', frames=100):
+        sum(i * i for i in range(20000))
+    for latency in (10.0, 20.0, 30.0):
+        profiler.record_latency('inferencia', latency)
+
+    summary = profiler.summary()
+    stages = summary['fases']
+    assert stages['lectura']['fotogramas'] == 5
+    assert stages['escritura']['fotogramas'] == 3 and stages['escritura']['wall_s'] >= 0.03
+    assert stages['escritura']['cpu_s'] < stages['escritura']['wall_s']       # Dormir no consume CPU
+    assert stages['calculo']['cpu_s'] > 0 and stages['calculo']['fps'] > 0
+    assert summary['latencias_ms']['inferencia']['p50'] == 20.0 and summary['latencias_ms']['inferencia']['n'] == 3
+    assert 'numpy' in summary['versiones']
+    json.dumps(summary)
+
+
+def test_pipeline_reports_every_stage(tmp_path, monkeypatch):
+    video = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(video, cv2.VideoWriter_fourcc(*'MJPG'), 30.0, (64, 48))
+    for idx in range(12):
+        writer.write(np.full((48, 64, 3), idx * 10, dtype=np.uint8))
+    writer.release()
+    monkeypatch.setattr(src.pipeline, 'build_estimator', lambda settings=None: SleepyEstimator())
+
+    settings = {'output_dir': str(tmp_path), 'use_cache': False, 'reuse_estimator': False,
+                'generate_debug_video': True, 'debug_mode': True}
+    results = src.pipeline.run_full_pipeline_in_memory(video, settings)
+    performance = results['metricas_rendimiento']
+
+    stages = performance['fases']
+    for stage in ('carga_estimador', 'extraccion', 'estimacion_pose', 'render_video', 'metricas', 'conteo',
+                  'escritura_datos'):
+        assert stage in stages
+    assert stages['extraccion']['fotogramas'] == stages['estimacion_pose']['fotogramas'] == 12
+    assert stages['estimacion_pose']['wall_s'] >= 12 * 0.005
+    assert performance['latencias_ms']['inferencia']['n'] == 12
+    assert performance['latencias_ms']['inferencia']['p50'] >= 5.0
+
+    with open(tmp_path / "clip" / "clip_rendimiento.json", encoding='utf-8') as f:
+        assert json.load(f)['fotogramas'] == 12
+
+
+def test_shared_memory_transport_reports_decode_and_latency(tmp_path, monkeypatch):
+    video = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(video, cv2.VideoWriter_fourcc(*'MJPG'), 30.0, (64, 48))
+    for idx in range(10):
+        writer.write(np.full((48, 64, 3), idx * 10, dtype=np.uint8))
+    writer.release()
+    monkeypatch.setattr(config, 'USE_3D_ANALYSIS', False)
+
+    settings = {'output_dir': str(tmp_path), 'use_cache': False, 'reuse_estimator': False, 'use_crop': False,
+                'workers': 2, 'frame_transport': 'shared_memory', 'use_catalog': False}
+    performance = src.pipeline.run_full_pipeline_in_memory(video, settings)['metricas_rendimiento']
+
+    stages = performance['fases']
+    assert stages['extraccion']['fotogramas'] == stages['estimacion_pose']['fotogramas'] == 10
+    assert stages['extraccion']['wall_s'] > 0 and stages['estimacion_pose']['wall_s'] > 0
+    assert performance['latencias_ms']['inferencia']['n'] == 10
@@ -0,0 +1,90 @@
+# tests/test_landmark_cache.py
+
+import os
+
+import numpy as np
+
+from src import config
+from src.B_pose_estimation.estimators import SessionLandmarks
+from src.E_storage.landmark_cache import LandmarkCache, hash_video_file, make_cache_key
+from src.pipeline import landmark_cache_dir, landmark_cache_params
+
+
+def _session(n_frames: int = 20, seed: int = 0) -> SessionLandmarks:
+    rng = np.random.default_rng(seed)
+    landmarks = rng.random((n_frames, 33, 4)).astype(np.float32)
+    landmarks[3] = np.nan                                  # Fotograma sin detección
+    return SessionLandmarks(
+        landmarks=landmarks,
+        world_landmarks=rng.random((n_frames, 33, 4)).astype(np.float32),
+        crop_boxes=np.tile(np.array([0, 0, 64, 48], dtype=np.float32), (n_frames, 1)),
+        fps=30.0,
+    )
+
+
+def test_roundtrip_preserves_arrays_and_metadata(tmp_path):
+    cache = LandmarkCache(str(tmp_path))
+    session = _session()
+    cache.put("k", session, {'video': 'clip.mp4', 'redetecciones_roi': {'fotogramas': 20}})
+
+    cached, metadata = cache.get("k")
+    np.testing.assert_array_equal(cached.landmarks, session.landmarks)   # NaN incluidos
+    np.testing.assert_array_equal(cached.world_landmarks, session.world_landmarks)
+    np.testing.assert_array_equal(cached.crop_boxes, session.crop_boxes)
+    assert cached.fps == 30.0
+    assert metadata == {'video': 'clip.mp4', 'redetecciones_roi': {'fotogramas': 20}}
+    assert cache.get("otra") is None
+
+
+def test_key_depends_on_content_and_params(tmp_path):
+    video = tmp_path / "a.mp4"
+    video.write_bytes(b"x" * 1000)
+    digest = hash_video_file(str(video))
+    moved = tmp_path / "b.mp4"
+    moved.write_bytes(b"x" * 1000)
+    assert hash_video_file(str(moved)) == digest                         # El nombre no cuenta
+
+    key = make_cache_key(digest, rotate=0, sample_rate=1)
+    assert key == make_cache_key(digest, sample_rate=1, rotate=0)
+    assert key != make_cache_key(digest, rotate=90, sample_rate=1)
+    video.write_bytes(b"x" * 999 + b"y")
+    assert make_cache_key(hash_video_file(str(video)), rotate=0, sample_rate=1) != key
+
+
+def test_lru_eviction_and_invalidation(tmp_path):
+    cache = LandmarkCache(str(tmp_path))
+    for i, key in enumerate(["aaaa-1", "aaaa-2", "bbbb-1"]):
+        path = cache.put(key, _session(200, seed=i))
+        os.utime(path, (1000 + i, 1000 + i))
+    entry_size = os.path.getsize(cache._path("aaaa-1"))
+
+    cache.get("aaaa-1")                                    # Pasa a ser la más reciente
+    cache.max_bytes = 2.5 * entry_size
+    assert cache.evict() == 1
+    assert "aaaa-2" not in cache and "aaaa-1" in cache and "bbbb-1" in cache
+
+    assert cache.invalidate_video("aaaa") == 1
+    assert cache.invalidate("aaaa-1") is False
+    assert cache.clear() == 1 and cache.size_bytes() == 0
+
+
+def test_corrupt_entry_is_discarded(tmp_path):
+    cache = LandmarkCache(str(tmp_path))
+    with open(cache._path("roto"), 'wb') as f:
+        f.write(b"no es un npz")
+    assert cache.get("roto") is None
+    assert "roto" not in cache
+
+
+def test_pipeline_key_follows_frame_access_and_cache_dir(monkeypatch):
+    monkeypatch.setattr(config, 'USE_3D_ANALYSIS', False)
+    params = lambda **settings: landmark_cache_params({'sample_rate': 30, **settings})
+    # 'seek' puede entregar otros fotogramas que el recorrido secuencial; 'read' y 'grab' no
+    assert params(decode_mode='seek') != params(decode_mode='grab')
+    assert params(decode_mode='read') == params(decode_mode='grab')
+    assert params(decode_mode='auto') == params(decode_mode='seek')
+    assert landmark_cache_params({'decode_mode': 'seek'})['decode_mode'] == 'secuencial'   # Paso 1: no salta
+
+    assert landmark_cache_dir({'output_dir': 'salida'}) == os.path.join('salida', config.LANDMARK_CACHE_DIRNAME)
+    assert landmark_cache_dir({'output_dir': 'salida', 'cache_dir': 'c'}) == 'c'
+    assert landmark_cache_dir({}) == config.LANDMARK_CACHE_DEFAULT_DIR
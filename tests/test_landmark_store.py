@@ -0,0 +1,76 @@
+# tests/test_landmark_store.py
+
+import cv2
+import numpy as np
+
+import src.pipeline
+from benchmarks.synthetic import synthetic_session
+from src import config
+from src.B_pose_estimation.replay import save_recording
+from src.E_storage.landmark_store import LandmarkStore
+
+
+def test_append_slice_and_reopen(tmp_path):
+    store = LandmarkStore(str(tmp_path), dtype='float16')
+    first, second = synthetic_session(40, seed=1, dropout=0.1), synthetic_session(25, fps=60.0, seed=2)
+    store.append('a', first, {'video': 'a.mp4', 'repeticiones': 1})
+    store.append('b', second, {'video': 'b.mp4', 'repeticiones': 0})
+    assert store.append('a', second)['fotogramas'] == 40          # Solo anexado: el id ya existe
+    assert store.total_frames == 65 and list(store) == ['a', 'b']
+
+    view = store.get('b', 5, 15)
+    assert isinstance(view.landmarks, np.memmap) and view.landmarks.dtype == np.float16
+    assert view.landmarks.shape == (10, 33, 4) and view.fps == 60.0
+    np.testing.assert_allclose(view.world_landmarks, second.world_landmarks[5:15], rtol=1e-3, atol=1e-3)
+
+    reopened = LandmarkStore(str(tmp_path), dtype='float32')      # Manda el dtype con el que se creó
+    loaded = reopened.load('a')
+    assert loaded.landmarks.dtype == np.float32
+    np.testing.assert_array_equal(np.isnan(loaded.landmarks), np.isnan(first.landmarks))
+    np.testing.assert_allclose(loaded.landmarks, first.landmarks, rtol=1e-3, atol=1e-3)
+    np.testing.assert_array_equal(loaded.crop_boxes, first.crop_boxes)
+    assert reopened.select(repeticiones=0) == ['b']
+
+
+def test_interrupted_append_is_discarded(tmp_path):
+    store = LandmarkStore(str(tmp_path))
+    store.append('a', synthetic_session(10, seed=1))
+    with open(tmp_path / "landmarks.dat", 'ab') as f:             # Datos sin línea en el índice
+        f.write(b'\x00' * 1000)
+    with open(tmp_path / "index.jsonl", 'ab') as f:               # Línea a medio escribir
+        f.write(b'{"id": "roto"')
+
+    other = LandmarkStore(str(tmp_path))
+    assert list(other) == ['a']
+    session = synthetic_session(10, seed=3)
+    other.append('b', session)
+    store.refresh()                                                # El primer objeto ve lo que anexó el otro
+    np.testing.assert_allclose(store.load('b').landmarks, session.landmarks, rtol=1e-3, atol=1e-3)
+    assert (tmp_path / "landmarks.dat").stat().st_size == 20 * 33 * 4 * store.dtype.itemsize
+
+
+def test_pipeline_archives_each_session_once(tmp_path):
+    video = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(video, cv2.VideoWriter_fourcc(*'MJPG'), 30.0, (64, 48))
+    for idx in range(30):
+        writer.write(np.full((48, 64, 3), idx, dtype=np.uint8))
+    writer.release()
+    session = synthetic_session(30, seed=4)
+    recording = save_recording(str(tmp_path / "sesion.npz"), session)
+    store_dir = str(tmp_path / "almacen")
+
+    # Lo reproducido no se archiva: no sale del estimador que describe la clave
+    src.pipeline.run_full_pipeline_in_memory(video, {'output_dir': str(tmp_path), 'replay_landmarks': recording,
+                                                     'landmark_store': store_dir})
+    assert not (tmp_path / "almacen" / "index.jsonl").exists()
+
+    cache_settings = {'output_dir': str(tmp_path), 'landmark_store': store_dir}
+    key = src.pipeline.make_cache_key(src.pipeline.hash_video_file(video),
+                                      **src.pipeline.landmark_cache_params(cache_settings))
+    src.pipeline.LandmarkCache(str(tmp_path / config.LANDMARK_CACHE_DIRNAME)).put(key, session)
+    for _ in range(2):
+        results = src.pipeline.run_full_pipeline_in_memory(video, cache_settings)
+        assert results['landmarks_desde_cache'] and results['sesion_almacen'] == key
+
+    store = LandmarkStore(store_dir)
+    assert list(store) == [key] and store.entry(key)['metadatos']['video'] == 'clip.avi'
@@ -0,0 +1,166 @@
+# tests/test_live.py
+
+import cv2
+import numpy as np
+import pytest
+
+from src.B_pose_estimation.estimators import BaseEstimator, EstimationResult
+from src.live import LiveAnalyzer, LatestFrameGrabber, latency_percentiles
+
+# Periodo de fotograma y costes exactos en binario: el reloj simulado no acumula error
+FPS = 32.0
+
+
+def _knee_angle_sequence(n_frames: int) -> np.ndarray:
+    """Tres sentadillas: 170° -> 60° -> 170° cada 40 fotogramas."""
+    t = np.arange(n_frames)
+    return 115 + 55 * np.cos(2 * np.pi * t / 40)
+
+
+def _frame(idx: int) -> np.ndarray:
+    """Fotograma cuyo brillo codifica su índice."""
+    return np.full((48, 64, 3), idx * 2, dtype=np.uint8)
+
+
+class FakeClock:
+    """Reloj simulado: solo avanza cuando se le pide (o al 'dormir')."""
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+class ScriptedGrabber:
+    """
+    Fuente en vivo simulada con la semántica de LatestFrameGrabber: get() entrega
+    el último fotograma "capturado" según el reloj simulado (los anteriores sin
+    leer se sobrescriben) y, si aún no hay uno nuevo, espera a que llegue.
+    """
+    def __init__(self, n_frames: int, clock: FakeClock):
+        self.n_frames = n_frames
+        self.clock = clock
+        self.fps = FPS
+        self.frames_captured = 0
+        self.frames_overwritten = 0
+        self._last = -1
+
+    def start(self):
+        return self
+
+    def get(self, timeout: float = 1.0):
+        if self._last == self.n_frames - 1:
+            return None
+        idx = min(int(self.clock() * self.fps), self.n_frames - 1)
+        if idx <= self._last:
+            idx = self._last + 1
+            self.clock.now = idx / self.fps
+        self.frames_overwritten += idx - self._last - 1
+        self.frames_captured = idx + 1
+        self._last = idx
+        return idx, idx / self.fps, _frame(idx)
+
+    def stop(self):
+        self.frames_captured = self.n_frames
+
+
+class ScriptedEstimator(BaseEstimator):
+    """Devuelve landmarks del mundo cuyo ángulo de rodilla sigue un guion; cada llamada cuesta 'cost_s' de reloj simulado."""
+    def __init__(self, angles, clock: FakeClock | None = None, cost_s: float = 0.0):
+        self.angles = angles
+        self.clock = clock
+        self.cost_s = cost_s
+        self.seen = []
+
+    def estimate(self, image):
+        idx = int(round(image[..., 0].mean() / 2))
+        self.seen.append(idx)
+        if self.clock is not None:
+            self.clock.advance(self.cost_s)
+        theta = np.radians(self.angles[idx])
+        world = np.zeros((33, 4), dtype=np.float32)
+        world[:, 3] = 1.0
+        world[23, :3] = (0.0, -1.0, 0.0)                             # Cadera
+        world[27, :3] = (np.sin(theta), -np.cos(theta), 0.0)         # Tobillo (rodilla en el origen)
+        return EstimationResult(world_landmarks=world)
+
+    def close(self):
+        pass
+
+
+def _analyzer(n_frames: int, cost_frames: int, **kwargs):
+    clock = FakeClock()
+    estimator = ScriptedEstimator(_knee_angle_sequence(n_frames), clock, cost_s=cost_frames / FPS)
+    analyzer = LiveAnalyzer(estimator=estimator, up_thresh=160, down_thresh=90, depth_fail_thresh=90,
+                            clock=clock, grabber_factory=lambda source, realtime, clock: ScriptedGrabber(n_frames, clock),
+                            **kwargs)
+    return analyzer, estimator
+
+
+def test_live_counts_reps_when_inference_keeps_up():
+    events = []
+    analyzer, estimator = _analyzer(120, cost_frames=0, on_event=events.append)
+    summary = analyzer.run(None)
+
+    assert estimator.seen == list(range(120))
+    assert summary['fotogramas_descartados'] == 0 and summary['descartados_por_latencia'] == 0
+    assert summary['repeticiones_contadas'] == 3
+    assert summary['fallos_detectados'] == []
+    assert [e['rep'] for e in events] == [1, 2, 3]
+    assert [e['t_s'] for e in events] == [e['frame_fin'] / FPS for e in events]
+    assert summary['latencia_ms']['p50'] == 0.0
+
+
+def test_live_drops_frames_when_inference_falls_behind():
+    # Cada inferencia dura 3 fotogramas: se analiza siempre el más reciente y se saltan los intermedios
+    analyzer, estimator = _analyzer(120, cost_frames=3)
+    summary = analyzer.run(None)
+
+    assert estimator.seen == list(range(0, 118, 3)) + [119]
+    assert summary['fotogramas_capturados'] == 120
+    assert summary['fotogramas_procesados'] == 41 and summary['fotogramas_descartados'] == 79
+    # Sin cola: la latencia es la de una inferencia, no crece con la duración
+    assert summary['latencia_ms']['p90'] == pytest.approx(3 / FPS * 1000.0)
+    assert summary['repeticiones_contadas'] == 3
+
+
+def test_live_discards_frames_over_the_latency_budget():
+    # El último fotograma (11) llega un periodo tarde (31.25 ms) porque la inferencia del 9 lo tapa
+    analyzer, estimator = _analyzer(12, cost_frames=3, latency_budget_ms=20.0)
+    summary = analyzer.run(None)
+
+    assert estimator.seen == [0, 3, 6, 9]
+    assert summary['descartados_por_latencia'] == 1
+    assert summary['fotogramas_procesados'] == 4 and summary['fotogramas_descartados'] == 8
+
+
+def _write_clip(path, n_frames: int) -> str:
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'MJPG'), FPS, (64, 48))
+    for idx in range(n_frames):
+        writer.write(_frame(idx))
+    writer.release()
+    return str(path)
+
+
+def test_latest_frame_grabber_overwrites_unread_frames(tmp_path):
+    video = _write_clip(tmp_path / "clip.avi", 20)
+    grabber = LatestFrameGrabber(video, realtime=False).start()
+    assert grabber.wait_finished(timeout=10)
+    item = grabber.get()
+    assert item[0] == 19 and grabber.frames_overwritten == 19
+    assert grabber.get() is None
+    grabber.stop()
+    assert latency_percentiles([])['p50'] is None
+
+
+def test_latest_frame_grabber_paces_files_at_realtime(tmp_path):
+    video = _write_clip(tmp_path / "clip.avi", 8)
+    clock = FakeClock()
+    grabber = LatestFrameGrabber(video, clock=clock, sleep=clock.advance).start()   # Fichero: ritmo real
+    assert grabber.realtime and grabber.wait_finished(timeout=10)
+    grabber.stop()
+    assert clock.now == 7 / FPS                 # El último fotograma se captura en su instante, no antes
+    assert grabber.frames_captured == 8
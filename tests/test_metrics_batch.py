@@ -0,0 +1,76 @@
+# tests/test_metrics_batch.py
+
+import numpy as np
+import pandas as pd
+
+from src.B_pose_estimation.metrics import (
+    calculate_angle,
+    calculate_angle_batch,
+    calculate_angular_velocity,
+    calculate_distances,
+    calculate_metrics_batch,
+    calculate_symmetry,
+    extract_joint_angles,
+    normalize_landmarks,
+)
+
+
+def _scalar_metrics(sequence: np.ndarray, fps: float) -> pd.DataFrame:
+    """Cálculo original fotograma a fotograma con las funciones escalares, como referencia."""
+    all_metrics = []
+    for idx, frame in enumerate(sequence):
+        row = {"frame_idx": idx}
+        if np.isnan(frame[:, 0]).any():
+            row.update({'rodilla_izq': np.nan, 'rodilla_der': np.nan, 'codo_izq': np.nan, 'codo_der': np.nan,
+                        'anchura_hombros': np.nan, 'separacion_pies': np.nan})
+        else:
+            norm_lm = normalize_landmarks([{'x': x, 'y': y, 'z': z, 'visibility': v} for x, y, z, v in frame])
+            row.update(extract_joint_angles(norm_lm))
+            row.update(calculate_distances(norm_lm))
+        all_metrics.append(row)
+    dfm = pd.DataFrame(all_metrics)
+    dfm_filled = dfm.ffill().bfill()
+    for col in ['rodilla_izq', 'rodilla_der', 'codo_izq', 'codo_der']:
+        dfm[f"vel_ang_{col}"] = calculate_angular_velocity(dfm_filled[col].tolist(), fps)
+    dfm["sim_rodilla"] = dfm.apply(lambda r: calculate_symmetry(r['rodilla_izq'], r['rodilla_der']), axis=1)
+    dfm["sim_codo"] = dfm.apply(lambda r: calculate_symmetry(r['codo_izq'], r['codo_der']), axis=1)
+    return dfm
+
+
+def _random_sequence(n_frames: int = 200, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    sequence = rng.random((n_frames, 33, 4))
+    sequence[rng.random(n_frames) < 0.1, 3, 0] = np.nan   # Fotogramas incompletos
+    sequence[7:9, 3, 0] = 0.5                              # Los fotogramas 7 y 8 sí están completos
+    sequence[7, 13] = sequence[7, 11]                      # Vector nulo en el codo izquierdo
+    sequence[8, [23, 25, 27]] = sequence[8, 25]            # Rodilla izquierda degenerada
+    return sequence
+
+
+def test_batch_metrics_match_scalar_functions():
+    sequence = _random_sequence()
+    result = calculate_metrics_batch(sequence, fps=30.0)
+    expected = _scalar_metrics(sequence, fps=30.0)
+
+    assert list(result.columns) == list(expected.columns)
+    pd.testing.assert_frame_equal(result, expected, check_exact=False, rtol=1e-9, atol=1e-9)
+    assert result.loc[7, 'codo_izq'] == 0.0
+    assert result.loc[8, 'rodilla_izq'] == 0.0
+
+
+def test_batch_metrics_edge_cases():
+    assert calculate_metrics_batch(np.empty((0, 33, 4)), fps=30.0).empty
+
+    sequence = _random_sequence(n_frames=12, seed=1)
+    result = calculate_metrics_batch(sequence, fps=0)
+    expected = _scalar_metrics(sequence, fps=0)
+    pd.testing.assert_frame_equal(result, expected, check_exact=False, rtol=1e-9, atol=1e-9)
+    assert (result['vel_ang_rodilla_izq'] == 0).all()
+
+
+def test_angle_batch_matches_scalar_angle():
+    rng = np.random.default_rng(2)
+    points = rng.random((50, 3, 2))
+    batch = calculate_angle_batch(points[:, 0], points[:, 1], points[:, 2])
+    scalar = [calculate_angle(*({'x': x, 'y': y} for x, y in triplet)) for triplet in points]
+    np.testing.assert_allclose(batch, scalar, rtol=1e-12)
@@ -0,0 +1,37 @@
+# tests/test_parallel.py
+
+import multiprocessing as mp
+import os
+
+import numpy as np
+
+from src.B_pose_estimation import parallel
+from src.B_pose_estimation.estimators import BaseEstimator, EstimationResult
+from src.B_pose_estimation.parallel import ParallelPoseEstimator
+
+
+class IndexEstimator(BaseEstimator):
+    """Estimador barato y serializable: devuelve el índice codificado en el fotograma y el PID que lo procesó."""
+    def estimate(self, image):
+        landmarks = np.full((33, 4), image[0, 0, 0], dtype=np.float32)
+        landmarks[0, 3] = os.getpid()
+        return EstimationResult(landmarks=landmarks)
+
+    def close(self):
+        pass
+
+
+def test_estimate_many_preserves_order_across_workers(monkeypatch):
+    # El control de estimadores estáticos se hace en el proceso padre; los hijos solo construyen la clase
+    monkeypatch.setattr(parallel, 'STATIC_ESTIMATORS', (IndexEstimator,))
+    frames = [np.full((4, 4, 3), idx, dtype=np.uint8) for idx in range(23)]
+
+    estimator = ParallelPoseEstimator(IndexEstimator, workers=2, chunk_size=3, max_pending=2)
+    try:
+        results = list(estimator.estimate_many(iter(frames)))
+    finally:
+        estimator.close()
+
+    assert [int(r.landmarks[1, 0]) for r in results] == list(range(23))
+    assert os.getpid() not in {int(r.landmarks[0, 3]) for r in results}     # Inferencia fuera del padre
+    assert mp.active_children() == []
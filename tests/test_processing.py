@@ -0,0 +1,84 @@
+# tests/test_processing.py
+
+import numpy as np
+import pandas as pd
+
+from src.B_pose_estimation.processing import filter_and_interpolate_landmarks, landmarks_to_dataframe
+
+
+def _legacy_filter_and_interpolate(df_raw: pd.DataFrame, min_confidence: float = 0.5):
+    """Implementación original (bucle iterrows + listas de diccionarios), como referencia."""
+    n_frames, n_points = len(df_raw), 33
+    arr = np.full((n_frames, n_points, 4), np.nan, dtype=float)
+    for t, (_, row) in enumerate(df_raw.iterrows()):
+        for i in range(n_points):
+            visibility = row.get(f"v{i}", np.nan)
+            if pd.notna(visibility) and visibility >= min_confidence:
+                arr[t, i, 0], arr[t, i, 1], arr[t, i, 2], arr[t, i, 3] = row.get(f"x{i}"), row.get(f"y{i}"), row.get(f"z{i}"), visibility
+    for i in range(n_points):
+        valid_indices = np.where(~np.isnan(arr[:, i, 0]))[0]
+        if len(valid_indices) > 1:
+            interp_indices = np.arange(n_frames)
+            for j in range(3):
+                arr[:, i, j] = np.interp(interp_indices, valid_indices, arr[valid_indices, i, j])
+    filtered_sequence = []
+    for t in range(n_frames):
+        filtered_sequence.append([{'x': arr[t, i, 0], 'y': arr[t, i, 1], 'z': arr[t, i, 2],
+                                   'visibility': arr[t, i, 3] if pd.notna(arr[t, i, 3]) else 0.0}
+                                  for i in range(n_points)])
+    return np.array(filtered_sequence, dtype=object)
+
+
+def _legacy_as_array(sequence: np.ndarray) -> np.ndarray:
+    return np.array([[[lm['x'], lm['y'], lm['z'], lm['visibility']] for lm in frame] for frame in sequence],
+                    dtype=float)
+
+
+def _random_session(n_frames: int = 120, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    landmarks = rng.random((n_frames, 33, 4)).astype(np.float32)
+    landmarks[rng.random(n_frames) < 0.1] = np.nan      # Fotogramas sin detección
+    landmarks[:, 5, 3] = 0.1                             # Landmark nunca visible
+    landmarks[:, 6, 3] = 0.1
+    landmarks[n_frames // 2, 6, 3] = 0.9                 # Un único fotograma válido
+    crop_boxes = rng.random((n_frames, 4)) * 100
+    return landmarks_to_dataframe(landmarks, crop_boxes)
+
+
+def test_vectorized_filter_matches_legacy_loop():
+    df_raw = _random_session()
+    sequence, crop_coords = filter_and_interpolate_landmarks(df_raw)
+    expected = _legacy_as_array(_legacy_filter_and_interpolate(df_raw))
+
+    assert sequence.shape == (len(df_raw), 33, 4)
+    assert sequence.dtype == float
+    np.testing.assert_allclose(sequence, expected, rtol=1e-12, atol=1e-12, equal_nan=True)
+    assert np.array_equal(crop_coords, df_raw[['crop_x1', 'crop_y1', 'crop_x2', 'crop_y2']].to_numpy())
+
+
+def test_filter_handles_missing_columns_and_edges():
+    """Sin columnas de recorte ni de un landmark; los extremos replican el valor válido más cercano."""
+    df_raw = _random_session(n_frames=30, seed=1).drop(columns=['crop_x1', 'crop_y1', 'crop_x2', 'crop_y2', 'v7'])
+    df_raw.loc[:4, 'v0'] = 0.0
+    df_raw.loc[25:, 'v0'] = 0.0
+    df_raw.loc[5:24, 'v0'] = 1.0
+    sequence, crop_coords = filter_and_interpolate_landmarks(df_raw)
+    expected = _legacy_as_array(_legacy_filter_and_interpolate(df_raw))
+
+    assert crop_coords is None
+    assert np.isnan(sequence[:, 7, :3]).all() and (sequence[:, 7, 3] == 0).all()
+    assert (sequence[:5, 0, 0] == df_raw.loc[5, 'x0']).all()
+    np.testing.assert_allclose(sequence, expected, rtol=1e-12, atol=1e-12, equal_nan=True)
+
+
+def test_vectorized_filter_matches_legacy_loop_on_long_session():
+    """La velocidad se mide en la fase 'filtrado' de benchmarks/bench_suite.py, no aquí."""
+    df_raw = _random_session(n_frames=400, seed=2)
+    sequence, _ = filter_and_interpolate_landmarks(df_raw)
+    expected = _legacy_as_array(_legacy_filter_and_interpolate(df_raw))
+    np.testing.assert_allclose(sequence, expected, rtol=1e-12, atol=1e-12, equal_nan=True)
+
+    # Un único fotograma válido: conserva su valor ahí y el resto queda a NaN
+    only = 200
+    assert sequence[only, 6, 0] == df_raw.loc[only, 'x6']
+    assert np.isnan(np.delete(sequence[:, 6, 0], only)).all()
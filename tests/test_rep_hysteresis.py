@@ -0,0 +1,67 @@
+# tests/test_rep_hysteresis.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.D_modeling.analysis_3d import count_reps_3d
+from src.D_modeling.count_reps import detect_reps_hysteresis
+
+
+def _state_machine(angles, up_thresh, down_thresh):
+    """Máquina de estados original de count_reps_3d, ampliada con inicio/fondo/fin, como referencia."""
+    reps, state = [], 'up'
+    for i, angle in enumerate(angles):
+        if state == 'up' and angle < down_thresh:
+            state, start, bottom, min_angle = 'down', i, i, angle
+        elif state == 'down':
+            if angle < min_angle:
+                bottom, min_angle = i, angle
+            if angle > up_thresh:
+                reps.append((start, bottom, i, min_angle))
+                state = 'up'
+    return reps
+
+
+def _squat_series(n_reps: int = 12, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    depths = rng.uniform(60, 120, n_reps)
+    cycles = [d + (175 - d) * (0.5 + 0.5 * np.cos(np.linspace(0, 2 * np.pi, 40))) for d in depths]
+    series = np.concatenate(cycles)
+    return series + rng.normal(0, 4, len(series))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_hysteresis_matches_state_machine(seed):
+    angles = _squat_series(seed=seed)
+    reps = detect_reps_hysteresis(angles, up_thresh=160, down_thresh=100)
+    expected = _state_machine(angles, up_thresh=160, down_thresh=100)
+
+    assert len(reps) == len(expected)
+    assert list(reps['frame_inicio']) == [r[0] for r in expected]
+    assert list(reps['frame_fondo']) == [r[1] for r in expected]
+    assert list(reps['frame_fin']) == [r[2] for r in expected]
+    np.testing.assert_array_equal(reps['angulo_minimo'], [r[3] for r in expected])
+
+
+def test_hysteresis_edge_cases():
+    assert detect_reps_hysteresis([], 160, 90).empty
+    assert detect_reps_hysteresis([170, 150, 120, 150], 160, 90).empty
+    # La última bajada no termina: no cuenta
+    reps = detect_reps_hysteresis([170, 80, 70, 170, 80, 60], 160, 90, frame_index=np.arange(10, 16))
+    assert list(reps['frame_inicio']) == [11] and list(reps['frame_fondo']) == [12] and list(reps['frame_fin']) == [13]
+    # Empieza ya abajo
+    reps = detect_reps_hysteresis([70, 75, 170], 160, 90)
+    assert list(reps['frame_inicio']) == [0]
+    with pytest.raises(ValueError):
+        detect_reps_hysteresis([170, 80], up_thresh=80, down_thresh=160)
+
+
+def test_count_reps_3d_reports_faults_and_frames():
+    angles = np.array([170, 85, 80, 170, 120, 95, 170, np.nan, 60, 170], dtype=float)
+    df = pd.DataFrame({'frame_idx': np.arange(len(angles)) * 2, 'rodilla_izq': angles})
+    n_reps, faults, reps = count_reps_3d(df, up_thresh=160, down_thresh=100, depth_fail_thresh=90)
+
+    assert n_reps == 3
+    assert list(reps['frame_fondo']) == [4, 10, 16]
+    assert [(f['rep'], f['frame']) for f in faults] == [(2, 10)]
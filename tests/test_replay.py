@@ -0,0 +1,96 @@
+# tests/test_replay.py
+
+import cv2
+import numpy as np
+import pandas as pd
+
+import src.pipeline
+from benchmarks.synthetic import synthetic_session
+from src import config
+from src.B_pose_estimation.estimators import BaseEstimator, EstimationResult
+from src.B_pose_estimation.replay import RecordingEstimator, ReplayEstimator, save_recording
+
+
+class SessionEstimator(BaseEstimator):
+    """Estimador ficticio que devuelve, en orden, los fotogramas de una sesión sintética."""
+    def __init__(self, session):
+        self.session = session
+        self.index = 0
+        self.closed = False
+
+    def estimate(self, image):
+        idx, self.index = self.index, self.index + 1
+        if np.isnan(self.session.landmarks[idx, 0, 0]):
+            return EstimationResult()
+        return EstimationResult(landmarks=self.session.landmarks[idx].copy(),
+                                world_landmarks=self.session.world_landmarks[idx].copy(),
+                                crop_box=[1, 2, 30, 40], roi_redetected=idx % 5 == 0)
+
+    def close(self):
+        self.closed = True
+
+
+def _write_clip(path, n_frames):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 30.0, (64, 48))
+    for idx in range(n_frames):
+        writer.write(np.full((48, 64, 3), idx % 255, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+def test_recording_roundtrip(tmp_path):
+    session = synthetic_session(40, dropout=0.1, seed=1)
+    path = str(tmp_path / "grabacion.npz")
+    recorder = RecordingEstimator(SessionEstimator(session), output_path=path, fps=30.0)
+    recorded = list(recorder.estimate_many([None] * 40))
+    recorder.close()
+    assert recorder.estimator.closed
+
+    replay = ReplayEstimator(path)
+    assert len(replay) == 40 and replay.fps == 30.0
+    for _ in range(2):                                   # reset() vuelve al principio
+        for original in recorded:
+            result = replay.estimate(None)
+            assert (result.landmarks is None) == (original.landmarks is None)
+            if original.landmarks is not None:
+                np.testing.assert_array_equal(result.landmarks, original.landmarks)
+                np.testing.assert_array_equal(result.world_landmarks, original.world_landmarks)
+                assert result.crop_box == [1, 2, 30, 40]
+            assert result.roi_redetected == original.roi_redetected
+        replay.reset()
+    for _ in range(40):
+        replay.estimate(None)
+    assert replay.estimate(None).landmarks is None       # Más allá de la grabación
+
+
+def test_pipeline_replays_recorded_session(tmp_path, monkeypatch):
+    session = synthetic_session(90, seed=2)
+    video = _write_clip(str(tmp_path / "clip.avi"), 90)
+    recording = str(tmp_path / "sesion.npz")
+    monkeypatch.setattr(config, 'USE_3D_ANALYSIS', True)
+    monkeypatch.setattr(src.pipeline, 'build_estimator', lambda settings=None: SessionEstimator(session))
+    base = {'output_dir': str(tmp_path), 'use_cache': False, 'reuse_estimator': False}
+    original = src.pipeline.run_full_pipeline_in_memory(video, {**base, 'record_landmarks': recording})
+
+    monkeypatch.undo()
+    monkeypatch.setattr(config, 'USE_3D_ANALYSIS', True)     # Reproducir el 3D no necesita el modelo
+    replayed = src.pipeline.run_full_pipeline_in_memory(video, {**base, 'replay_landmarks': recording,
+                                                               'use_cache': True})
+    pd.testing.assert_frame_equal(replayed['dataframe_metricas'], original['dataframe_metricas'])
+    assert replayed['repeticiones_contadas'] == original['repeticiones_contadas'] > 0
+    assert 'extraccion' not in replayed['metricas_rendimiento']['fases']       # El vídeo no se decodifica
+    assert not replayed['landmarks_desde_cache'] and not (tmp_path / config.LANDMARK_CACHE_DIRNAME).exists()
+
+
+def test_replay_reads_a_rewritten_recording(tmp_path, monkeypatch):
+    video = _write_clip(str(tmp_path / "clip.avi"), 60)
+    recording = str(tmp_path / "sesion.npz")
+    monkeypatch.setattr(config, 'USE_3D_ANALYSIS', True)
+    settings = {'output_dir': str(tmp_path), 'replay_landmarks': recording, 'reuse_estimator': True}
+    replayed = []
+    for seed in (3, 4):                                  # Misma ruta, grabación distinta
+        save_recording(recording, synthetic_session(60, seed=seed))
+        results = src.pipeline.run_full_pipeline_in_memory(video, settings)
+        replayed.append(results['landmarks_sesion'].world_landmarks)
+    np.testing.assert_allclose(replayed[1], synthetic_session(60, seed=4).world_landmarks, rtol=1e-6)
+    assert not np.allclose(replayed[0], replayed[1], equal_nan=True)
@@ -0,0 +1,94 @@
+# tests/test_roi_tracking.py
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src.B_pose_estimation import estimators
+from src.B_pose_estimation.estimators import CroppedPoseEstimator
+
+IMAGE = np.zeros((100, 100, 3), dtype=np.uint8)
+
+
+class ScriptedPose:
+    """Sustituto de mediapipe Pose: process() devuelve los resultados encolados en orden."""
+    def __init__(self, **kwargs):
+        self.queue = []
+        self.calls = 0
+
+    def process(self, image):
+        self.calls += 1
+        return self.queue.pop(0)
+
+    def close(self):
+        pass
+
+
+def _results(x=(0.25, 0.75), y=(0.25, 0.75), visibility=0.9):
+    """Resultado con la mitad de los 33 landmarks en una esquina de la caja y la otra mitad en la opuesta."""
+    landmarks = [SimpleNamespace(x=x[i % 2], y=y[i % 2], z=0.0, visibility=visibility) for i in range(33)]
+    return SimpleNamespace(pose_landmarks=SimpleNamespace(landmark=landmarks))
+
+
+NO_POSE = SimpleNamespace(pose_landmarks=None)
+
+
+@pytest.fixture
+def estimator(monkeypatch):
+    monkeypatch.setattr(estimators, 'Pose', ScriptedPose)
+    # Sin margen ni suavizado las cajas se calculan a mano: cuerpo en [20, 10, 60, 90]
+    estimator = CroppedPoseEstimator(crop_margin=0.0, track_roi=True, min_track_visibility=0.5, roi_smoothing=0.0)
+    estimator.pose_full.queue.append(_results(x=(0.2, 0.6), y=(0.1, 0.9)))
+    estimator.pose_crop.queue.append(_results())
+    first = estimator.estimate(IMAGE)
+    assert first.roi_redetected and first.crop_box == [20, 10, 60, 90]
+    # Landmarks del recorte en 0.25/0.75 -> caja seguida [30, 30, 50, 70] en la imagen completa
+    assert estimator._tracked_box == [30.0, 30.0, 50.0, 70.0]
+    return estimator
+
+
+def test_tracked_box_is_reused_without_full_frame_pass(estimator):
+    estimator.pose_crop.queue.append(_results())
+    result = estimator.estimate(IMAGE)
+
+    assert estimator.pose_full.calls == 1 and estimator.pose_crop.calls == 2
+    assert not result.roi_redetected and result.crop_box == [30, 30, 50, 70]
+    assert result.landmarks.shape == (33, 4)
+
+
+def test_low_visibility_triggers_redetection(estimator):
+    estimator.pose_crop.queue.extend([_results(visibility=0.2), _results()])
+    estimator.pose_full.queue.append(_results(x=(0.1, 0.5), y=(0.1, 0.9)))
+    result = estimator.estimate(IMAGE)
+
+    assert estimator.pose_full.calls == 2 and estimator.pose_crop.calls == 3
+    assert result.roi_redetected and result.crop_box == [10, 10, 50, 90]
+    assert estimator._tracked_box == [20.0, 30.0, 40.0, 70.0]
+
+
+def test_losing_landmarks_clears_tracked_box(estimator):
+    # El recorte seguido no encuentra a nadie y la imagen completa tampoco
+    estimator.pose_crop.queue.append(NO_POSE)
+    estimator.pose_full.queue.append(NO_POSE)
+    result = estimator.estimate(IMAGE)
+
+    assert result.landmarks is None and result.roi_redetected
+    assert estimator._tracked_box is None
+
+    # Con la caja perdida, el siguiente fotograma vuelve a pasar por la imagen completa
+    estimator.pose_full.queue.append(_results(x=(0.2, 0.6), y=(0.1, 0.9)))
+    estimator.pose_crop.queue.append(NO_POSE)
+    result = estimator.estimate(IMAGE)
+    assert estimator.pose_full.calls == 3 and result.roi_redetected
+    assert result.landmarks is None and estimator._tracked_box is None
+
+
+def test_reset_forgets_tracked_box(estimator):
+    estimator.reset()
+    assert estimator._tracked_box is None
+
+    estimator.pose_full.queue.append(_results(x=(0.2, 0.6), y=(0.1, 0.9)))
+    estimator.pose_crop.queue.append(_results())
+    result = estimator.estimate(IMAGE)
+    assert estimator.pose_full.calls == 2 and result.roi_redetected and result.crop_box == [20, 10, 60, 90]
@@ -0,0 +1,96 @@
+# tests/test_run_pipeline.py
+
+import csv
+
+import numpy as np
+import pytest
+
+import src.pipeline
+from src.run_pipeline import discover_videos, main, read_manifest, run_batch
+
+
+def _fake_pipeline(calls):
+    """Sustituto de run_full_pipeline_in_memory: falla con los vídeos 'roto*' y registra las llamadas."""
+    def run(video_path, settings, progress_callback=None):
+        calls.append((video_path, settings['low_thresh']))
+        if 'roto' in video_path:
+            raise IOError(f"No se pudo abrir el vídeo: {video_path}")
+        return {
+            'repeticiones_contadas': 3,
+            'fallos_detectados': [{'rep': 2, 'type': 'Poca Profundidad', 'value': '95.0', 'frame': 40}],
+            'landmarks_sesion': np.zeros((12, 33, 4)),
+            'landmarks_desde_cache': False,
+        }
+    return run
+
+
+def _make_inputs(tmp_path):
+    videos = tmp_path / "videos"
+    (videos / "sub").mkdir(parents=True)
+    for name in ("a.mp4", "sub/b.MOV", "notas.txt"):
+        (videos / name).write_bytes(b"0" * 10)
+    return videos
+
+
+def test_discovery_and_manifests(tmp_path):
+    videos = _make_inputs(tmp_path)
+    assert [p.replace(str(videos), '') for p in discover_videos(str(videos))] == ['/a.mp4', '/sub/b.MOV']
+
+    (tmp_path / "lote.txt").write_text("# nocturno\nvideos/a.mp4\n\n/abs/c.mp4\n")
+    assert read_manifest(str(tmp_path / "lote.txt")) == [(str(tmp_path / "videos/a.mp4"), {}), ("/abs/c.mp4", {})]
+
+    with open(tmp_path / "lote.csv", 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['video', 'low_thresh', 'workers', 'use_crop'])
+        writer.writerow(['videos/a.mp4', '70', '2', 'true'])
+        writer.writerow(['videos/sub/b.MOV', '', '', ''])
+    entries = read_manifest(str(tmp_path / "lote.csv"))
+    assert entries[0][1] == {'low_thresh': 70.0, 'workers': 2, 'use_crop': True}
+    assert entries[1][1] == {}
+
+
+def test_batch_resumes_and_reports_failures(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(src.pipeline, 'run_full_pipeline_in_memory', _fake_pipeline(calls))
+    videos = _make_inputs(tmp_path)
+    out = tmp_path / "out"
+    args = [str(videos), '--output_dir', str(out), '--jobs', '1', '--quiet']
+
+    assert main(args) == 0
+    assert len(calls) == 2
+    with open(out / "batch_summary.csv", newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert [(r['estado'], r['repeticiones'], r['fallos'], r['fotogramas']) for r in rows] == [('ok', '3', '1', '12')] * 2
+    assert (out / "counts" / "a_count.txt").read_text() == "3\n"
+
+    # Relanzar no repite nada; cambiar un umbral sí
+    assert main(args) == 0 and len(calls) == 2
+    assert main(args + ['--low_thresh', '70']) == 0 and len(calls) == 4
+
+    # Un vídeo roto y uno inexistente: el resto se analiza y la salida es 1
+    (videos / "roto.mp4").write_bytes(b"x")
+    assert main(args + ['--low_thresh', '70', '--video', str(tmp_path / "no_existe.mp4")]) == 1
+    assert calls[-1][0].endswith("roto.mp4") and len(calls) == 5
+    with open(out / "batch_summary.csv", newline='') as f:
+        states = {r['video'].rsplit('/', 1)[-1]: r['estado'] for r in csv.DictReader(f)}
+    assert states == {'no_existe.mp4': 'error', 'a.mp4': 'omitido', 'b.MOV': 'omitido', 'roto.mp4': 'error'}
+
+
+def test_same_named_videos_get_separate_outputs(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(src.pipeline, 'run_full_pipeline_in_memory', _fake_pipeline(calls))
+    videos = tmp_path / "videos"
+    for folder in ("a", "b"):
+        (videos / folder).mkdir(parents=True)
+        (videos / folder / "clip.mp4").write_bytes(folder.encode() * 10)
+    out = tmp_path / "out"
+
+    assert main([str(videos), '--output_dir', str(out), '--jobs', '1', '--quiet']) == 0
+    assert (out / "a" / "clip" / "clip_summary.json").exists() and (out / "b" / "clip" / "clip_summary.json").exists()
+    assert main([str(videos), '--output_dir', str(out), '--jobs', '1', '--quiet']) == 0 and len(calls) == 2
+
+    # Sin carpeta de entrada común (manifiesto), los mismos nombres chocarían: el lote no arranca
+    (tmp_path / "lote.txt").write_text("videos/a/clip.mp4\nvideos/b/clip.mp4\n")
+    with pytest.raises(ValueError, match="misma carpeta de sesión"):
+        run_batch([(path, {'output_dir': str(out)}) for path, _ in read_manifest(str(tmp_path / "lote.txt"))])
+    assert len(calls) == 2
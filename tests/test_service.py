@@ -0,0 +1,84 @@
+# tests/test_service.py
+
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.service import AnalysisClient, AnalysisService, make_server
+
+
+class GatedRunner:
+    """Sustituto del pipeline: informa de progreso y espera a que el test lo deje terminar."""
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = threading.Event()
+
+    def __call__(self, video_path, settings, progress_callback=None):
+        progress_callback(40)
+        self.started.set()
+        self.release.wait(5)
+        if video_path == 'roto.mp4':
+            raise IOError("No se pudo abrir el vídeo")
+        return {
+            'repeticiones_contadas': 2,
+            'fallos_detectados': [],
+            'detalle_repeticiones': pd.DataFrame({'rep': [1, 2], 'angulo_minimo': [np.float32(70.5), 80.0]}),
+            'dataframe_metricas': pd.DataFrame({'frame_idx': [0, 1], 'rodilla_izq': [170.0, np.nan]}),
+            'fotogramas': None,
+            'landmarks_sesion': object(),
+        }
+
+
+@pytest.fixture
+def running_service():
+    runner = GatedRunner()
+    service = AnalysisService(workers=1, queue_size=1, max_retained=1, runner=runner)
+    server = make_server(service, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield runner, service, AnalysisClient(f"http://127.0.0.1:{server.server_address[1]}")
+    runner.release.set()
+    server.shutdown()
+    server.server_close()
+    service.shutdown()
+
+
+def test_submit_progress_and_result(running_service):
+    runner, service, client = running_service
+    assert client.is_alive()
+    job = client.submit('clip.mp4', {'low_thresh': 90})
+    assert runner.started.wait(5)
+    status = client.status(job['id'])
+    assert (status['estado'], status['progreso']) == ('procesando', 40)
+    with pytest.raises(RuntimeError, match="no ha terminado"):
+        client.result(job['id'])
+
+    runner.release.set()
+    assert client.wait(job['id'], poll_s=0.01)['estado'] == 'completado'
+    result = client.result(job['id'])
+    assert result['repeticiones_contadas'] == 2 and 'metricas' not in result
+    assert result['detalle_repeticiones'] == {'rep': [1, 2], 'angulo_minimo': [70.5, 80.0]}
+    assert client.result(job['id'], include_metrics=True)['metricas'] == {'frame_idx': [0, 1], 'rodilla_izq': [170.0, None]}
+
+
+def test_bounded_queue_failures_and_retention(running_service):
+    runner, service, client = running_service
+    first = client.submit('roto.mp4')
+    assert runner.started.wait(5)
+    second = client.submit('clip.mp4')                 # Ocupa el único hueco de la cola
+    with pytest.raises(RuntimeError, match="Cola llena"):
+        client.submit('otro.mp4')
+
+    runner.release.set()
+    assert client.wait(second['id'], poll_s=0.01)['estado'] == 'completado'
+    # Solo se retiene un trabajo terminado: el fallido (más antiguo) se ha olvidado
+    assert client.status(first['id']) == {'error': "Trabajo desconocido o caducado"}
+    assert service.stats()['retenidos'] == 1
+
+
+def test_failed_job_reports_error():
+    service = AnalysisService(workers=1, runner=lambda *a, **k: 1 / 0)
+    job = service.submit('clip.mp4')
+    service.shutdown()
+    assert job.estado == 'error' and job.error.startswith('ZeroDivisionError')
@@ -0,0 +1,89 @@
+# tests/test_session_catalog.py
+
+import cv2
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.pipeline
+from benchmarks.synthetic import synthetic_session
+from src import config
+from src.B_pose_estimation.replay import save_recording
+from src.E_storage.session_catalog import SessionCatalog
+
+
+def _results(n_reps, faults):
+    rep_details = pd.DataFrame({'rep': range(1, n_reps + 1), 'frame_inicio': [i * 30 for i in range(n_reps)],
+                                'frame_fondo': [i * 30 + 15 for i in range(n_reps)],
+                                'frame_fin': [i * 30 + 30 for i in range(n_reps)],
+                                'angulo_minimo': [80.0 + i for i in range(n_reps)]})
+    return {'repeticiones_contadas': n_reps, 'fallos_detectados': faults, 'detalle_repeticiones': rep_details,
+            'umbrales': {'high_thresh': 160.0}, 'landmarks_sesion': synthetic_session(2, fps=30.0),
+            'metricas_rendimiento': {'modo': '3D', 'fotogramas': 30 * n_reps, 'total_wall_s': 1.5, 'fases': {}}}
+
+
+def test_record_replace_and_filter(tmp_path):
+    shallow = {'rep': 2, 'type': 'Poca Profundidad', 'frame': 45, 'value': '95.0°'}
+    valgus = {'rep': 2, 'type': 'Valgo', 'frame': 40, 'value': '12.0°'}
+    with SessionCatalog(str(tmp_path / "catalogo.sqlite")) as catalog:
+        first = catalog.record(str(tmp_path / "a.mp4"), _results(3, [shallow, valgus]), {'athlete': 'ana'},
+                               recorded_at='2026-09-01T10:00:00')
+        catalog.record(str(tmp_path / "b.mp4"), _results(2, []), {'athlete': 'luis'}, recorded_at='2026-09-10')
+        catalog.record(str(tmp_path / "c.mp4"), _results(1, []), {'athlete': 'ana'}, recorded_at='2026-10-01')
+
+        reps = catalog.reps(first)
+        assert [rep['fallo'] for rep in reps] == [None, 'Poca Profundidad, Valgo', None]
+        assert reps[0]['duracion_s'] == 1.0 and catalog.faults(first)[0]['valor'] == '95.0°'
+        assert catalog.session(first)['umbrales'] == {'high_thresh': 160.0}
+
+        assert [s['video'] for s in catalog.sessions(athlete='ana')] == ['c.mp4', 'a.mp4']     # Más reciente primero
+        assert [s['video'] for s in catalog.sessions(since='2026-09-01', until='2026-10-01')] == ['b.mp4', 'a.mp4']
+        assert [s['video'] for s in catalog.sessions(fault_type='Poca Profundidad')] == ['a.mp4']
+        assert catalog.fault_counts(athlete='ana') == {'Poca Profundidad': 1, 'Valgo': 1}
+        with pytest.raises(ValueError, match="Fecha no válida"):
+            catalog.record(str(tmp_path / "d.mp4"), _results(1, []), {'session_date': 'ayer'})
+        assert catalog.athletes() == ['ana', 'luis']
+
+        # Reanalizar un vídeo sustituye su fila (y sus repeticiones y fallos)
+        again = catalog.record(str(tmp_path / "a.mp4"), _results(4, []), {'athlete': 'ana'}, recorded_at='2026-09-01')
+        assert len(catalog.sessions()) == 3 and len(catalog.reps(again)) == 4
+        assert catalog.reps(first) == [] and catalog.fault_types() == []
+
+
+def test_text_dates_are_normalized(tmp_path):
+    # Con espacio o con 'T', con o sin fracciones: todas se guardan y se filtran en la misma forma
+    with SessionCatalog(str(tmp_path / "catalogo.sqlite")) as catalog:
+        late = catalog.record(str(tmp_path / "a.mp4"), _results(1, []), recorded_at='2026-10-01 10:00')
+        catalog.record(str(tmp_path / "b.mp4"), _results(1, []), recorded_at='2026-10-01T09:00:00.5')
+        catalog.record(str(tmp_path / "c.mp4"), _results(1, []), recorded_at='20260930')
+
+        assert catalog.session(late)['fecha'] == '2026-10-01T10:00:00'
+        assert [s['fecha'] for s in catalog.sessions()] == ['2026-10-01T10:00:00', '2026-10-01T09:00:00',
+                                                            '2026-09-30']
+        assert [s['video'] for s in catalog.sessions(since='2026-10-01 09:30')] == ['a.mp4']
+        assert [s['video'] for s in catalog.sessions(since='2026-10-01', until='2026-10-01T10:00')] == ['b.mp4']
+
+
+def test_pipeline_registers_session(tmp_path, monkeypatch):
+    video = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(video, cv2.VideoWriter_fourcc(*'MJPG'), 30.0, (64, 48))
+    for idx in range(90):
+        writer.write(np.full((48, 64, 3), idx, dtype=np.uint8))
+    writer.release()
+    recording = save_recording(str(tmp_path / "sesion.npz"), synthetic_session(90, seed=2))
+    monkeypatch.setattr(config, 'USE_3D_ANALYSIS', True)
+
+    settings = {'output_dir': str(tmp_path), 'replay_landmarks': recording, 'athlete': 'ana',
+                'session_date': '2026-10-01'}
+    results = src.pipeline.run_full_pipeline_in_memory(video, settings)
+    with SessionCatalog(str(tmp_path / config.SESSION_CATALOG_FILENAME)) as catalog:
+        session = catalog.session(results['sesion_catalogo'])
+        assert session['atleta'] == 'ana' and session['fecha'] == '2026-10-01' and session['modo'] == '3D'
+        assert session['repeticiones'] == results['repeticiones_contadas'] > 0
+        assert len(catalog.reps(session['id'])) == len(results['detalle_repeticiones'])
+
+    results = src.pipeline.run_full_pipeline_in_memory(video, {**settings, 'use_catalog': False})
+    assert results['sesion_catalogo'] is None
+    # Una fecha mal formada solo impide el registro, no el análisis
+    results = src.pipeline.run_full_pipeline_in_memory(video, {**settings, 'session_date': ['2026-10-01']})
+    assert results['sesion_catalogo'] is None and results['repeticiones_contadas'] > 0
@@ -0,0 +1,37 @@
+# tests/test_shared_frames.py
+
+import numpy as np
+import pytest
+from multiprocessing import shared_memory
+
+from src.A_preprocessing.shared_frames import SharedFrameRing
+
+
+def test_ring_write_and_attach_roundtrip():
+    """Un segundo objeto adjuntado por nombre ve, sin copia, lo escrito por el propietario."""
+    ring = SharedFrameRing((4, 6, 3), slots=3)
+    frame = np.arange(4 * 6 * 3, dtype=np.uint8).reshape(4, 6, 3)
+    ring.write(1, frame)
+
+    attached = SharedFrameRing.attach(ring.spec)
+    assert np.array_equal(attached.view(1), frame)
+    attached.view(2)[...] = 7
+    assert (ring.view(2) == 7).all()
+
+    attached.close()
+    ring.close()
+
+
+def test_ring_rejects_wrong_shape():
+    ring = SharedFrameRing((4, 6, 3), slots=1)
+    with pytest.raises(ValueError):
+        ring.write(0, np.zeros((6, 4, 3), dtype=np.uint8))
+    ring.close()
+
+
+def test_owner_close_unlinks_segment():
+    ring = SharedFrameRing((2, 2, 3), slots=2)
+    name = ring.name
+    ring.close()
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
@@ -0,0 +1,77 @@
+# tests/test_streaming_reps.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.D_modeling.analysis_3d import count_reps_3d
+from src.D_modeling.count_reps import (
+    StreamingRepCounter,
+    StreamingValleyCounter,
+    count_reps_by_valleys,
+    detect_reps_hysteresis,
+)
+
+
+def _squat_series(n_reps: int = 15, seed: int = 0, noise: float = 3.0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    cycles = []
+    for depth in rng.uniform(55, 125, n_reps):
+        length = int(rng.integers(30, 70))
+        cycle = depth + (175 - depth) * (0.5 + 0.5 * np.cos(np.linspace(0, 2 * np.pi, length)))
+        cycles.append(np.concatenate([cycle, np.full(int(rng.integers(0, 20)), 175.0)]))
+    series = np.concatenate(cycles)
+    return series + rng.normal(0, noise, len(series))
+
+
+def _run(counter, angles) -> list[dict]:
+    events = []
+    for angle in angles:
+        events += counter.push(angle)
+    return events + counter.flush()
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_streaming_hysteresis_matches_offline(seed):
+    angles = _squat_series(seed=seed)
+    events = _run(StreamingRepCounter(up_thresh=160, down_thresh=100, depth_fail_thresh=90), angles)
+    reps = [e for e in events if e['evento'] == 'repeticion']
+    faults = [{k: v for k, v in e.items() if k != 'evento'} for e in events if e['evento'] == 'fallo']
+
+    offline = detect_reps_hysteresis(angles, up_thresh=160, down_thresh=100)
+    pd.testing.assert_frame_equal(pd.DataFrame(reps).drop(columns='evento'), offline, check_dtype=False)
+    df = pd.DataFrame({'frame_idx': np.arange(len(angles)), 'rodilla_izq': angles})
+    assert faults == count_reps_3d(df, up_thresh=160, down_thresh=100, depth_fail_thresh=90)[1]
+
+
+def test_streaming_hysteresis_emits_on_confirmation():
+    counter = StreamingRepCounter(up_thresh=160, down_thresh=100, depth_fail_thresh=90)
+    assert counter.push(170) == [] and counter.push(95) == [] and counter.push(np.nan) == []
+    events = counter.push(165)
+    assert [e['evento'] for e in events] == ['repeticion', 'fallo']
+    assert events[0]['frame_inicio'] == 1 and events[0]['frame_fin'] == 3
+    assert counter.count == 1
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_streaming_valleys_match_find_peaks(seed):
+    angles = _squat_series(seed=seed)
+    events = _run(StreamingValleyCounter(peak_height_thresh=100, prominence=10, distance=15), angles)
+    assert len(events) == count_reps_by_valleys(angles, peak_height_thresh=100, prominence=10, distance=15)
+
+
+def test_streaming_valleys_bounded_delay_and_distance():
+    counter = StreamingValleyCounter(peak_height_thresh=100, prominence=10, distance=5)
+    delays = []
+    angles = _squat_series(n_reps=6, seed=3, noise=0.0)
+    for frame, angle in enumerate(angles):
+        for event in counter.push(angle):
+            delays.append(frame - event['frame_fondo'])
+    assert counter.count == len(delays) > 0
+    # Retardo: subida de 10° desde el fondo + 'distance' fotogramas
+    assert max(delays) < 20
+
+    # Dos valles a menos de 'distance': solo cuenta el más profundo
+    counter = StreamingValleyCounter(peak_height_thresh=100, prominence=10, distance=15)
+    events = _run(counter, [170, 90, 120, 80, 120, 170] + [170] * 20)
+    assert [(e['frame_fondo'], e['angulo_minimo']) for e in events] == [(3, 80.0)]
@@ -0,0 +1,67 @@
+# tests/test_threaded_stages.py
+
+import threading
+import pytest
+
+from src.threaded_stages import PrefetchIterator, ThreadedSink
+
+
+def test_prefetch_preserves_order():
+    assert list(PrefetchIterator(range(100), maxsize=4)) == list(range(100))
+
+
+def test_prefetch_propagates_producer_error():
+    """Un fallo en el hilo productor se relanza en el consumidor tras los elementos previos."""
+    def failing():
+        yield 1
+        yield 2
+        raise IOError("fallo de decodificación")
+
+    received = []
+    with pytest.raises(IOError):
+        for item in PrefetchIterator(failing(), maxsize=1):
+            received.append(item)
+    assert received == [1, 2]
+
+
+def test_prefetch_close_stops_blocked_producer():
+    """Cerrar a mitad de consumo no deja al productor bloqueado en la cola llena."""
+    closed = threading.Event()
+
+    def endless():
+        try:
+            i = 0
+            while True:
+                yield i
+                i += 1
+        finally:
+            closed.set()
+
+    prefetch = PrefetchIterator(endless(), maxsize=2)
+    for item in prefetch:
+        if item == 5:
+            break
+    prefetch.close()
+    assert closed.is_set()
+
+
+def test_sink_consumes_everything_in_order():
+    received = []
+    sink = ThreadedSink(received.append, maxsize=2)
+    for i in range(50):
+        sink.put(i)
+    sink.close()
+    assert received == list(range(50))
+
+
+def test_sink_propagates_consumer_error():
+    def consumer(item):
+        if item == 3:
+            raise ValueError("fallo al codificar")
+
+    sink = ThreadedSink(consumer, maxsize=1)
+    with pytest.raises(ValueError):
+        for i in range(1000):
+            sink.put(i)
+        sink.close()
+    sink.abort()
@@ -0,0 +1,36 @@
+# tests/test_video_renderer.py
+
+import numpy as np
+
+from src import config
+from src.B_pose_estimation.estimators import NUM_LANDMARKS
+from src.F_visualization.video_renderer import draw_pose_landmarks
+
+
+def _single_point(x: float, y: float, visibility: float = 1.0) -> np.ndarray:
+    landmarks = np.full((NUM_LANDMARKS, 4), np.nan, dtype=np.float32)
+    landmarks[0] = (x, y, 0.0, visibility)
+    return landmarks
+
+
+def test_draw_pose_landmarks_does_not_modify_frame_by_default():
+    frame = np.zeros((100, 200, 3), dtype=np.uint8)
+    annotated = draw_pose_landmarks(frame, _single_point(0.5, 0.5))
+    assert not frame.any()
+    assert tuple(annotated[50, 100]) == config.LANDMARK_COLOR
+
+
+def test_draw_pose_landmarks_maps_crop_relative_coordinates():
+    """Con crop_box, (0.5, 0.5) es el centro del recorte, no el de la imagen."""
+    frame = np.zeros((100, 200, 3), dtype=np.uint8)
+    annotated = draw_pose_landmarks(frame, _single_point(0.5, 0.5), crop_box=[100, 0, 200, 40])
+    assert tuple(annotated[20, 150]) == config.LANDMARK_COLOR
+    assert not annotated[50, 100].any()
+
+
+def test_draw_pose_landmarks_skips_low_visibility_and_missing():
+    frame = np.zeros((100, 200, 3), dtype=np.uint8)
+    assert not draw_pose_landmarks(frame, _single_point(0.5, 0.5, visibility=0.1)).any()
+    assert not draw_pose_landmarks(frame, None).any()
+    draw_pose_landmarks(frame, _single_point(0.5, 0.5), copy=False)
+    assert frame.any()